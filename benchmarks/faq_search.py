@@ -0,0 +1,101 @@
+import argparse
+import math
+import os
+import random
+import sys
+import time
+from typing import Dict, List, Tuple
+
+# Запуск и как модуля (python -m benchmarks.<имя>), и как скрипта: корень репозитория в sys.path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.faq_search import FAQSearchIndex, QUESTION_WEIGHT, analyze
+
+
+def synthetic_faq(entries: int, vocabulary: int, seed: int,
+                  zipf: bool = False) -> Tuple[Dict[str, Dict[str, str]], List[str]]:
+    """
+    Синтетический FAQ: вопросы по 4-10 слов, ответы по 15-40 слов и запросы по 2-6 слов.
+
+    Слова выбираются из словаря равномерно, а при zipf=True - с частотами по
+    закону Ципфа (несколько слов встречаются почти в каждом вопросе).
+    """
+    rng = random.Random(seed)
+    alphabet = "абвгдежзиклмнопрстуфхцчшыэюя"
+    words = ["".join(rng.choice(alphabet) for _ in range(rng.randint(4, 10))) for _ in range(vocabulary)]
+    weights = [1 / (rank + 1) for rank in range(vocabulary)] if zipf else None
+    faq = {
+        str(q_id): {
+            "question": " ".join(rng.choices(words, weights, k=rng.randint(4, 10))),
+            "answer": " ".join(rng.choices(words, weights, k=rng.randint(15, 40)))
+        }
+        for q_id in range(1, entries + 1)
+    }
+    queries = [" ".join(rng.choices(words, weights, k=rng.randint(2, 6))) for _ in range(1000)]
+    return faq, queries
+
+
+class LinearScan:
+    """Та же модель TF-IDF без инвертированного индекса: запрос сравнивается с вектором каждого вопроса."""
+
+    def __init__(self, index: FAQSearchIndex, entries: Dict[str, Dict[str, str]]):
+        self.index = index
+        self.vectors: Dict[str, Dict[str, float]] = {}
+        for q_id, q_data in entries.items():
+            frequencies: Dict[str, float] = {}
+            for term in analyze(q_data["question"], index.language):
+                frequencies[term] = frequencies.get(term, 0.0) + QUESTION_WEIGHT
+            for term in analyze(q_data["answer"], index.language):
+                frequencies[term] = frequencies.get(term, 0.0) + 1.0
+            weights = {term: (1.0 + math.log(tf)) * index.idf[term] for term, tf in frequencies.items()}
+            norm = math.sqrt(sum(weight * weight for weight in weights.values())) or 1.0
+            self.vectors[q_id] = {term: weight / norm for term, weight in weights.items()}
+
+    def search(self, text: str, limit: int = 5) -> List[Tuple[str, float]]:
+        query = self.index.query_vector(text)
+        scores = []
+        for q_id, vector in self.vectors.items():
+            score = sum(weight * vector.get(term, 0.0) for term, weight in query.items())
+            if score > 0:
+                scores.append((q_id, score))
+        scores.sort(key=lambda item: item[1], reverse=True)
+        return scores[:limit]
+
+
+def measure(search, queries: List[str]) -> float:
+    """Среднее время запроса (мс)."""
+    started = time.perf_counter()
+    for query in queries:
+        search(query)
+    return (time.perf_counter() - started) / len(queries) * 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Сравнение поиска по FAQ: инвертированный индекс и линейный перебор")
+    parser.add_argument("--entries", type=int, default=10000, help="Количество вопросов в синтетическом FAQ")
+    parser.add_argument("--vocabulary", type=int, default=3000, help="Размер словаря")
+    parser.add_argument("--queries", type=int, default=200, help="Количество запросов для замера")
+    parser.add_argument("--seed", type=int, default=1, help="Зерно генератора")
+    parser.add_argument("--zipf", action="store_true", help="Частоты слов по закону Ципфа вместо равномерных")
+    args = parser.parse_args()
+
+    faq, queries = synthetic_faq(args.entries, args.vocabulary, args.seed, args.zipf)
+    queries = queries[:args.queries]
+
+    started = time.perf_counter()
+    index = FAQSearchIndex(faq, "ru")
+    print(f"Построение индекса ({args.entries} вопросов): {time.perf_counter() - started:.2f} с")
+    scan = LinearScan(index, faq)
+
+    # Оба способа должны находить одни и те же вопросы
+    mismatches = sum(
+        [q_id for q_id, _ in index.search(query)] != [q_id for q_id, _ in scan.search(query)]
+        for query in queries[:50]
+    )
+    print(f"Расхождений в первых 5 результатах (из 50 запросов): {mismatches}")
+
+    index_ms = measure(index.search, queries)
+    scan_ms = measure(scan.search, queries)
+    print(f"Инвертированный индекс: {index_ms:.3f} мс на запрос")
+    print(f"Линейный перебор:       {scan_ms:.3f} мс на запрос")
+    print(f"Ускорение: x{scan_ms / index_ms:.1f}")
@@ -0,0 +1,115 @@
+import argparse
+import logging
+import os
+import queue
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Tuple
+
+# Запуск и как модуля (python -m benchmarks.<имя>), и как скрипта: корень репозитория в sys.path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.logger import BatchQueueListener, BatchStreamHandler, DailyFileHandler, DeferredQueueHandler
+
+LINE_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+QUEUE_LINE_FORMAT = '%(asctime)s - %(levelname)s - %(trace)s%(message)s'
+
+# Данные, которые отладочные строки выводят целиком (как log_debug в connect_to_chat)
+SESSION = {"user_id": 609461858, "admin_id": 1209461858, "admin_name": "Администратор", "topic_id": 4411,
+           "status": "connected", "notification_id": 991, "history": list(range(20))}
+
+
+def sync_logger(directory: str, console) -> Tuple[logging.Logger, Callable[[], None]]:
+    """Прежняя схема: FileHandler и StreamHandler пишут в потоке вызова, flush после каждой строки."""
+    log = logging.getLogger("benchmark.sync")
+    log.setLevel(logging.DEBUG)
+    log.propagate = False
+    file_handler = logging.FileHandler(os.path.join(directory, "sync.log"), encoding="utf-8")
+    file_handler.setFormatter(logging.Formatter(LINE_FORMAT))
+    stream_handler = logging.StreamHandler(console)
+    stream_handler.setLevel(logging.INFO)
+    stream_handler.setFormatter(logging.Formatter(LINE_FORMAT, datefmt='%H:%M:%S'))
+    log.handlers = [file_handler, stream_handler]
+
+    def close():
+        for handler in log.handlers:
+            handler.close()
+    return log, close
+
+
+def queue_logger(directory: str, console, level: int, batch_size: int) -> Tuple[logging.Logger, Callable[[], None]]:
+    """Схема utils.logger: запись в очередь, форматирование и запись пачками в фоновом потоке."""
+    log = logging.getLogger(f"benchmark.queue.{logging.getLevelName(level)}")
+    log.setLevel(level)
+    log.propagate = False
+    file_handler = DailyFileHandler(directory, f"queue_{logging.getLevelName(level).lower()}", ".log",
+                                    retention_days=0, compress=False)
+    file_handler.setFormatter(logging.Formatter(QUEUE_LINE_FORMAT))
+    stream_handler = BatchStreamHandler(console)
+    stream_handler.setLevel(logging.INFO)
+    stream_handler.setFormatter(logging.Formatter(QUEUE_LINE_FORMAT, datefmt='%H:%M:%S'))
+    log_queue = queue.SimpleQueue()
+    log.handlers = [DeferredQueueHandler(log_queue)]
+    listener = BatchQueueListener(log_queue, file_handler, stream_handler, batch_size=batch_size)
+    listener.start()
+
+    def close():
+        listener.stop()
+        file_handler.close()
+    return log, close
+
+
+def workload_eager(log: logging.Logger, updates: int) -> None:
+    """Строки обновления в прежнем виде: f-строки форматируются до проверки уровня."""
+    for user_id in range(updates):
+        log.info(f"Command: /start | User: [ID: {user_id}] @student ({user_id})")
+        log.debug(f"Session before connect: {SESSION}")
+        log.debug(f"Admin statuses: {SESSION['admin_name']} -> busy, user {user_id}")
+        log.info(f"Admin [ID: 1209461858] (Администратор) connected to user [ID: {user_id}]")
+
+
+def workload_lazy(log: logging.Logger, updates: int) -> None:
+    """Те же строки с %-аргументами: при выключенном DEBUG не форматируются."""
+    for user_id in range(updates):
+        log.info("Command: /start | User: [ID: %s] @student (%s)", user_id, user_id)
+        log.debug("Session before connect: %s", SESSION)
+        log.debug("Admin statuses: %s -> busy, user %s", SESSION['admin_name'], user_id)
+        log.info("Admin [ID: 1209461858] (Администратор) connected to user [ID: %s]", user_id)
+
+
+def measure(setup: Callable[[], Tuple[logging.Logger, Callable[[], None]]],
+            workload: Callable[[logging.Logger, int], None], updates: int) -> Dict[str, float]:
+    """Время в потоке вызова (то, что блокирует цикл событий) и время до записи всех строк на диск."""
+    log, close = setup()
+    started = time.perf_counter()
+    workload(log, updates)
+    caller = time.perf_counter() - started
+    close()
+    total = time.perf_counter() - started
+    return {"caller_us": caller / updates * 1e6, "total_us": total / updates * 1e6}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Пропускная способность логирования: синхронные обработчики и очередь")
+    parser.add_argument("--updates", type=int, default=20000, help="Количество обновлений (по 4 строки лога)")
+    parser.add_argument("--batch-size", type=int, default=100, help="LOG_BATCH_SIZE фонового потока")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory, open(os.devnull, "w", encoding="utf-8") as console:
+        cases: List[Tuple[str, Callable, Callable]] = [
+            ("Синхронные обработчики, DEBUG", lambda: sync_logger(directory, console), workload_eager),
+            ("Очередь, DEBUG", lambda: queue_logger(directory, console, logging.DEBUG, args.batch_size),
+             workload_lazy),
+            ("Очередь, INFO", lambda: queue_logger(directory, console, logging.INFO, args.batch_size),
+             workload_lazy),
+        ]
+        print(f"{args.updates} обновлений по 4 строки лога, консоль в {os.devnull}")
+        print(f"{'':32} {'в потоке вызова':>18} {'до записи на диск':>20}")
+        results = {}
+        for name, setup, workload in cases:
+            results[name] = measure(setup, workload, args.updates)
+            print(f"{name:32} {results[name]['caller_us']:14.1f} мкс {results[name]['total_us']:16.1f} мкс")
+        baseline = results[cases[0][0]]["caller_us"]
+        for name, _, _ in cases[1:]:
+            print(f"{name}: в потоке вызова быстрее в x{baseline / results[name]['caller_us']:.1f}")
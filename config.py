@@ -27,4 +27,107 @@ ADMIN_TOPICS = {
     "Сагатбекова Ажар": {"id": 1141, "user_id": 1007868370, "status": "open"},
     "Кенжебаева Жансая": {"id": 1143, "user_id": 1588957616, "status": "open"},
     "Тулеубекова Асель": {"id": 1155, "user_id": 822719166, "status": "open"}
-} 
\ No newline at end of file
+}
+
+# Размер кэша пользовательских данных (количество записей в памяти)
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", 1024))
+
+# Хранилище пользовательских данных: "json" (файл на пользователя) или "sqlite"
+USER_STORE_BACKEND = os.getenv("USER_STORE_BACKEND", "json")
+# Путь к файлу базы SQLite
+DATABASE_PATH = os.getenv("DATABASE_PATH", "data/bot.db")
+
+# Количество потоков для дисковых операций
+IO_WORKERS = int(os.getenv("IO_WORKERS", 4))
+
+# Интервал проверки изменений banned.json (секунды)
+BAN_RELOAD_INTERVAL = float(os.getenv("BAN_RELOAD_INTERVAL", 5))
+
+# Интервал проверки изменений faq/faq_*.json (секунды)
+FAQ_RELOAD_INTERVAL = float(os.getenv("FAQ_RELOAD_INTERVAL", 5))
+
+# Максимальное количество вопросов FAQ на одной странице
+FAQ_PAGE_SIZE = int(os.getenv("FAQ_PAGE_SIZE", 10))
+
+# Количество результатов поиска по FAQ
+FAQ_SEARCH_LIMIT = int(os.getenv("FAQ_SEARCH_LIMIT", 5))
+
+# Минимальное сходство (0..1), при котором вопрос сначала получает ответ из FAQ
+FAQ_SUGGEST_THRESHOLD = float(os.getenv("FAQ_SUGGEST_THRESHOLD", 0.5))
+
+# FSM-хранилище (состояния диалогов): "memory", "sqlite" (в DATABASE_PATH) или "redis"
+FSM_STORAGE_BACKEND = os.getenv("FSM_STORAGE_BACKEND", "sqlite")
+# Адрес Redis для FSM_STORAGE_BACKEND=redis ("local://" - локальная замена внутри процесса)
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+# Сохранять сессии чатов в DATABASE_PATH, чтобы восстановить их после перезапуска
+CHAT_SESSIONS_PERSIST = os.getenv("CHAT_SESSIONS_PERSIST", "true").lower() in ("1", "true", "yes")
+
+# Файл со списком администраторов в формате ADMIN_TOPICS (если есть, заменяет ADMIN_TOPICS)
+ADMIN_TOPICS_FILE = os.getenv("ADMIN_TOPICS_FILE", "admins.json")
+# Интервал проверки изменений файла администраторов (секунды)
+ADMIN_RELOAD_INTERVAL = float(os.getenv("ADMIN_RELOAD_INTERVAL", 5))
+
+# Максимальное количество одновременных отправок уведомлений администраторам
+NOTIFY_CONCURRENCY = int(os.getenv("NOTIFY_CONCURRENCY", 8))
+
+# Ограничения скорости отправки (лимиты Telegram): сообщений в секунду на весь бот,
+# в секунду в один личный чат и в минуту в одну группу
+SEND_GLOBAL_RATE = float(os.getenv("SEND_GLOBAL_RATE", 30))
+SEND_CHAT_RATE = float(os.getenv("SEND_CHAT_RATE", 1))
+SEND_GROUP_RATE_PER_MINUTE = float(os.getenv("SEND_GROUP_RATE_PER_MINUTE", 20))
+# Количество повторов запроса после ответа 429 (retry_after)
+SEND_MAX_RETRIES = int(os.getenv("SEND_MAX_RETRIES", 3))
+
+# Максимальное количество сообщений чата в очереди на пересылку (на одну сессию и направление)
+RELAY_QUEUE_SIZE = int(os.getenv("RELAY_QUEUE_SIZE", 50))
+
+# Сколько секунд ждать остальные части альбома после последнего полученного файла
+MEDIA_GROUP_WINDOW = float(os.getenv("MEDIA_GROUP_WINDOW", 0.5))
+
+# Способ получения обновлений: "polling" (long polling) или "webhook" (HTTP-сервер aiohttp)
+BOT_MODE = os.getenv("BOT_MODE", "polling")
+# Публичный адрес сервера (https://example.com); если пусто, вебхук регистрируется вручную
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")
+# Путь, по которому Telegram присылает обновления
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/webhook")
+# Секрет для заголовка X-Telegram-Bot-Api-Secret-Token; если пусто, генерируется при регистрации вебхука
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+# Адрес и порт HTTP-сервера вебхука
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", 8080))
+
+# Сколько секунд при остановке ждать обработки уже принятых обновлений и пересылки сообщений
+SHUTDOWN_TIMEOUT = float(os.getenv("SHUTDOWN_TIMEOUT", 10))
+
+# Количество процессов-обработчиков; при WORKERS > 1 главный процесс только принимает
+# обновления и распределяет их по процессам по ID пользователя
+WORKERS = int(os.getenv("WORKERS", 1))
+# Номер процесса-обработчика (задается главным процессом, 0 - обычный запуск)
+WORKER_ID = int(os.getenv("WORKER_ID", 0))
+# Порт первого процесса-обработчика (остальные получают следующие порты на 127.0.0.1)
+WORKER_BASE_PORT = int(os.getenv("WORKER_BASE_PORT", 8100))
+# Сколько раз главный процесс пытается передать обновление процессу-обработчику, прежде чем отбросить его
+WORKER_FORWARD_ATTEMPTS = int(os.getenv("WORKER_FORWARD_ATTEMPTS", 10))
+
+# Минимальный уровень логирования (DEBUG, INFO, WARNING, ERROR); сообщения ниже отбрасываются без форматирования
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# Сколько записей лога фоновый поток пишет до сброса буферов файла и консоли
+LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", 100))
+
+# Сколько дней хранить файлы логов (файлы прошлых дней сжимаются gzip); 0 - хранить все
+LOG_RETENTION_DAYS = int(os.getenv("LOG_RETENTION_DAYS", 30))
+# Запись журнала событий logs/events_ГГГГ-ММ-ДД.jsonl
+EVENT_LOG = os.getenv("EVENT_LOG", "true").lower() in ("1", "true", "yes")
+# Модули, для которых отладка включена при запуске (через запятую: file_operations,keyboards,common,registration)
+LOG_DEBUG_MODULES = [name.strip() for name in os.getenv("LOG_DEBUG_MODULES", "").split(",") if name.strip()]
+
+# Адрес и порт HTTP-сервера метрик в формате Prometheus (GET /metrics); 0 - сервер не запускается.
+# Процесс-обработчик N (WORKERS > 1) слушает METRICS_PORT + N
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", 0))
+
+# Трассировка обработки обновлений: спаны пишутся в logs/spans_ГГГГ-ММ-ДД.jsonl, ID трассировки - в строки лога
+TRACING = os.getenv("TRACING", "false").lower() in ("1", "true", "yes")
+# Записывать только трассировки обновлений, обработка которых заняла не меньше стольких миллисекунд
+TRACE_MIN_DURATION_MS = float(os.getenv("TRACE_MIN_DURATION_MS", 0))
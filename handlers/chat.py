@@ -1,31 +1,57 @@
 import json
+from typing import Awaitable, List, Optional, Tuple
+
 from aiogram import Router, F, Bot
 from aiogram.fsm.context import FSMContext
 from aiogram.types import Message, CallbackQuery
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from aiogram.exceptions import TelegramBadRequest
 from aiogram.filters import Command
-from aiogram.fsm.storage.memory import MemoryStorage, StorageKey
+from aiogram.fsm.storage.base import StorageKey
 
-from config import ADMIN_GROUP_ID, CHAT_NOTIFICATION_TOPIC_ID, ADMIN_TOPICS, ADMIN_IDS
+from config import ADMIN_GROUP_ID, CHAT_NOTIFICATION_TOPIC_ID, ADMIN_IDS, DATABASE_PATH, CHAT_SESSIONS_PERSIST
 from states.chat import ChatStates
-from utils.file_operations import is_user_registered, load_user_data, is_user_banned, get_user_language
-from utils.keyboards import get_main_keyboard
-from utils.logger import log_info, log_error, log_chat_connection, log_callback, log_message, log_debug
+from utils.admins import admin_directory, OPEN, BUSY
+from utils.chat_sessions import ChatSessionRegistry, ChatSessionStore
+from utils.file_operations import is_user_registered_async, load_user_data_async, is_user_banned_async, get_user_language_async, io_executor
+from utils.keyboards import get_main_keyboard_async
+from utils.logger import log_info, log_error, log_chat_connection, log_callback, log_message, log_debug, set_debug, debug_status
+from utils.media_group import media_groups
+from utils.media_relay import relay_album
 from utils.messages import get_message
-from handlers.questions import active_questions
+from utils.relay_queue import relay_queues
+from utils.send_scheduler import PRIORITY_NOTIFICATION, send_priority
+from handlers.questions import question_repository
 
 # Создание роутера
 router = Router()
 
-# Словарь для хранения активных чатов: {user_id: admin_name}
-active_chats = {}
-# Словарь для хранения пользователей ожидающих соединения: {user_id: True}
-waiting_users = {}
-# Словарь для хранения связанных пользователей: {admin_id: user_id}
-admin_connections = {}
-# Словарь для хранения ID сообщений с уведомлениями: {user_id: (message_id, admin_name)}
-notification_messages = {}
+# Сессии чатов: ожидающие пользователи и активные чаты с индексами по пользователю, админу и топику
+chat_sessions = ChatSessionRegistry(ChatSessionStore(DATABASE_PATH) if CHAT_SESSIONS_PERSIST else None, io_executor)
+
+
+def _shared_state_versions() -> Tuple[Optional[int], int]:
+    """Версии таблиц сессий чата и вопросов в базе."""
+    sessions_version = chat_sessions.store.version() if chat_sessions.store is not None else None
+    return sessions_version, question_repository.store.version()
+
+
+async def refresh_shared_state() -> None:
+    """
+    Перечитывание сессий чата и вопросов, измененных другими процессами (WORKERS > 1).
+
+    Версии таблиц читаются в пуле ввода-вывода одним заданием; измененные
+    таблицы перечитываются там же, а в цикле событий реестры только
+    подменяются целиком. Статусы администраторов восстанавливаются по
+    активным чатам.
+    """
+    sessions_version, questions_version = await io_executor.run(_shared_state_versions)
+    if await chat_sessions.refresh(sessions_version):
+        busy = {session.admin_name for session in chat_sessions.connected()}
+        for admin in admin_directory.admins():
+            admin_directory.set_status(admin.name, BUSY if admin.name in busy else OPEN)
+    await question_repository.refresh(questions_version)
+
 
 # Команды администратора
 @router.message(Command("list"))
@@ -43,34 +69,38 @@ async def handle_list_command(message: Message):
     active_chats_list = []
     waiting_users_list = []
     unanswered_questions = []
+    assigned_questions = []
     
     # Получение активных чатов
-    for user_id, admin_name in active_chats.items():
-        user_data = load_user_data(user_id)
+    for session in chat_sessions.connected():
+        user_data = await load_user_data_async(session.user_id)
         active_chats_list.append(
-            f"ID: {user_id}\n"
+            f"ID: {session.user_id}\n"
             f"Имя: {user_data.get('full_name', '')}\n"
-            f"Админ: {admin_name}\n"
+            f"Админ: {session.admin_name}\n"
         )
     
     # Получение ожидающих пользователей
-    for user_id in waiting_users:
-        user_data = load_user_data(user_id)
+    for session in chat_sessions.waiting():
+        user_data = await load_user_data_async(session.user_id)
         waiting_users_list.append(
-            f"ID: {user_id}\n"
+            f"ID: {session.user_id}\n"
             f"Имя: {user_data.get('full_name', '')}\n"
         )
     
     # Получение неотвеченных вопросов
-    for question_id, question_data in active_questions.items():
-        if question_data["status"] == "pending":
-            unanswered_questions.append(
-                f"ID: {question_id}\n"
-                f"От: {question_data['full_name']}\n"
-                f"Курс: {question_data['course']}\n"
-                f"Факультет: {question_data['faculty']}\n"
-                f"Группа: {question_data['group']}\n"
-            )
+    for question_data in question_repository.pending():
+        unanswered_questions.append(
+            f"ID: {question_data['question_id']}\n"
+            f"От: {question_data['full_name']}\n"
+            f"Курс: {question_data['course']}\n"
+            f"Факультет: {question_data['faculty']}\n"
+            f"Группа: {question_data['group']}\n"
+        )
+
+    # Вопросы, на которые этот администратор начал отвечать
+    for question_data in question_repository.assigned_to(user_id):
+        assigned_questions.append(f"ID: {question_data['question_id']} (от {question_data['full_name']})")
     
     # Форматирование ответа
     response = "Активные чаты:\n"
@@ -90,6 +120,9 @@ async def handle_list_command(message: Message):
         response += "\n".join(unanswered_questions)
     else:
         response += "Нет неотвеченных вопросов"
+
+    if assigned_questions:
+        response += "\n\nВаши вопросы в работе:\n" + "\n".join(assigned_questions)
     
     await message.answer(response)
     log_info(f"Admin [ID: {user_id}] requested list of active chats and questions")
@@ -106,20 +139,49 @@ async def handle_result_command(message: Message):
         return
     
     # Подсчет отвеченных вопросов
-    answered_questions = sum(1 for q in active_questions.values() if q["status"] == "answered")
-    total_questions = len(active_questions)
+    question_counts = question_repository.counts()
+    chat_counts = chat_sessions.counts()
+    answered_questions = question_counts["answered"]
+    total_questions = question_counts["total"]
     
     response = (
         f"Статистика:\n"
         f"Всего вопросов: {total_questions}\n"
         f"Отвечено вопросов: {answered_questions}\n"
-        f"Активных чатов: {len(active_chats)}\n"
-        f"Ожидающих пользователей: {len(waiting_users)}"
+        f"Ожидают ответа: {question_counts['pending']}\n"
+        f"Активных чатов: {chat_counts['connected']}\n"
+        f"Ожидающих пользователей: {chat_counts['waiting']}"
     )
     
     await message.answer(response)
     log_info(f"Admin [ID: {user_id}] requested statistics")
 
+@router.message(Command("debug"))
+async def handle_debug_command(message: Message):
+    """Включить или выключить отладочный лог модуля без перезапуска."""
+    user_id = message.from_user.id
+    
+    # Проверка на администратора
+    if user_id not in ADMIN_IDS:
+        log_info(f"Non-admin user [ID: {user_id}] tried to use /debug command")
+        await message.answer("У вас нет прав для использования этой команды.")
+        return
+    
+    # Разбор аргументов команды
+    args = message.text.split()
+    if len(args) == 3 and args[2] in ("on", "off"):
+        if not set_debug(args[1], args[2] == "on"):
+            await message.answer(f"Модуль {args[1]} не найден")
+            return
+        log_info(f"Admin [ID: {user_id}] turned debug {args[2]} for {args[1]}")
+    elif len(args) != 1:
+        await message.answer("Использование:\n/debug - состояние отладки\n/debug <модуль> on|off - включить или выключить")
+        return
+    
+    # Состояние отладки в этом процессе
+    status = "\n".join(f"{name}: {'on' if enabled else 'off'}" for name, enabled in debug_status().items())
+    await message.answer(f"Отладка:\n{status}")
+
 @router.message(Command("delete"))
 async def handle_delete_command(message: Message, state: FSMContext, bot: Bot):
     """Удалить вопрос или чат по ID."""
@@ -146,8 +208,7 @@ async def handle_delete_command(message: Message, state: FSMContext, bot: Bot):
     
     if command_type == "question":
         # Удаление вопроса
-        if target_id in active_questions:
-            del active_questions[target_id]
+        if await question_repository.delete(target_id):
             await message.answer(f"Вопрос #{target_id} удален")
             log_info(f"Admin [ID: {user_id}] deleted question #{target_id}")
         else:
@@ -156,19 +217,11 @@ async def handle_delete_command(message: Message, state: FSMContext, bot: Bot):
     elif command_type == "chat":
         # Удаление чата
         target_id = int(target_id)
-        if target_id in active_chats:
-            admin_name = active_chats[target_id]
-            # Поиск ID администратора из ADMIN_TOPICS
-            admin_id = None
-            admin_topic_id = None
-            for name, info in ADMIN_TOPICS.items():
-                if name == admin_name:
-                    admin_id = info["user_id"]
-                    admin_topic_id = info["id"]
-                    break
-            
-            if admin_id and admin_id in admin_connections:
-                del admin_connections[admin_id]
+        if chat_sessions.is_connected(target_id):
+            session = await chat_sessions.close(target_id)
+            admin_name = session.admin_name
+            admin_topic_id = session.topic_id
+            admin_directory.set_status(admin_name, OPEN)
             
             # Отправка сообщения в топик администратора
             if admin_topic_id:
@@ -191,30 +244,29 @@ async def handle_delete_command(message: Message, state: FSMContext, bot: Bot):
             # Отправка сообщения пользователю
             await bot.send_message(
                 target_id,
-                get_message("connection_terminated_forcibly", get_user_language(target_id)),
-                reply_markup=get_main_keyboard(target_id)
+                get_message("connection_terminated_forcibly", await get_user_language_async(target_id)),
+                reply_markup=await get_main_keyboard_async(target_id)
             )
             
             # Очистка состояния пользователя
             user_state = StorageKey(chat_id=target_id, user_id=target_id, bot_id=message.bot.id)
             await state.storage.set_state(user_state, None)
             
-            del active_chats[target_id]
             await message.answer(f"Чат с пользователем {target_id} удален")
             log_info(f"Admin [ID: {user_id}] deleted chat with user [ID: {target_id}]")
-        elif target_id in waiting_users:
+        elif chat_sessions.is_waiting(target_id):
+            await chat_sessions.close(target_id)
             # Отправка сообщения пользователю
             await bot.send_message(
                 target_id,
-                get_message("connection_terminated_forcibly", get_user_language(target_id)),
-                reply_markup=get_main_keyboard(target_id)
+                get_message("connection_terminated_forcibly", await get_user_language_async(target_id)),
+                reply_markup=await get_main_keyboard_async(target_id)
             )
             
             # Очистка состояния пользователя
             user_state = StorageKey(chat_id=target_id, user_id=target_id, bot_id=message.bot.id)
             await state.storage.set_state(user_state, None)
             
-            del waiting_users[target_id]
             await message.answer(f"Ожидание пользователя {target_id} удалено")
             log_info(f"Admin [ID: {user_id}] deleted waiting user [ID: {target_id}]")
         else:
@@ -231,13 +283,13 @@ async def handle_delete_command(message: Message, state: FSMContext, bot: Bot):
 async def start_chat(callback: CallbackQuery, state: FSMContext):
     """Начало процесса чата."""
     user_id = callback.from_user.id
-    language = get_user_language(user_id)
+    language = await get_user_language_async(user_id)
     
     # Логируем нажатие на кнопку чата
     log_callback(user_id, "chat", username=callback.from_user.username, full_name=callback.from_user.full_name)
     
     # Проверка на бан
-    if is_user_banned(user_id):
+    if await is_user_banned_async(user_id):
         log_info(f"Banned user [ID: {user_id}] tried to start chat")
         try:
             await callback.answer(get_message("banned_user", language), show_alert=True)
@@ -246,11 +298,11 @@ async def start_chat(callback: CallbackQuery, state: FSMContext):
         return
     
     # Проверка на регистрацию
-    if not is_user_registered(user_id):
+    if not await is_user_registered_async(user_id):
         log_info(f"Unregistered user [ID: {user_id}] tried to start chat")
         await callback.message.edit_text(
             "Для того чтобы связаться с Офис Регистраторы, необходимо зарегистрироваться.",
-            reply_markup=get_main_keyboard()
+            reply_markup=await get_main_keyboard_async()
         )
         try:
             await callback.answer()
@@ -258,8 +310,8 @@ async def start_chat(callback: CallbackQuery, state: FSMContext):
             pass
         return
     
-    # Проверка на активный чат
-    if user_id in active_chats or user_id in waiting_users:
+    # Проверка на активный чат и сохранение пользователя в ожидающих
+    if await chat_sessions.start_waiting(user_id) is None:
         log_info(f"User [ID: {user_id}] tried to start chat but already in chat or waiting")
         try:
             await callback.answer(get_message("exit_chat_first", language), show_alert=True)
@@ -267,9 +319,6 @@ async def start_chat(callback: CallbackQuery, state: FSMContext):
             pass
         return
     
-    # Сохранение пользователя в ожидающих
-    waiting_users[user_id] = True
-    
     # Установка состояния ожидания соединения
     await state.set_state(ChatStates.waiting_for_connection)
     
@@ -284,7 +333,7 @@ async def start_chat(callback: CallbackQuery, state: FSMContext):
         pass
     
     # Отправка уведомления администраторам
-    user_data = load_user_data(user_id)
+    user_data = await load_user_data_async(user_id)
     
     # Клавиатура для подключения
     builder = InlineKeyboardBuilder()
@@ -301,14 +350,15 @@ async def start_chat(callback: CallbackQuery, state: FSMContext):
     )
     
     # Отправляем и сохраняем ID сообщения
-    notification_msg = await callback.bot.send_message(
-        ADMIN_GROUP_ID,
-        notification_text,
-        reply_markup=builder.as_markup(),
-        message_thread_id=CHAT_NOTIFICATION_TOPIC_ID
-    )
+    with send_priority(PRIORITY_NOTIFICATION):
+        notification_msg = await callback.bot.send_message(
+            ADMIN_GROUP_ID,
+            notification_text,
+            reply_markup=builder.as_markup(),
+            message_thread_id=CHAT_NOTIFICATION_TOPIC_ID
+        )
     # Сохраняем ID сообщения для быстрого обновления
-    notification_messages[user_id] = (notification_msg.message_id, None)
+    await chat_sessions.set_notification(user_id, notification_msg.message_id)
     log_info(f"Notification sent to admin group for user [ID: {user_id}], message ID: {notification_msg.message_id}")
 
 
@@ -316,31 +366,38 @@ async def start_chat(callback: CallbackQuery, state: FSMContext):
 async def connect_to_chat(callback: CallbackQuery, state: FSMContext, bot: Bot):
     """Подключение администратора к чату."""
     admin_id = callback.from_user.id
-    admin_name = None
     
     # Логируем нажатие на кнопку подключения
     callback_data = callback.data
     log_callback(admin_id, callback_data, username=callback.from_user.username, full_name=callback.from_user.full_name)
     
     # Проверка на админа
-    for name, info in ADMIN_TOPICS.items():
-        if info["user_id"] == admin_id:
-            admin_name = name
-            break
-    
-    if not admin_name:
+    admin = admin_directory.by_user_id(admin_id)
+    if admin is None:
         log_info(f"Non-admin user [ID: {admin_id}] tried to connect to chat")
         try:
             await callback.answer("У вас нет прав для ответа.", show_alert=True)
         except TelegramBadRequest:
             pass
         return
+    admin_name = admin.name
+    admin_topic_id = admin.topic_id
     
     # Получаем ID пользователя из данных колбэка
     user_id = int(callback.data.split("_")[1])
-    
-    # Проверяем, ожидает ли пользователь соединения
-    if user_id not in waiting_users:
+
+    # Админ может вести только один чат
+    if chat_sessions.by_admin(admin_id) is not None:
+        log_info(f"Admin [ID: {admin_id}] ({admin_name}) tried to connect to user [ID: {user_id}] while in another chat")
+        try:
+            await callback.answer("Сначала завершите текущий чат командой /stop.", show_alert=True)
+        except TelegramBadRequest:
+            pass
+        return
+
+    # Подключаем админа, если пользователь ожидает соединения
+    session = await chat_sessions.connect(user_id, admin_id, admin_name, admin_topic_id)
+    if session is None:
         log_info(f"Admin [ID: {admin_id}] ({admin_name}) tried to connect to user [ID: {user_id}] who is not waiting")
         try:
             await callback.answer("Пользователь больше не ожидает соединения.", show_alert=True)
@@ -353,33 +410,20 @@ async def connect_to_chat(callback: CallbackQuery, state: FSMContext, bot: Bot):
         log_info(f"Notification updated to 'closed' for user [ID: {user_id}]")
         return
     
-    # Удаляем пользователя из ожидающих
-    del waiting_users[user_id]
-    
-    # Добавляем в активные чаты
-    active_chats[user_id] = admin_name
-    admin_connections[admin_id] = user_id
-    
     # Обновляем статус топика админа
-    ADMIN_TOPICS[admin_name]["status"] = "busy"
+    admin_directory.set_status(admin_name, BUSY)
     
     # Логируем подключение
     log_chat_connection("connect", user_id, admin_id, admin_name)
-    log_debug(f"Admin connections dict: {admin_connections}")
-    log_debug(f"Active chats dict: {active_chats}")
+    log_debug("Chat session: %s", session)
     
     # Обновляем сообщение в топике уведомлений
     notification_text = callback.message.text.replace("🟢|Открыто", f"🟡|{admin_name}")
     await callback.message.edit_text(notification_text)
     log_info(f"Notification updated to 'connected' ({admin_name}) for user [ID: {user_id}]")
     
-    # Обновляем сохраненный ID и админа в словаре уведомлений
-    if user_id in notification_messages:
-        msg_id, _ = notification_messages[user_id]
-        notification_messages[user_id] = (msg_id, admin_name)
-    
     # Отправляем сообщение пользователю
-    user_message = get_message("admin_connected", get_user_language(user_id)).format(admin_name)
+    user_message = get_message("admin_connected", await get_user_language_async(user_id)).format(admin_name)
     await bot.send_message(user_id, user_message)
     log_info(f"Connection message sent to user [ID: {user_id}]")
     
@@ -388,7 +432,7 @@ async def connect_to_chat(callback: CallbackQuery, state: FSMContext, bot: Bot):
         # Отправляем специальное служебное сообщение пользователю для изменения состояния
         await bot.send_message(
             user_id,
-            get_message("connecting", get_user_language(user_id)),
+            get_message("connecting", await get_user_language_async(user_id)),
             reply_markup=None
         )
         # Хак: отправляем в канал событие обновления состояния пользователя
@@ -398,7 +442,6 @@ async def connect_to_chat(callback: CallbackQuery, state: FSMContext, bot: Bot):
     
     # Изменяем название топика админа
     try:
-        admin_topic_id = ADMIN_TOPICS[admin_name]["id"]
         await bot.edit_forum_topic(
             chat_id=ADMIN_GROUP_ID,
             message_thread_id=admin_topic_id,
@@ -409,8 +452,7 @@ async def connect_to_chat(callback: CallbackQuery, state: FSMContext, bot: Bot):
         log_error(f"Error changing topic title: {e}", exc_info=True)
     
     # Отправляем сообщение админу в его топик
-    admin_topic_id = ADMIN_TOPICS[admin_name]["id"]
-    user_data = load_user_data(user_id)
+    user_data = await load_user_data_async(user_id)
     admin_message = (
         f"От: {user_data.get('full_name', '')}\n"
         f"Курс: {user_data.get('course', '')}\n"
@@ -436,24 +478,23 @@ async def handle_stop_command(message: Message, state: FSMContext, bot: Bot):
     
     # Логируем команду остановки
     log_info(f"Stop command received from user [ID: {user_id}]")
-    log_debug(f"Current admin connections: {admin_connections}")
-    log_debug(f"Current active chats: {active_chats}")
+    log_debug("Current chat sessions: %s", chat_sessions.counts())
     
     # Если сообщение от пользователя (не из группы)
     if chat_id == user_id:
         current_state = await state.get_state()
         
         # Проверяем, находится ли пользователь в ожидании соединения
-        if user_id in waiting_users:
-            del waiting_users[user_id]
+        if chat_sessions.is_waiting(user_id):
+            session = await chat_sessions.close(user_id)
             log_chat_connection("timeout", user_id)
             
             # Обновляем уведомление напрямую по сохраненному ID
-            if user_id in notification_messages:
-                msg_id, _ = notification_messages[user_id]
+            if session.notification_id is not None:
+                msg_id = session.notification_id
                 try:
                     # Используем более прямой метод для редактирования сообщения
-                    user_data = load_user_data(user_id)
+                    user_data = await load_user_data_async(user_id)
                     notification_text = (
                         "Кто-то пытается связаться\n"
                         f"От: {user_data.get('full_name', '')}\n"
@@ -492,9 +533,6 @@ async def handle_stop_command(message: Message, state: FSMContext, bot: Bot):
                                 message_thread_id=CHAT_NOTIFICATION_TOPIC_ID
                             )
                             log_info(f"Sent new notification message for user [ID: {user_id}]")
-                    
-                    # Удаляем запись из словаря
-                    del notification_messages[user_id]
                 except Exception as e:
                     log_error(f"Error updating notification directly: {e}", exc_info=True)
                     # В случае ошибки отправляем новое сообщение
@@ -507,28 +545,24 @@ async def handle_stop_command(message: Message, state: FSMContext, bot: Bot):
                     except Exception as e:
                         log_error(f"Error sending new notification: {e}", exc_info=True)
             
-            await message.answer(get_message("connection_terminated_by_user", get_user_language(user_id)), reply_markup=get_main_keyboard(user_id))
+            await message.answer(get_message("connection_terminated_by_user", await get_user_language_async(user_id)), reply_markup=await get_main_keyboard_async(user_id))
             await state.clear()
             log_info(f"User [ID: {user_id}] disconnected while waiting")
             return
         
         # Проверяем, находится ли пользователь в активном чате
-        if user_id in active_chats:
-            admin_name = active_chats[user_id]
+        if chat_sessions.is_connected(user_id):
+            session = await chat_sessions.close(user_id)
+            admin_name = session.admin_name
             
             # Обновляем статус топика админа
-            if admin_name in ADMIN_TOPICS:
-                ADMIN_TOPICS[admin_name]["status"] = "open"
-                admin_topic_id = ADMIN_TOPICS[admin_name]["id"]
-                admin_id = ADMIN_TOPICS[admin_name]["user_id"]
+            if admin_directory.set_status(admin_name, OPEN):
+                admin_topic_id = session.topic_id
+                admin_id = session.admin_id
                 
                 # Логируем разрыв соединения пользователем
                 log_chat_connection("disconnect_user", user_id, admin_id, admin_name)
                 
-                # Удаляем связь админа
-                if admin_id in admin_connections:
-                    del admin_connections[admin_id]
-                
                 # Отправляем сообщение админу
                 await bot.send_message(
                     ADMIN_GROUP_ID,
@@ -549,61 +583,54 @@ async def handle_stop_command(message: Message, state: FSMContext, bot: Bot):
                     log_error(f"Error changing topic title: {e}", exc_info=True)
                 
                 # Обновляем сообщение в топике уведомлений напрямую
-                if user_id in notification_messages:
-                    msg_id, saved_admin_name = notification_messages[user_id]
-                    if saved_admin_name == admin_name:
+                if session.notification_id is not None:
+                    msg_id = session.notification_id
+                    try:
+                        user_data = await load_user_data_async(user_id)
+                        notification_text = (
+                            "Кто-то пытается связаться\n"
+                            f"От: {user_data.get('full_name', '')}\n"
+                            f"Курс: {user_data.get('course', '')}\n"
+                            f"Факультет: {user_data.get('faculty', '')}\n"
+                            f"Группа: {user_data.get('group', '')}\n\n"
+                            "🔴|Закрыто"
+                        )
+                        
+                        # Пробуем разные подходы к редактированию
                         try:
-                            user_data = load_user_data(user_id)
-                            notification_text = (
-                                "Кто-то пытается связаться\n"
-                                f"От: {user_data.get('full_name', '')}\n"
-                                f"Курс: {user_data.get('course', '')}\n"
-                                f"Факультет: {user_data.get('faculty', '')}\n"
-                                f"Группа: {user_data.get('group', '')}\n\n"
-                                "🔴|Закрыто"
+                            # Подход 1: Используем update_message
+                            await bot.edit_message_text(
+                                text=notification_text,
+                                chat_id=ADMIN_GROUP_ID,
+                                message_id=msg_id
                             )
-                            
-                            # Пробуем разные подходы к редактированию
+                            log_info(f"Successfully updated notification (Method 1) for user [ID: {user_id}]")
+                        except Exception as e1:
+                            log_error(f"Method 1 failed: {e1}")
                             try:
-                                # Подход 1: Используем update_message
+                                # Подход 2: С параметром disable_web_page_preview
                                 await bot.edit_message_text(
                                     text=notification_text,
                                     chat_id=ADMIN_GROUP_ID,
-                                    message_id=msg_id
+                                    message_id=msg_id,
+                                    disable_web_page_preview=True
                                 )
-                                log_info(f"Successfully updated notification (Method 1) for user [ID: {user_id}]")
-                            except Exception as e1:
-                                log_error(f"Method 1 failed: {e1}")
-                                try:
-                                    # Подход 2: С параметром disable_web_page_preview
-                                    await bot.edit_message_text(
-                                        text=notification_text,
-                                        chat_id=ADMIN_GROUP_ID,
-                                        message_id=msg_id,
-                                        disable_web_page_preview=True
-                                    )
-                                    log_info(f"Successfully updated notification (Method 2) for user [ID: {user_id}]")
-                                except Exception as e2:
-                                    log_error(f"Method 2 failed: {e2}")
-                                    # В случае крайней неудачи отправляем новое сообщение
-                                    await bot.send_message(
-                                        ADMIN_GROUP_ID,
-                                        f"УВЕДОМЛЕНИЕ ОБНОВЛЕНО: {notification_text}",
-                                        message_thread_id=CHAT_NOTIFICATION_TOPIC_ID
-                                    )
-                                    log_info(f"Sent new notification message for user [ID: {user_id}]")
-                            
-                            # Удаляем запись из словаря
-                            del notification_messages[user_id]
-                        except Exception as e:
-                            log_error(f"Error updating notification directly: {e}", exc_info=True)
-                            # Просто логируем ошибку и продолжаем
-            
-            # Удаляем из активных чатов
-            del active_chats[user_id]
+                                log_info(f"Successfully updated notification (Method 2) for user [ID: {user_id}]")
+                            except Exception as e2:
+                                log_error(f"Method 2 failed: {e2}")
+                                # В случае крайней неудачи отправляем новое сообщение
+                                await bot.send_message(
+                                    ADMIN_GROUP_ID,
+                                    f"УВЕДОМЛЕНИЕ ОБНОВЛЕНО: {notification_text}",
+                                    message_thread_id=CHAT_NOTIFICATION_TOPIC_ID
+                                )
+                                log_info(f"Sent new notification message for user [ID: {user_id}]")
+                    except Exception as e:
+                        log_error(f"Error updating notification directly: {e}", exc_info=True)
+                        # Просто логируем ошибку и продолжаем
             
             # Отправляем сообщение пользователю
-            await message.answer(get_message("connection_terminated_by_user", get_user_language(user_id)), reply_markup=get_main_keyboard(user_id))
+            await message.answer(get_message("connection_terminated_by_user", await get_user_language_async(user_id)), reply_markup=await get_main_keyboard_async(user_id))
             
             # Очищаем состояние пользователя
             await state.clear()
@@ -618,27 +645,24 @@ async def handle_stop_command(message: Message, state: FSMContext, bot: Bot):
     # Если сообщение из группы (от админа)
     elif message.chat.id == int(ADMIN_GROUP_ID) and message.message_thread_id:
         # Находим админа по топику
-        admin_name = None
-        for name, info in ADMIN_TOPICS.items():
-            if info["id"] == message.message_thread_id:
-                admin_name = name
-                break
-        
-        if not admin_name:
+        admin = admin_directory.by_topic(message.message_thread_id)
+        if admin is None:
             log_error(f"Stop command received from unknown topic ID: {message.message_thread_id}")
             await message.answer("ОШИБКА!!! Этот топик не настроен для чата.")
             return
+        admin_name = admin.name
         
         # Проверяем, есть ли у админа активное соединение
-        if user_id not in admin_connections:
+        session = chat_sessions.by_admin(user_id)
+        if session is None:
             log_info(f"Admin [ID: {user_id}] ({admin_name}) tried to stop chat but was not connected")
             # Если админ не в активном чате, просто пропускаем сообщение без оповещения
             return
         
-        connected_user_id = admin_connections[user_id]
+        connected_user_id = session.user_id
         
-        # Проверяем что администратор в активном чате
-        if connected_user_id not in active_chats or active_chats[connected_user_id] != admin_name:
+        # Проверяем что администратор пишет в топик своего чата
+        if session.topic_id != message.message_thread_id:
             log_error(f"Admin [ID: {user_id}] ({admin_name}) in inconsistent state with user [ID: {connected_user_id}]")
             await message.answer("Ошибка: связь была разорвана. Напишите /stop для сброса.")
             return
@@ -649,16 +673,13 @@ async def handle_stop_command(message: Message, state: FSMContext, bot: Bot):
         # Отправляем сообщение пользователю
         await bot.send_message(
             connected_user_id,
-            get_message("connection_terminated_by_admin", get_user_language(connected_user_id)),
-            reply_markup=get_main_keyboard(connected_user_id)
+            get_message("connection_terminated_by_admin", await get_user_language_async(connected_user_id)),
+            reply_markup=await get_main_keyboard_async(connected_user_id)
         )
         log_info(f"Disconnection message sent to user [ID: {connected_user_id}]")
         
-        # Удаляем пользователя из активных чатов
-        del active_chats[connected_user_id]
-        
-        # Удаляем связь админа
-        del admin_connections[user_id]
+        # Закрываем сессию чата
+        await chat_sessions.close(connected_user_id)
         
         # Изменяем название топика админа
         try:
@@ -672,58 +693,54 @@ async def handle_stop_command(message: Message, state: FSMContext, bot: Bot):
             log_error(f"Error changing topic title: {e}", exc_info=True)
         
         # Обновляем сообщение в топике уведомлений напрямую
-        if connected_user_id in notification_messages:
-            msg_id, saved_admin_name = notification_messages[connected_user_id]
-            if saved_admin_name == admin_name:
+        if session.notification_id is not None:
+            msg_id = session.notification_id
+            try:
+                user_data = await load_user_data_async(connected_user_id)
+                notification_text = (
+                    "Кто-то пытается связаться\n"
+                    f"От: {user_data.get('full_name', '')}\n"
+                    f"Курс: {user_data.get('course', '')}\n"
+                    f"Факультет: {user_data.get('faculty', '')}\n"
+                    f"Группа: {user_data.get('group', '')}\n\n"
+                    "🔴|Закрыто"
+                )
+                
+                # Пробуем разные подходы к редактированию
                 try:
-                    user_data = load_user_data(connected_user_id)
-                    notification_text = (
-                        "Кто-то пытается связаться\n"
-                        f"От: {user_data.get('full_name', '')}\n"
-                        f"Курс: {user_data.get('course', '')}\n"
-                        f"Факультет: {user_data.get('faculty', '')}\n"
-                        f"Группа: {user_data.get('group', '')}\n\n"
-                        "🔴|Закрыто"
+                    # Подход 1: Используем update_message
+                    await bot.edit_message_text(
+                        text=notification_text,
+                        chat_id=ADMIN_GROUP_ID,
+                        message_id=msg_id
                     )
-                    
-                    # Пробуем разные подходы к редактированию
+                    log_info(f"Successfully updated notification (Method 1) for user [ID: {connected_user_id}]")
+                except Exception as e1:
+                    log_error(f"Method 1 failed: {e1}")
                     try:
-                        # Подход 1: Используем update_message
+                        # Подход 2: С параметром disable_web_page_preview
                         await bot.edit_message_text(
                             text=notification_text,
                             chat_id=ADMIN_GROUP_ID,
-                            message_id=msg_id
+                            message_id=msg_id,
+                            disable_web_page_preview=True
                         )
-                        log_info(f"Successfully updated notification (Method 1) for user [ID: {connected_user_id}]")
-                    except Exception as e1:
-                        log_error(f"Method 1 failed: {e1}")
-                        try:
-                            # Подход 2: С параметром disable_web_page_preview
-                            await bot.edit_message_text(
-                                text=notification_text,
-                                chat_id=ADMIN_GROUP_ID,
-                                message_id=msg_id,
-                                disable_web_page_preview=True
-                            )
-                            log_info(f"Successfully updated notification (Method 2) for user [ID: {connected_user_id}]")
-                        except Exception as e2:
-                            log_error(f"Method 2 failed: {e2}")
-                            # В случае крайней неудачи отправляем новое сообщение
-                            await bot.send_message(
-                                ADMIN_GROUP_ID,
-                                f"УВЕДОМЛЕНИЕ ОБНОВЛЕНО: {notification_text}",
-                                message_thread_id=CHAT_NOTIFICATION_TOPIC_ID
-                            )
-                            log_info(f"Sent new notification message for user [ID: {connected_user_id}]")
-                    
-                    # Удаляем запись из словаря
-                    del notification_messages[connected_user_id]
-                except Exception as e:
-                    log_error(f"Error updating notification directly: {e}", exc_info=True)
-                    # Просто логируем ошибку и продолжаем
+                        log_info(f"Successfully updated notification (Method 2) for user [ID: {connected_user_id}]")
+                    except Exception as e2:
+                        log_error(f"Method 2 failed: {e2}")
+                        # В случае крайней неудачи отправляем новое сообщение
+                        await bot.send_message(
+                            ADMIN_GROUP_ID,
+                            f"УВЕДОМЛЕНИЕ ОБНОВЛЕНО: {notification_text}",
+                            message_thread_id=CHAT_NOTIFICATION_TOPIC_ID
+                        )
+                        log_info(f"Sent new notification message for user [ID: {connected_user_id}]")
+            except Exception as e:
+                log_error(f"Error updating notification directly: {e}", exc_info=True)
+                # Просто логируем ошибку и продолжаем
         
         # Обновляем статус админа
-        ADMIN_TOPICS[admin_name]["status"] = "open"
+        admin_directory.set_status(admin_name, OPEN)
         
         # Отправляем сообщение админу
         await message.answer("Связь прервана вами!")
@@ -759,7 +776,7 @@ async def handle_all_user_messages(message: Message, state: FSMContext, bot: Bot
             return
         
         # Для всех остальных действий блокируем
-        await message.answer(get_message("connection_terminated_by_admin", get_user_language(user_id)))
+        await message.answer(get_message("connection_terminated_by_admin", await get_user_language_async(user_id)))
         return
     
     # Пропускаем команду /stop, она обрабатывается отдельно
@@ -770,205 +787,119 @@ async def handle_all_user_messages(message: Message, state: FSMContext, bot: Bot
     if chat_id == user_id:
         # Проверяем состояние пользователя
         current_state = await state.get_state()
-        log_debug(f"Message from user [ID: {user_id}], state: {current_state}")
-        log_debug(f"User in active_chats: {user_id in active_chats}")
+        log_debug("Message from user [ID: %s], state: %s", user_id, current_state)
+        session = chat_sessions.by_user(user_id)
+        log_debug("Chat session of user [ID: %s]: %s", user_id, session)
         
         # Если пользователь в активном чате
-        if user_id in active_chats:
-            admin_name = active_chats[user_id]
+        if chat_sessions.is_connected(user_id):
+            admin_name = session.admin_name
             
             # Логируем сообщение от пользователя
             log_message("User", user_id, message.content_type, username=message.from_user.username, full_name=message.from_user.full_name)
             
             # Проверяем наличие админа в словаре
-            if admin_name not in ADMIN_TOPICS:
-                log_error(f"Admin {admin_name} not found in ADMIN_TOPICS for user [ID: {user_id}]")
+            if admin_directory.by_name(admin_name) is None:
+                log_error(f"Admin {admin_name} not found in admin directory for user [ID: {user_id}]")
                 await message.answer("Ошибка: админ не найден. Чат будет закрыт.")
                 await state.clear()
-                del active_chats[user_id]
+                await chat_sessions.close(user_id)
                 return
             
-            admin_topic_id = ADMIN_TOPICS[admin_name]["id"]
+            admin_topic_id = session.topic_id
             
-            # Пересылаем сообщение админу в зависимости от типа контента
-            try:
-                # Обработка разных типов контента без добавления информации об ответе
-                if message.content_type == "text":
-                    # Обычное текстовое сообщение
-                    await bot.send_message(
-                        ADMIN_GROUP_ID,
-                        message.text,
-                        message_thread_id=admin_topic_id
-                    )
-                elif message.content_type == "photo":
-                    # Фотография
-                    await bot.send_photo(
-                        ADMIN_GROUP_ID,
-                        message.photo[-1].file_id,
-                        caption=message.caption,
-                        message_thread_id=admin_topic_id
-                    )
-                elif message.content_type == "video":
-                    # Видео
-                    await bot.send_video(
-                        ADMIN_GROUP_ID,
-                        message.video.file_id,
-                        caption=message.caption,
-                        message_thread_id=admin_topic_id
-                    )
-                elif message.content_type == "audio":
-                    # Аудио
-                    await bot.send_audio(
-                        ADMIN_GROUP_ID,
-                        message.audio.file_id,
-                        caption=message.caption,
-                        message_thread_id=admin_topic_id
-                    )
-                elif message.content_type == "voice":
-                    # Голосовое сообщение
-                    await bot.send_voice(
-                        ADMIN_GROUP_ID,
-                        message.voice.file_id,
-                        message_thread_id=admin_topic_id
-                    )
-                elif message.content_type == "video_note":
-                    # Видеокружок
-                    await bot.send_video_note(
-                        ADMIN_GROUP_ID,
-                        message.video_note.file_id,
-                        message_thread_id=admin_topic_id
-                    )
-                elif message.content_type == "document":
-                    # Документ
-                    await bot.send_document(
-                        ADMIN_GROUP_ID,
-                        message.document.file_id,
-                        caption=message.caption,
-                        message_thread_id=admin_topic_id
-                    )
-                elif message.content_type == "sticker":
-                    # Стикер
-                    await bot.send_sticker(
-                        ADMIN_GROUP_ID,
-                        message.sticker.file_id,
-                        message_thread_id=admin_topic_id
-                    )
-                else:
-                    # Для других типов контента отправляем уведомление
-                    await bot.send_message(
-                        ADMIN_GROUP_ID,
-                        f"Пользователь отправил сообщение типа: {message.content_type}, который не поддерживается.",
-                        message_thread_id=admin_topic_id
-                    )
-                
-                log_info(f"Message from user [ID: {user_id}] sent to admin {admin_name} in topic {admin_topic_id}")
-            except Exception as e:
-                log_error(f"Error forwarding message to admin: {e}", exc_info=True)
-                await message.answer("Возникла ошибка при отправке сообщения. Попробуйте еще раз или напишите /stop для завершения чата.")
+            # Части альбома пересылаются вместе с первой частью
+            album = media_groups.add(message)
+            if album is None:
+                return
+            
+            # Пересылаем сообщение админу в его топик (по порядку, через очередь сессии)
+            await relay_queues.submit(
+                ("to_admin", user_id), message.message_id,
+                lambda: deliver_to_admin(bot, message, album, admin_name, admin_topic_id)
+            )
             return
         
         # Если пользователь в ожидании
-        elif user_id in waiting_users and current_state == ChatStates.waiting_for_connection.state:
+        elif chat_sessions.is_waiting(user_id) and current_state == ChatStates.waiting_for_connection.state:
             log_info(f"Message from waiting user [ID: {user_id}] blocked")
             # Любое сообщение кроме /stop блокируется
-            await message.answer(get_message("exit_chat_first", get_user_language(user_id)))
+            await message.answer(get_message("exit_chat_first", await get_user_language_async(user_id)))
             return
     
     # Если сообщение из группы (от админа)
     elif message.chat.id == int(ADMIN_GROUP_ID) and message.message_thread_id:
         # Находим админа по топику
-        admin_name = None
-        for name, info in ADMIN_TOPICS.items():
-            if info["id"] == message.message_thread_id:
-                admin_name = name
-                break
-        
-        if not admin_name:
+        admin = admin_directory.by_topic(message.message_thread_id)
+        if admin is None:
             return
+        admin_name = admin.name
         
         # Логируем сообщение от админа
         log_message("Admin", user_id, message.content_type, username=message.from_user.username, full_name=message.from_user.full_name)
-        log_debug(f"Admin [ID: {user_id}] in admin_connections: {user_id in admin_connections}")
+        session = chat_sessions.by_admin(user_id)
+        log_debug("Chat session of admin [ID: %s]: %s", user_id, session)
         
         # Проверяем, есть ли у админа активное соединение
-        if user_id not in admin_connections:
+        if session is None:
             # Если админ не в активном чате, просто пропускаем сообщение без оповещения
             log_info(f"Message from admin [ID: {user_id}] ({admin_name}) ignored - not in active chat")
             return
         
-        connected_user_id = admin_connections[user_id]
-        log_debug(f"Admin [ID: {user_id}] connected to user [ID: {connected_user_id}]")
-        log_debug(f"User [ID: {connected_user_id}] in active_chats: {connected_user_id in active_chats}")
+        connected_user_id = session.user_id
+        log_debug("Admin [ID: %s] connected to user [ID: %s]", user_id, connected_user_id)
         
-        # Проверяем что администратор в активном чате
-        if connected_user_id not in active_chats or active_chats[connected_user_id] != admin_name:
+        # Проверяем что администратор пишет в топик своего чата
+        if session.topic_id != message.message_thread_id:
             log_error(f"Admin [ID: {user_id}] ({admin_name}) in inconsistent state with user [ID: {connected_user_id}]")
             await message.answer("Ошибка: связь была разорвана. Напишите /stop для сброса.")
             return
         
-        # Пересылаем сообщение пользователю в зависимости от типа контента
-        try:
-            # Обработка разных типов контента без добавления префикса или информации об ответе
-            if message.content_type == "text":
-                # Обычное текстовое сообщение
-                await bot.send_message(
-                    connected_user_id,
-                    message.text
-                )
-            elif message.content_type == "photo":
-                # Фотография
-                await bot.send_photo(
-                    connected_user_id,
-                    message.photo[-1].file_id,
-                    caption=message.caption
-                )
-            elif message.content_type == "video":
-                # Видео
-                await bot.send_video(
-                    connected_user_id,
-                    message.video.file_id,
-                    caption=message.caption
-                )
-            elif message.content_type == "audio":
-                # Аудио
-                await bot.send_audio(
-                    connected_user_id,
-                    message.audio.file_id,
-                    caption=message.caption
-                )
-            elif message.content_type == "voice":
-                # Голосовое сообщение
-                await bot.send_voice(
-                    connected_user_id,
-                    message.voice.file_id
-                )
-            elif message.content_type == "video_note":
-                # Видеокружок
-                await bot.send_video_note(
-                    connected_user_id,
-                    message.video_note.file_id
-                )
-            elif message.content_type == "document":
-                # Документ
-                await bot.send_document(
-                    connected_user_id,
-                    message.document.file_id,
-                    caption=message.caption
-                )
-            elif message.content_type == "sticker":
-                # Стикер
-                await bot.send_sticker(
-                    connected_user_id,
-                    message.sticker.file_id
-                )
-            else:
-                # Для других типов контента отправляем уведомление
-                await bot.send_message(
-                    connected_user_id,
-                    f"Сообщение типа: {message.content_type} не поддерживается."
-                )
-            
-            log_info(f"Message from admin [ID: {user_id}] ({admin_name}) sent to user [ID: {connected_user_id}]")
-        except Exception as e:
-            log_error(f"Error forwarding message to user: {e}", exc_info=True)
-            await message.answer("Возникла ошибка при отправке сообщения. Попробуйте еще раз или напишите /stop для завершения чата.") 
\ No newline at end of file
+        # Части альбома пересылаются вместе с первой частью
+        album = media_groups.add(message)
+        if album is None:
+            return
+        
+        # Пересылаем сообщение пользователю (по порядку, через очередь сессии)
+        await relay_queues.submit(
+            ("to_user", connected_user_id), message.message_id,
+            lambda: deliver_to_user(bot, message, album, admin_name, connected_user_id)
+        )
+
+
+async def deliver_to_admin(bot: Bot, message: Message, album: Awaitable[List[Message]], admin_name: str, admin_topic_id: int):
+    """Доставка сообщения (или собранного альбома) пользователя в топик администратора."""
+    user_id = message.from_user.id
+    try:
+        # Очередь сессии ждет альбом целиком, следующие сообщения не обгоняют его
+        messages = await album
+        if not await relay_album(bot, messages, ADMIN_GROUP_ID, message_thread_id=admin_topic_id):
+            # Для типов, которые нельзя скопировать, отправляем уведомление
+            await bot.send_message(
+                ADMIN_GROUP_ID,
+                f"Пользователь отправил сообщение типа: {message.content_type}, который не поддерживается.",
+                message_thread_id=admin_topic_id
+            )
+        
+        log_info(f"Message from user [ID: {user_id}] sent to admin {admin_name} in topic {admin_topic_id}")
+    except Exception as e:
+        log_error(f"Error forwarding message to admin: {e}", exc_info=True)
+        await message.answer("Возникла ошибка при отправке сообщения. Попробуйте еще раз или напишите /stop для завершения чата.")
+
+
+async def deliver_to_user(bot: Bot, message: Message, album: Awaitable[List[Message]], admin_name: str, connected_user_id: int):
+    """Доставка сообщения (или собранного альбома) администратора пользователю."""
+    user_id = message.from_user.id
+    try:
+        messages = await album
+        if not await relay_album(bot, messages, connected_user_id):
+            # Для типов, которые нельзя скопировать, отправляем уведомление
+            await bot.send_message(
+                connected_user_id,
+                f"Сообщение типа: {message.content_type} не поддерживается."
+            )
+        
+        log_info(f"Message from admin [ID: {user_id}] ({admin_name}) sent to user [ID: {connected_user_id}]")
+    except Exception as e:
+        log_error(f"Error forwarding message to user: {e}", exc_info=True)
+        await message.answer("Возникла ошибка при отправке сообщения. Попробуйте еще раз или напишите /stop для завершения чата.")
@@ -4,8 +4,9 @@ from aiogram.fsm.context import FSMContext
 from aiogram.types import Message, CallbackQuery
 from aiogram.exceptions import TelegramBadRequest
 
-from utils.file_operations import is_user_banned, get_user_language, set_user_language, is_user_registered
-from utils.keyboards import get_main_keyboard, get_language_selection_keyboard
+from utils.file_operations import is_user_banned_async, get_user_language_async, set_user_language_async, is_user_registered_async
+from utils.keyboards import get_main_keyboard_async, get_language_selection_keyboard
+from utils.logger import get_debug_logger
 from utils.messages import get_message
 from states.chat import ChatStates
 from states.language import LanguageStates
@@ -13,20 +14,23 @@ from states.language import LanguageStates
 # Создание роутера
 router = Router()
 
+# Отладочный канал модуля (включается через LOG_DEBUG_MODULES или /debug)
+debug_log = get_debug_logger("common")
+
 
 @router.message(Command("start"))
 async def cmd_start(message: Message, state: FSMContext):
     """Обработка команды /start."""
     user_id = message.from_user.id
     
-    if is_user_banned(user_id):
-        await message.answer(get_message("banned_user", get_user_language(user_id)))
+    if await is_user_banned_async(user_id):
+        await message.answer(get_message("banned_user", await get_user_language_async(user_id)))
         return
     
     # Проверка на состояние чата
     current_state = await state.get_state()
     if current_state in [ChatStates.waiting_for_connection.state, ChatStates.connected.state]:
-        await message.answer(get_message("exit_chat_first", get_user_language(user_id)))
+        await message.answer(get_message("exit_chat_first", await get_user_language_async(user_id)))
         return
     
     # Устанавливаем состояние выбора языка
@@ -45,7 +49,7 @@ async def process_language_selection(callback: CallbackQuery, state: FSMContext)
     language = callback.data.split("_")[1]  # Извлекаем код языка из callback_data
     
     # Сохраняем выбранный язык
-    set_user_language(user_id, language)
+    await set_user_language_async(user_id, language)
     
     # Получаем сообщение о выборе языка
     language_message = get_message("language_selected", language)
@@ -55,11 +59,11 @@ async def process_language_selection(callback: CallbackQuery, state: FSMContext)
     await state.clear()
     
     # Проверяем, зарегистрирован ли пользователь
-    is_registered = is_user_registered(user_id)
-    print(f"DEBUG: User {user_id} is_registered={is_registered}")
+    is_registered = await is_user_registered_async(user_id)
+    debug_log.debug("User %s is_registered=%s", user_id, is_registered)
     
     # Создаем клавиатуру в зависимости от статуса регистрации
-    keyboard = get_main_keyboard(user_id)
+    keyboard = await get_main_keyboard_async(user_id)
     
     # Отправляем сообщение о выборе языка
     await callback.message.edit_text(
@@ -77,9 +81,9 @@ async def process_language_selection(callback: CallbackQuery, state: FSMContext)
 async def show_main_menu(callback: CallbackQuery, state: FSMContext):
     """Отображение главного меню."""
     user_id = callback.from_user.id
-    language = get_user_language(user_id)
+    language = await get_user_language_async(user_id)
     
-    if is_user_banned(user_id):
+    if await is_user_banned_async(user_id):
         try:
             await callback.answer(get_message("banned_user", language), show_alert=True)
         except TelegramBadRequest:
@@ -101,7 +105,7 @@ async def show_main_menu(callback: CallbackQuery, state: FSMContext):
         
     await callback.message.edit_text(
         get_message("select_option", language),
-        reply_markup=get_main_keyboard(user_id)
+        reply_markup=await get_main_keyboard_async(user_id)
     )
     try:
         await callback.answer()
@@ -114,9 +118,9 @@ async def show_main_menu(callback: CallbackQuery, state: FSMContext):
 async def cmd_language(message: Message, state: FSMContext):
     """Обработка команды /language для смены языка."""
     user_id = message.from_user.id
-    language = get_user_language(user_id)
+    language = await get_user_language_async(user_id)
     
-    if is_user_banned(user_id):
+    if await is_user_banned_async(user_id):
         await message.answer(get_message("banned_user", language))
         return
     
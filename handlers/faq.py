@@ -3,10 +3,12 @@ from aiogram.fsm.context import FSMContext
 from aiogram.types import Message, CallbackQuery
 from aiogram.exceptions import TelegramBadRequest
 
+from config import FAQ_SEARCH_LIMIT
 from states.faq import FAQStates
 from states.chat import ChatStates
-from utils.file_operations import load_faq, is_user_banned, get_user_language
-from utils.keyboards import get_main_keyboard, get_faq_list_keyboard, get_faq_back_keyboard
+from utils.faq_index import faq_index
+from utils.file_operations import is_user_banned_async, get_user_language_async
+from utils.keyboards import get_main_keyboard_async, get_faq_list_keyboard, get_faq_back_keyboard, get_faq_search_keyboard
 from utils.messages import get_message
 
 # Создание роутера
@@ -14,12 +16,12 @@ router = Router()
 
 
 @router.callback_query(F.data == "faq")
-async def show_faq(callback: CallbackQuery, state: FSMContext):
+async def show_faq(callback: CallbackQuery, state: FSMContext, page: int = 0):
     """Отображение списка часто задаваемых вопросов."""
     user_id = callback.from_user.id
-    language = get_user_language(user_id)
+    language = await get_user_language_async(user_id)
     
-    if is_user_banned(user_id):
+    if await is_user_banned_async(user_id):
         try:
             await callback.answer(get_message("banned_user", language), show_alert=True)
         except TelegramBadRequest:
@@ -37,14 +39,14 @@ async def show_faq(callback: CallbackQuery, state: FSMContext):
         return
     
     await state.set_state(FAQStates.waiting_for_number)
-    # Загружаем FAQ для выбранного языка пользователя
-    faq_data = load_faq(language)
+    # Берем готовый снимок FAQ для выбранного языка пользователя
+    faq_snapshot = faq_index.get(language)
 
-    if not faq_data:
+    if not faq_snapshot.entries:
         # FAQ данные пусты, показываем сообщение об отсутствии FAQ
         await callback.message.edit_text(
             "В данный момент нет популярных вопросов.",
-            reply_markup=get_main_keyboard(user_id)
+            reply_markup=await get_main_keyboard_async(user_id)
         )
         try:
             await callback.answer()
@@ -53,16 +55,13 @@ async def show_faq(callback: CallbackQuery, state: FSMContext):
             pass
         return
 
-    # Формируем список вопросов
-    faq_list = f"<b>{get_message('faq_title', language)}</b>\n\n"
-    for q_id, q_data in faq_data.items():
-        faq_list += f"{q_id}. {q_data['question']}\n\n"
-
-    faq_list += f"\n{get_message('faq_question_prompt', language)}"
+    # Страница формируется при первом запросе и дальше берется из кэша
+    faq_text, page, total_pages = faq_index.get_page(language, page)
+    await state.update_data(faq_page=page)
 
     await callback.message.edit_text(
-        faq_list,
-        reply_markup=get_faq_list_keyboard(language)
+        faq_text,
+        reply_markup=get_faq_list_keyboard(language, page, total_pages)
     )
     try:
         await callback.answer()
@@ -75,13 +74,13 @@ async def show_faq(callback: CallbackQuery, state: FSMContext):
 async def show_selected_faq(message: Message):
     """Показ выбранного вопроса FAQ."""
     user_id = message.from_user.id
-    language = get_user_language(user_id)
+    language = await get_user_language_async(user_id)
     
-    # Загружаем FAQ для выбранного языка пользователя
-    faq_data = load_faq(language)
+    # Готовый текст ответа из индекса FAQ
     question_id = message.text
+    answer_text = faq_index.get_answer(language, question_id)
 
-    if question_id not in faq_data:
+    if answer_text is None:
         # Если вопрос не найден, уведомляем пользователя
         await message.answer(
             get_message("question_not_found", language),
@@ -89,33 +88,68 @@ async def show_selected_faq(message: Message):
         )
         return
 
-    question = faq_data[question_id]["question"]
-    answer = faq_data[question_id]["answer"]
+    await message.answer(
+        answer_text,
+        reply_markup=get_faq_back_keyboard(language)
+    )
+
+
+@router.message(F.text, ~F.text.startswith("/"), FAQStates.waiting_for_number)
+async def search_faq(message: Message):
+    """Полнотекстовый поиск по FAQ: найденные вопросы показываются кнопками."""
+    user_id = message.from_user.id
+    language = await get_user_language_async(user_id)
     
-    # Тексты на разных языках
-    question_text = {
-        "ru": "Вопрос",
-        "kz": "Сұрақ",
-        "en": "Question"
-    }
+    results = faq_index.search(language, message.text, FAQ_SEARCH_LIMIT)
     
-    answer_text = {
-        "ru": "Ответ",
-        "kz": "Жауап",
-        "en": "Answer"
-    }
+    if not results:
+        await message.answer(
+            get_message("faq_search_no_results", language),
+            reply_markup=get_faq_list_keyboard(language)
+        )
+        return
     
-    # Выбираем правильный текст в зависимости от языка
-    q_text = question_text.get(language, question_text["ru"])
-    a_text = answer_text.get(language, answer_text["ru"])
-
     await message.answer(
-        f"<b>{q_text} {question_id}:</b>\n{question}\n\n<b>{a_text}:</b>\n{answer}",
+        get_message("faq_search_results", language),
+        reply_markup=get_faq_search_keyboard(results, language)
+    )
+
+
+@router.callback_query(F.data.startswith("faq_show_"))
+async def show_found_faq(callback: CallbackQuery):
+    """Показ вопроса FAQ, выбранного из результатов поиска."""
+    user_id = callback.from_user.id
+    language = await get_user_language_async(user_id)
+    question_id = callback.data.split("_")[2]
+    answer_text = faq_index.get_answer(language, question_id)
+    
+    if answer_text is None:
+        try:
+            await callback.answer(get_message("question_not_found", language), show_alert=True)
+        except TelegramBadRequest:
+            pass
+        return
+    
+    await callback.message.answer(
+        answer_text,
         reply_markup=get_faq_back_keyboard(language)
     )
+    try:
+        await callback.answer()
+    except TelegramBadRequest:
+        # Игнорируем ошибку, если callback query устарел
+        pass
+
+
+@router.callback_query(F.data.startswith("faq_page_"))
+async def show_faq_page(callback: CallbackQuery, state: FSMContext):
+    """Переключение страницы списка вопросов FAQ."""
+    page = int(callback.data.split("_")[2])
+    await show_faq(callback, state, page)
 
 
 @router.callback_query(F.data == "faq_list")
 async def back_to_faq_list(callback: CallbackQuery, state: FSMContext):
-    """Возврат к списку вопросов FAQ."""
-    await show_faq(callback, state) 
\ No newline at end of file
+    """Возврат к списку вопросов FAQ (на последнюю открытую страницу)."""
+    state_data = await state.get_data()
+    await show_faq(callback, state, state_data.get("faq_page", 0)) 
\ No newline at end of file
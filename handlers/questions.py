@@ -1,39 +1,46 @@
 import json
 import os
+from typing import List
+
 from aiogram import Router, F, Bot
 from aiogram.fsm.context import FSMContext
 from aiogram.types import Message, CallbackQuery
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from aiogram.exceptions import TelegramBadRequest
 
-from config import ADMIN_GROUP_ID, ADMIN_IDS, QUESTION_NOTIFICATION_TOPIC_ID, QUESTION_ANSWER_TOPIC_ID, ADMIN_TOPICS
+from config import DATABASE_PATH, ADMIN_GROUP_ID, ADMIN_IDS, QUESTION_NOTIFICATION_TOPIC_ID, QUESTION_ANSWER_TOPIC_ID
 from states.question import QuestionStates
 from states.chat import ChatStates
-from utils.file_operations import is_user_registered, load_user_data, is_user_banned, get_user_language
-from utils.keyboards import get_main_keyboard
-from utils.media import save_media_file
+from utils.admins import admin_directory
+from utils.faq_index import faq_index
+from utils.faq_suggest import faq_suggester
+from utils.file_operations import io_executor, is_user_registered_async, load_user_data_async, is_user_banned_async, get_user_language_async
+from utils.keyboards import get_main_keyboard_async, get_faq_suggestion_keyboard
+from utils.media import save_media_file, save_media_group
+from utils.media_group import media_groups
+from utils.media_relay import MEDIA_GROUP, caption_part, send_album, send_content
+from utils.notify import fan_out
+from utils.question_store import QuestionRepository, QuestionStore
 from utils.logger import log_info, log_error, log_question, log_callback, log_message
 from utils.messages import get_message
 
 # Создание роутера
 router = Router()
 
-# Хранение активных вопросов в памяти: {question_id: {data}}
-active_questions = {}
-# Счетчик для генерации ID вопросов
-question_counter = 1
+# Хранилище вопросов: неотвеченные вопросы в памяти, все вопросы в базе
+question_repository = QuestionRepository(QuestionStore(DATABASE_PATH), io_executor)
 
 
 @router.callback_query(F.data == "ask")
 async def ask_question(callback: CallbackQuery, state: FSMContext):
     """Начало процесса ask"""
     user_id = callback.from_user.id
-    language = get_user_language(user_id)
+    language = await get_user_language_async(user_id)
     
     # Логируем нажатие на кнопку
     log_callback(user_id, "ask", username=callback.from_user.username, full_name=callback.from_user.full_name)
     
-    if is_user_banned(user_id):
+    if await is_user_banned_async(user_id):
         log_info(f"Banned user [ID: {user_id}] tried to ask a question")
         try:
             await callback.answer(get_message("banned_user", language), show_alert=True)
@@ -53,11 +60,11 @@ async def ask_question(callback: CallbackQuery, state: FSMContext):
         return
     
     # Проверка на Регистрацию
-    if not is_user_registered(user_id):
+    if not await is_user_registered_async(user_id):
         log_info(f"Unregistered user [ID: {user_id}] tried to ask a question")
         await callback.message.edit_text(
             "Для того чтобы задать вопрос, необходимо зарегистрироваться.",
-            reply_markup=get_main_keyboard()
+            reply_markup=await get_main_keyboard_async()
         )
         try:
             await callback.answer()
@@ -77,53 +84,109 @@ async def ask_question(callback: CallbackQuery, state: FSMContext):
 
 
 @router.message(QuestionStates.waiting_for_question)
+@router.message(QuestionStates.confirming_suggestion)
 async def process_question(message: Message, state: FSMContext, bot: Bot):
     """Обработка отправленный вопрос."""
-    global question_counter
-    
+    # Все файлы альбома становятся одним вопросом, остальные части альбома пропускаем
+    messages = await media_groups.collect(message)
+    if messages is None:
+        return
+
     user_id = message.from_user.id
-    language = get_user_language(user_id)
-    user_data = load_user_data(user_id)
+    language = await get_user_language_async(user_id)
     
     # Логируем сообщение с вопросом
     log_message("Question", user_id, message.content_type, username=message.from_user.username, full_name=message.from_user.full_name)
 
-    # Создание ID вопроса
-    question_id = str(question_counter)
-    question_counter += 1
+    # Если вопрос уже есть в FAQ, сначала предлагаем готовый ответ
+    if message.content_type == "text":
+        suggestion = faq_suggester.suggest(language, message.text)
+        if suggestion:
+            faq_question_id, _ = suggestion
+            await state.set_state(QuestionStates.confirming_suggestion)
+            await state.update_data(pending_question=message.text)
+            await message.answer(
+                f"{get_message('faq_suggestion', language)}\n\n{faq_index.get_answer(language, faq_question_id)}",
+                reply_markup=get_faq_suggestion_keyboard(language)
+            )
+            log_info(f"FAQ #{faq_question_id} suggested to user [ID: {user_id}] before routing question")
+            return
 
-    # Сохранение медиафайла, если есть
-    media_info = await save_media_file(message, question_id)
+    await submit_question(bot, state, user_id, language, message=message, album=messages if len(messages) > 1 else None)
+
+
+@router.callback_query(F.data == "suggest_accept", QuestionStates.confirming_suggestion)
+async def accept_faq_suggestion(callback: CallbackQuery, state: FSMContext):
+    """Пользователь нашел ответ в предложенном FAQ: вопрос администраторам не отправляется."""
+    user_id = callback.from_user.id
+    language = await get_user_language_async(user_id)
+    faq_suggester.record_outcome(accepted=True)
+    log_info(f"User [ID: {user_id}] accepted FAQ suggestion, question not routed")
+    
+    await state.clear()
+    await callback.message.edit_reply_markup(reply_markup=None)
+    await callback.message.answer(get_message("select_option", language), reply_markup=await get_main_keyboard_async(user_id))
+    try:
+        await callback.answer()
+    except TelegramBadRequest:
+        # Игнорируем ошибку, если callback query устарел
+        pass
+
+
+@router.callback_query(F.data == "suggest_send", QuestionStates.confirming_suggestion)
+async def decline_faq_suggestion(callback: CallbackQuery, state: FSMContext, bot: Bot):
+    """Пользователю не подошел ответ из FAQ: отправляем вопрос администраторам."""
+    user_id = callback.from_user.id
+    language = await get_user_language_async(user_id)
+    faq_suggester.record_outcome(accepted=False)
+    
+    state_data = await state.get_data()
+    await callback.message.edit_reply_markup(reply_markup=None)
+    try:
+        await callback.answer()
+    except TelegramBadRequest:
+        # Игнорируем ошибку, если callback query устарел
+        pass
+    
+    await submit_question(bot, state, user_id, language, text=state_data.get("pending_question", ""))
+
+
+async def submit_question(bot: Bot, state: FSMContext, user_id: int, language: str, message: Message = None, text: str = None,
+                          album: List[Message] = None):
+    """Регистрация вопроса и отправка уведомлений администраторам."""
+    user_data = await load_user_data_async(user_id)
+    content_type = message.content_type if message else "text"
+    question_text = message.text if message else text
+
+    # Сохранение медиафайла или всех файлов альбома, если есть
+    if album:
+        content_type = MEDIA_GROUP
+        media_info = await save_media_group(album)
+    else:
+        media_info = await save_media_file(message) if message else None
 
-    # Сохранение вопроса в памяти
     question_data = {
-        "question_id": question_id,
         "user_id": user_id,
         "full_name": user_data.get("full_name", ""),
         "course": user_data.get("course", ""),
         "faculty": user_data.get("faculty", ""),
         "department": user_data.get("department", ""),
         "group": user_data.get("group", ""),
-        "content_type": message.content_type,
-        "text": message.text if message.content_type == "text" else None,
+        "content_type": content_type,
+        "text": question_text if content_type == "text" else None,
         "media": media_info,
         "status": "pending",
         "answer": None,
         "admin_id": None
     }
 
-    # Сохраняем вопрос в памяти
-    active_questions[question_id] = question_data
+    # Сохраняем вопрос в базе, ID выдается хранилищем
+    question_id = await question_repository.create(question_data)
     
     # Логируем создание вопроса
     log_question("asked", question_id, user_id=user_id)
 
-    # Отправляем подтверждение пользователю
-    await message.answer(get_message("question_accepted", language).format(question_id))
     await state.clear()
-    
-    # Отправляем главное меню
-    await message.answer(get_message("select_option", language), reply_markup=get_main_keyboard(user_id))
 
     # Создание клавиатуры с кнопкой ответа
     builder = InlineKeyboardBuilder()
@@ -138,117 +201,36 @@ async def process_question(message: Message, state: FSMContext, bot: Bot):
         f"Группа: {user_data.get('group', '')}\n\n"
     )
 
-    # Отправка уведомления в топик для уведомлений
-    if message.content_type == "text":
-        await bot.send_message(
-            ADMIN_GROUP_ID,
-            admin_message + f"<b>Вопрос:</b>\n{message.text}",
-            message_thread_id=QUESTION_NOTIFICATION_TOPIC_ID
-        )
+    # Текст уведомления: вопрос или подпись к медиафайлу
+    if content_type == "text":
+        admin_message += f"<b>Вопрос:</b>\n{question_text}"
     else:
-        # Отправляем медиафайл с описанием в топик уведомлений
-        if message.content_type == "photo":
-            await bot.send_photo(
-                ADMIN_GROUP_ID,
-                message.photo[-1].file_id,
-                caption=admin_message + (f"\n<b>Подпись:</b>\n{message.caption}" if message.caption else ""),
-                message_thread_id=QUESTION_NOTIFICATION_TOPIC_ID
-            )
-        elif message.content_type == "video":
-            await bot.send_video(
-                ADMIN_GROUP_ID,
-                message.video.file_id,
-                caption=admin_message + (f"\n<b>Подпись:</b>\n{message.caption}" if message.caption else ""),
-                message_thread_id=QUESTION_NOTIFICATION_TOPIC_ID
-            )
-        elif message.content_type == "audio":
-            await bot.send_audio(
-                ADMIN_GROUP_ID,
-                message.audio.file_id,
-                caption=admin_message + (f"\n<b>Подпись:</b>\n{message.caption}" if message.caption else ""),
-                message_thread_id=QUESTION_NOTIFICATION_TOPIC_ID
-            )
-        elif message.content_type == "voice":
-            await bot.send_voice(
-                ADMIN_GROUP_ID,
-                message.voice.file_id,
-                caption=admin_message,
-                message_thread_id=QUESTION_NOTIFICATION_TOPIC_ID
-            )
-        elif message.content_type == "video_note":
-            await bot.send_video_note(
-                ADMIN_GROUP_ID,
-                message.video_note.file_id,
-                message_thread_id=QUESTION_NOTIFICATION_TOPIC_ID
-            )
-        elif message.content_type == "document":
-            await bot.send_document(
-                ADMIN_GROUP_ID,
-                message.document.file_id,
-                caption=admin_message + (f"\n<b>Подпись:</b>\n{message.caption}" if message.caption else ""),
-                message_thread_id=QUESTION_NOTIFICATION_TOPIC_ID
-            )
-
-    # Отправка вопроса с кнопкой ответа в топик для ответов
-    if message.content_type == "text":
-        await bot.send_message(
-            ADMIN_GROUP_ID,
-            admin_message + f"<b>Вопрос:</b>\n{message.text}",
+        admin_message += caption_part(media_info["caption"])
+    file_id = media_info["file_id"] if media_info else None
+
+    def notify_admins(**kwargs):
+        # Альбом уходит одним send_media_group
+        if content_type == MEDIA_GROUP:
+            return send_album(bot, ADMIN_GROUP_ID, media_info["items"], admin_message, **kwargs)
+        return send_content(bot, ADMIN_GROUP_ID, content_type, file_id, admin_message, **kwargs)
+
+    async def reply_to_user():
+        # Подтверждение пользователю и главное меню
+        await bot.send_message(user_id, get_message("question_accepted", language).format(question_id))
+        await bot.send_message(user_id, get_message("select_option", language), reply_markup=await get_main_keyboard_async(user_id))
+
+    # Ответ пользователю и уведомления администраторам отправляются одновременно;
+    # ошибка в одном топике не мешает остальным
+    await fan_out({
+        "user": reply_to_user(),
+        "notification_topic": notify_admins(message_thread_id=QUESTION_NOTIFICATION_TOPIC_ID),
+        "answer_topic": notify_admins(
             reply_markup=builder.as_markup(),
             message_thread_id=QUESTION_ANSWER_TOPIC_ID
         )
-    else:
-        # Отправляем медиафайл с описанием и кнопкой в топик ответов
-        if message.content_type == "photo":
-            await bot.send_photo(
-                ADMIN_GROUP_ID,
-                message.photo[-1].file_id,
-                caption=admin_message + (f"\n<b>Подпись:</b>\n{message.caption}" if message.caption else ""),
-                reply_markup=builder.as_markup(),
-                message_thread_id=QUESTION_ANSWER_TOPIC_ID
-            )
-        elif message.content_type == "video":
-            await bot.send_video(
-                ADMIN_GROUP_ID,
-                message.video.file_id,
-                caption=admin_message + (f"\n<b>Подпись:</b>\n{message.caption}" if message.caption else ""),
-                reply_markup=builder.as_markup(),
-                message_thread_id=QUESTION_ANSWER_TOPIC_ID
-            )
-        elif message.content_type == "audio":
-            await bot.send_audio(
-                ADMIN_GROUP_ID,
-                message.audio.file_id,
-                caption=admin_message + (f"\n<b>Подпись:</b>\n{message.caption}" if message.caption else ""),
-                reply_markup=builder.as_markup(),
-                message_thread_id=QUESTION_ANSWER_TOPIC_ID
-            )
-        elif message.content_type == "voice":
-            await bot.send_voice(
-                ADMIN_GROUP_ID,
-                message.voice.file_id,
-                caption=admin_message,
-                reply_markup=builder.as_markup(),
-                message_thread_id=QUESTION_ANSWER_TOPIC_ID
-            )
-        elif message.content_type == "video_note":
-            await bot.send_video_note(
-                ADMIN_GROUP_ID,
-                message.video_note.file_id,
-                reply_markup=builder.as_markup(),
-                message_thread_id=QUESTION_ANSWER_TOPIC_ID
-            )
-        elif message.content_type == "document":
-            await bot.send_document(
-                ADMIN_GROUP_ID,
-                message.document.file_id,
-                caption=admin_message + (f"\n<b>Подпись:</b>\n{message.caption}" if message.caption else ""),
-                reply_markup=builder.as_markup(),
-                message_thread_id=QUESTION_ANSWER_TOPIC_ID
-            )
+    }, interactive=("user",))
 
     log_info(f"Question #{question_id} from user [ID: {user_id}] accepted")
-    await state.clear()
 
 
 @router.callback_query(F.data.startswith("answer_question_"))
@@ -272,7 +254,8 @@ async def handle_answer_button(callback: CallbackQuery, state: FSMContext):
     question_id = callback.data.split("_")[2]
 
     # Проверяем существует ли вопрос
-    if question_id not in active_questions:
+    question_data = await question_repository.get(question_id)
+    if question_data is None:
         log_error(f"Admin [ID: {admin_id}] tried to answer non-existent question #{question_id}")
         try:
             await callback.answer("Вопрос не найден.", show_alert=True)
@@ -281,8 +264,7 @@ async def handle_answer_button(callback: CallbackQuery, state: FSMContext):
             pass
         return
 
-    question_data = active_questions[question_id]
-    user_language = get_user_language(question_data["user_id"])
+    user_language = await get_user_language_async(question_data["user_id"])
 
     if question_data["status"] == "answered":
         log_info(f"Admin [ID: {admin_id}] tried to answer already answered question #{question_id}")
@@ -295,14 +277,11 @@ async def handle_answer_button(callback: CallbackQuery, state: FSMContext):
 
     # Сохранение ID админа, который будет отвечать
     question_data["admin_id"] = admin_id
-    active_questions[question_id] = question_data
+    await question_repository.save(question_data)
     
-    # Получаем имя админа из ADMIN_TOPICS
-    admin_name = callback.from_user.full_name
-    for name, topic_info in ADMIN_TOPICS.items():
-        if topic_info["user_id"] == admin_id:
-            admin_name = name
-            break
+    # Получаем имя админа из справочника администраторов
+    admin = admin_directory.by_user_id(admin_id)
+    admin_name = admin.name if admin is not None else callback.from_user.full_name
     
     # Логируем начало ответа на вопрос
     log_question("answer_start", question_id, admin_id=admin_id, admin_name=admin_name)
@@ -356,15 +335,15 @@ async def process_admin_answer(message: Message, state: FSMContext, bot: Bot):
     question_id = state_data["question_id"]
 
     # Проверяем существует ли вопрос
-    if question_id not in active_questions:
+    question_data = await question_repository.get(question_id)
+    if question_data is None:
         log_error(f"Admin [ID: {admin_id}] tried to answer non-existent question #{question_id}")
         await message.answer("Вопрос не найден.")
         await state.clear()
         return
 
-    question_data = active_questions[question_id]
     user_id = question_data["user_id"]
-    user_language = get_user_language(user_id)
+    user_language = await get_user_language_async(user_id)
 
     # Проверка, что отвечает тот же админ, который начал отвечать
     if question_data["admin_id"] != admin_id:
@@ -373,15 +352,12 @@ async def process_admin_answer(message: Message, state: FSMContext, bot: Bot):
         await state.clear()
         return
 
-    # Получаем имя админа из ADMIN_TOPICS
-    admin_display_name = admin_name
-    for name, topic_info in ADMIN_TOPICS.items():
-        if topic_info["user_id"] == admin_id:
-            admin_display_name = name
-            break
+    # Получаем имя админа из справочника администраторов
+    admin = admin_directory.by_user_id(admin_id)
+    admin_display_name = admin.name if admin is not None else admin_name
 
     # Сохранение медиафайла, если есть
-    media_info = await save_media_file(message, question_id)
+    media_info = await save_media_file(message)
 
     # Обновление данных вопроса
     question_data["status"] = "answered"
@@ -391,8 +367,8 @@ async def process_admin_answer(message: Message, state: FSMContext, bot: Bot):
         "media": media_info
     }
     
-    # Обновляем вопрос в памяти
-    active_questions[question_id] = question_data
+    # Сохраняем ответ в базе
+    await question_repository.save(question_data)
 
     # Получаем переведенные сообщения для пользователя
     answer_title = get_message("question_answer_received", user_language).split("\n")[0].format(question_id)
@@ -423,8 +399,7 @@ async def process_admin_answer(message: Message, state: FSMContext, bot: Bot):
         answer_message += question_data["text"]
     else:
         answer_message += f"[{question_data['content_type']}]"
-        if question_data["media"]["caption"]:
-            answer_message += f"\n<b>Подпись:</b>\n{question_data['media']['caption']}"
+        answer_message += caption_part(question_data["media"]["caption"])
 
     answer_message += f"\n\n{answer_label.get(user_language, answer_label['ru'])}\n"
 
@@ -433,52 +408,14 @@ async def process_admin_answer(message: Message, state: FSMContext, bot: Bot):
 
     # Отправляем ответ без клавиатуры
     if message.content_type == "text":
-        await bot.send_message(
-            question_data["user_id"],
-            answer_message + message.text + footer_message
-        )
+        answer_message += message.text
     else:
-        # Отправляем медиафайл с описанием
-        if message.content_type == "photo":
-            await bot.send_photo(
-                question_data["user_id"],
-                message.photo[-1].file_id,
-                caption=answer_message + (f"\n<b>Подпись:</b>\n{message.caption}" if message.caption else "") + footer_message
-            )
-        elif message.content_type == "video":
-            await bot.send_video(
-                question_data["user_id"],
-                message.video.file_id,
-                caption=answer_message + (f"\n<b>Подпись:</b>\n{message.caption}" if message.caption else "") + footer_message
-            )
-        elif message.content_type == "audio":
-            await bot.send_audio(
-                question_data["user_id"],
-                message.audio.file_id,
-                caption=answer_message + (f"\n<b>Подпись:</b>\n{message.caption}" if message.caption else "") + footer_message
-            )
-        elif message.content_type == "voice":
-            await bot.send_voice(
-                question_data["user_id"],
-                message.voice.file_id,
-                caption=answer_message + footer_message
-            )
-        elif message.content_type == "video_note":
-            # Для видеозаметок нельзя добавить подпись, поэтому отправляем дополнительное сообщение
-            await bot.send_video_note(
-                question_data["user_id"],
-                message.video_note.file_id
-            )
-            await bot.send_message(
-                question_data["user_id"],
-                footer_message
-            )
-        elif message.content_type == "document":
-            await bot.send_document(
-                question_data["user_id"],
-                message.document.file_id,
-                caption=answer_message + (f"\n<b>Подпись:</b>\n{message.caption}" if message.caption else "") + footer_message
-            )
+        answer_message += caption_part(message.caption)
+    await send_content(
+        bot, question_data["user_id"], message.content_type,
+        media_info["file_id"] if media_info else None,
+        answer_message + footer_message
+    )
 
     await message.answer(f"Ответ на вопрос #{question_id} успешно отправлен.")
     # Логируем завершение ответа на вопрос
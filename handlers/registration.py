@@ -7,26 +7,29 @@ from aiogram.exceptions import TelegramBadRequest
 
 from states.registration import RegistrationStates
 from states.chat import ChatStates
-from utils.file_operations import is_user_registered, save_user_data, is_user_banned, get_user_language
-from utils.keyboards import get_main_keyboard, get_back_keyboard, get_auth_keyboards
-from utils.logger import log_info, log_error, log_callback, log_registration
+from utils.file_operations import is_user_registered_async, save_user_data_async, is_user_banned_async, get_user_language_async
+from utils.keyboards import get_main_keyboard_async, get_back_keyboard, get_auth_keyboards
+from utils.logger import log_info, log_error, log_callback, log_registration, get_debug_logger
 from utils.messages import get_message
 
 # Создание роутера
 router = Router()
 
+# Отладочный канал модуля (включается через LOG_DEBUG_MODULES или /debug)
+debug_log = get_debug_logger("registration")
+
 
 @router.callback_query(F.data == "register")
 async def register_command(callback: CallbackQuery, state: FSMContext):
     """Начало процесса регистрации"""
     # Логируем нажатие на кнопку регистрации
     user_id = callback.from_user.id
-    language = get_user_language(user_id)
+    language = await get_user_language_async(user_id)
     log_callback(user_id, "register", username=callback.from_user.username, full_name=callback.from_user.full_name)
     
-    print(f"DEBUG: Registration button clicked by user {user_id}")
+    debug_log.debug("Registration button clicked by user %s", user_id)
     
-    if is_user_banned(user_id):
+    if await is_user_banned_async(user_id):
         try:
             await callback.answer(get_message("banned_user", language), show_alert=True)
         except TelegramBadRequest:
@@ -44,11 +47,11 @@ async def register_command(callback: CallbackQuery, state: FSMContext):
         return
         
     # Проверяем, зарегистрирован ли пользователь
-    if is_user_registered(user_id):
+    if await is_user_registered_async(user_id):
         log_info(f"User [ID: {user_id}] tried to register again")
         await callback.message.edit_text(
             get_message("already_registered", language),
-            reply_markup=get_main_keyboard(user_id)
+            reply_markup=await get_main_keyboard_async(user_id)
         )
         try:
             await callback.answer()
@@ -74,7 +77,7 @@ async def register_command(callback: CallbackQuery, state: FSMContext):
 async def process_name(message: Message, state: FSMContext):
     """Сохранение имени и запрос курса"""
     user_id = message.from_user.id
-    language = get_user_language(user_id)
+    language = await get_user_language_async(user_id)
     full_name = message.text
     
     # Проверяем ввод
@@ -99,7 +102,7 @@ async def process_name(message: Message, state: FSMContext):
 async def process_course(message: Message, state: FSMContext):
     """Сохранение курса и запрос факультета"""
     user_id = message.from_user.id
-    language = get_user_language(user_id)
+    language = await get_user_language_async(user_id)
     course = message.text
     
     # Проверяем ввод курса
@@ -122,7 +125,7 @@ async def process_course(message: Message, state: FSMContext):
 async def process_faculty(message: Message, state: FSMContext):
     """Сохранение факультета и запрос кафедры"""
     user_id = message.from_user.id
-    language = get_user_language(user_id)
+    language = await get_user_language_async(user_id)
     faculty = message.text
     
     # Проверяем ввод
@@ -145,7 +148,7 @@ async def process_faculty(message: Message, state: FSMContext):
 async def process_department(message: Message, state: FSMContext):
     """Сохранение кафедры и запрос группы"""
     user_id = message.from_user.id
-    language = get_user_language(user_id)
+    language = await get_user_language_async(user_id)
     department = message.text
     
     # Проверяем ввод
@@ -168,7 +171,7 @@ async def process_department(message: Message, state: FSMContext):
 async def process_group(message: Message, state: FSMContext):
     """Завершение регистрации"""
     user_id = message.from_user.id
-    language = get_user_language(user_id)
+    language = await get_user_language_async(user_id)
     group = message.text
     
     # Проверяем ввод
@@ -186,7 +189,7 @@ async def process_group(message: Message, state: FSMContext):
     # Сохраняем данные пользователя
     user_data["username"] = message.from_user.username
     user_data["telegram_id"] = user_id  # Сохраняем telegram ID пользователя
-    save_user_data(user_id, user_data)
+    await save_user_data_async(user_id, user_data)
     
     # Логируем завершение регистрации
     log_registration("complete", user_id, message.from_user.username, user_data["full_name"])
@@ -199,7 +202,7 @@ async def process_group(message: Message, state: FSMContext):
     # Затем отправляем приветственное сообщение с главным меню, как после выбора языка
     await message.answer(
         f"{get_message('welcome', language)}",
-        reply_markup=get_main_keyboard(user_id)
+        reply_markup=await get_main_keyboard_async(user_id)
     )
     
     # Очищаем состояние
@@ -5,20 +5,68 @@ from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
 
-from config import BOT_TOKEN
+from config import (
+    BOT_TOKEN, BAN_RELOAD_INTERVAL, FAQ_RELOAD_INTERVAL, ADMIN_RELOAD_INTERVAL, FSM_STORAGE_BACKEND, DATABASE_PATH, REDIS_URL,
+    BOT_MODE, WEBHOOK_URL, WEBHOOK_PATH, WEBHOOK_SECRET, WEBHOOK_HOST, WEBHOOK_PORT, SHUTDOWN_TIMEOUT, WORKERS, WORKER_ID,
+    METRICS_HOST, METRICS_PORT, TRACING
+)
 from handlers import common_router, registration_router, faq_router, questions_router, chat_router
-from utils.file_operations import setup_sample_faq
-from utils.middleware import LanguageTrackingMiddleware
+from handlers.chat import chat_sessions, refresh_shared_state
+from handlers.questions import question_repository
+from utils.admins import admin_directory, BUSY
+from utils.faq_index import faq_index
+from utils.file_operations import setup_sample_faq, ban_registry, io_executor, get_user_cache_stats
+from utils.fsm_storage import create_fsm_storage
+from utils.media_group import media_groups
+from utils.metrics import metrics, MetricsMiddleware, ApiMetricsMiddleware, start_metrics_server
+from utils.middleware import LanguageTrackingMiddleware, SharedStateMiddleware
+from utils.relay_queue import relay_queues
+from utils.send_scheduler import send_scheduler
+from utils.sharding import ShardRouter
+from utils.tracing import tracer, TracingMiddleware, TracingRequestMiddleware
+from utils.webhook import run_webhook
 from utils.logger import log_info, log_error
 
 
 # Создание бота и dispatcher
 bot = Bot(token=BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
-dp = Dispatcher()
+# FSM-хранилище переживает перезапуск (sqlite) и может быть общим для процессов (redis)
+fsm_storage = create_fsm_storage(FSM_STORAGE_BACKEND, io_executor, db_path=DATABASE_PATH, redis_url=REDIS_URL)
+dp = Dispatcher(storage=fsm_storage)
+
+if TRACING:
+    # Спан запроса к Bot API включает ожидание в очереди отправки
+    bot.session.middleware(TracingRequestMiddleware())
+# Все исходящие запросы проходят через очередь с ограничением скорости
+bot.session.middleware(send_scheduler)
+# Время запросов к Bot API без ожидания в очереди
+bot.session.middleware(ApiMetricsMiddleware())
 
 # Регистрация middleware
+if TRACING:
+    # Корневой спан обновления охватывает все остальные middleware и обработчик
+    dp.update.outer_middleware(TracingMiddleware())
+if WORKER_ID:
+    # Процесс-обработчик видит изменения, сделанные другими процессами
+    dp.update.outer_middleware(SharedStateMiddleware(refresh_shared_state))
 dp.message.middleware(LanguageTrackingMiddleware())
 dp.callback_query.middleware(LanguageTrackingMiddleware())
+dp.message.middleware(MetricsMiddleware())
+dp.callback_query.middleware(MetricsMiddleware())
+if TRACING:
+    dp.message.middleware(TracingMiddleware())
+    dp.callback_query.middleware(TracingMiddleware())
+    metrics.stats_gauges("bot_tracing", tracer.stats)
+
+# Состояние очередей, кэшей и хранилищ в метриках
+metrics.stats_gauges("bot_chat_sessions", chat_sessions.counts)
+metrics.stats_gauges("bot_questions", question_repository.counts)
+metrics.stats_gauges("bot_send_queue", send_scheduler.stats)
+metrics.stats_gauges("bot_relay_queues", relay_queues.stats)
+metrics.stats_gauges("bot_media_groups", media_groups.stats)
+metrics.stats_gauges("bot_io", io_executor.stats)
+metrics.stats_gauges("bot_user_cache", get_user_cache_stats)
+metrics.stats_gauges("bot_fsm", fsm_storage.stats)
 
 # Регистрация роутеров
 dp.include_router(common_router)
@@ -37,23 +85,79 @@ async def main():
 
     # Установка образца FAQ
     await setup_sample_faq()
+    # Построение индекса FAQ для всех языков
+    faq_index.build()
+    # Загрузка неотвеченных вопросов, сохраненных до перезапуска
+    pending_count = question_repository.load_pending()
+    log_info(f"Загружено неотвеченных вопросов: {pending_count}")
+    # Восстановление ожидающих пользователей и активных чатов
+    session_count = chat_sessions.load()
+    log_info(f"Восстановлено сессий чата: {session_count}")
+    for session in chat_sessions.connected():
+        admin_directory.set_status(session.admin_name, BUSY)
+
+    # Фоновая перезагрузка списка банов при ручном изменении banned.json
+    ban_watcher = asyncio.create_task(ban_registry.watch(BAN_RELOAD_INTERVAL))
+    # Фоновое перестроение индекса FAQ при изменении faq/faq_*.json
+    faq_watcher = asyncio.create_task(faq_index.watch(FAQ_RELOAD_INTERVAL))
+    # Фоновая перезагрузка списка администраторов при изменении файла
+    admin_watcher = asyncio.create_task(admin_directory.watch(ADMIN_RELOAD_INTERVAL))
+    # Сервер метрик (у каждого процесса-обработчика свой порт)
+    metrics_runner = await start_metrics_server(METRICS_HOST, METRICS_PORT + WORKER_ID if METRICS_PORT else 0)
 
     try:
         # Запуск Бота
-        log_info("Бот запущен и готов к работе")
-        await dp.start_polling(bot)
+        log_info(f"Бот запущен и готов к работе (режим {BOT_MODE})")
+        if BOT_MODE == "webhook":
+            await run_webhook(
+                dp, bot, WEBHOOK_HOST, WEBHOOK_PORT, WEBHOOK_PATH,
+                url=WEBHOOK_URL, secret_token=WEBHOOK_SECRET, shutdown_timeout=SHUTDOWN_TIMEOUT
+            )
+        else:
+            # Вебхук, оставшийся от работы в режиме webhook, мешает getUpdates
+            await bot.delete_webhook()
+            await dp.start_polling(bot)
     except (KeyboardInterrupt, SystemExit):
         log_info("Бот остановлен")
     except Exception as e:
         log_error(f"Произошла ошибка при запуске бота: {e}")
     finally:
+        ban_watcher.cancel()
+        faq_watcher.cancel()
+        admin_watcher.cancel()
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
+        # Доставка сообщений чата, принятых до остановки
+        await relay_queues.drain(SHUTDOWN_TIMEOUT)
+        log_info(f"Задержка FSM-хранилища: {fsm_storage.stats()}")
+        await fsm_storage.close()
+        log_info(f"Очередь отправки: {send_scheduler.stats()}")
+        log_info(f"Очереди пересылки чата: {relay_queues.stats()}")
+        log_info(f"Альбомы: {media_groups.stats()}")
+        if TRACING:
+            log_info(f"Трассировка: {tracer.stats()}")
+        await send_scheduler.close()
         # Закрытие сессии бота
         await bot.session.close()
 
 
+async def run_front():
+    """Главный процесс режима WORKERS > 1: прием обновлений и распределение по процессам."""
+    try:
+        # Процессы должны видеть одно FSM-состояние
+        if FSM_STORAGE_BACKEND == "memory" or (FSM_STORAGE_BACKEND == "redis" and REDIS_URL.startswith("local://")):
+            raise RuntimeError("При WORKERS > 1 нужно общее FSM-хранилище: FSM_STORAGE_BACKEND=sqlite или redis")
+        router = ShardRouter(os.path.abspath(__file__), WORKERS)
+        await router.run(bot, BOT_MODE, dp.resolve_used_update_types())
+    except Exception as e:
+        log_error(f"Произошла ошибка в главном процессе: {e}")
+    finally:
+        await bot.session.close()
+
+
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        asyncio.run(run_front() if WORKERS > 1 and not WORKER_ID else main())
     except KeyboardInterrupt:
         log_info("Бот остановлен пользователем")
     except Exception as e:
@@ -0,0 +1,13 @@
+import argparse
+
+from utils.user_store import migrate_json_to_sqlite
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Импорт пользователей из data/*.json в SQLite")
+    parser.add_argument("--source", default="data", help="Каталог с JSON-файлами пользователей")
+    parser.add_argument("--db", default="data/bot.db", help="Путь к файлу базы SQLite")
+    args = parser.parse_args()
+
+    count = migrate_json_to_sqlite(args.source, args.db)
+    print(f"Перенесено пользователей: {count}")
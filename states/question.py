@@ -3,4 +3,5 @@ from aiogram.fsm.state import State, StatesGroup
 # FSM states для задавание вопроса
 class QuestionStates(StatesGroup):
     waiting_for_question = State()
+    confirming_suggestion = State()
     waiting_for_admin_answer = State() 
\ No newline at end of file
@@ -0,0 +1,29 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+# config.py читает переменные окружения при импорте
+os.environ.setdefault("BOT_TOKEN", "123456:TEST")
+os.environ.setdefault("ADMIN_GROUP_ID", "-100")
+# Журнал событий тестам не нужен
+os.environ.setdefault("EVENT_LOG", "false")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class GatedExecutor:
+    """Пул ввода-вывода, в котором операции ждут, пока тест не откроет gate."""
+
+    def __init__(self):
+        self.gate = asyncio.Event()
+
+    async def run(self, func, *args):
+        await self.gate.wait()
+        return func(*args)
+
+
+@pytest.fixture
+def gated():
+    return GatedExecutor()
@@ -0,0 +1,130 @@
+import asyncio
+
+import pytest
+
+from utils.chat_sessions import CONNECTED, WAITING, ChatSessionRegistry, ChatSessionStore
+from utils.io_executor import IOExecutor
+
+
+@pytest.fixture
+def executor():
+    executor = IOExecutor(max_workers=4)
+    yield executor
+    executor.shutdown()
+
+
+def test_transitions_are_persisted_in_order(tmp_path, executor):
+    db_path = str(tmp_path / "bot.db")
+    registry = ChatSessionRegistry(ChatSessionStore(db_path), executor)
+
+    async def scenario():
+        # Изменения без ожидания между ними: записи не должны обгонять друг друга
+        await asyncio.gather(
+            registry.start_waiting(1),
+            registry.start_waiting(2),
+            registry.set_notification(1, 555)
+        )
+        assert await registry.connect(1, 10, "Админ", 208) is not None
+        await registry.close(2)
+
+    asyncio.run(scenario())
+
+    restored = ChatSessionRegistry(ChatSessionStore(db_path), executor)
+    assert restored.load() == 1
+    session = restored.by_user(1)
+    assert (session.status, session.admin_id, session.topic_id, session.notification_id) == (CONNECTED, 10, 208, 555)
+    assert restored.by_topic(208) is session
+    assert restored.by_user(2) is None
+
+
+def test_connect_lost_to_other_process_is_rolled_back(tmp_path, executor):
+    db_path = str(tmp_path / "bot.db")
+    first = ChatSessionRegistry(ChatSessionStore(db_path), executor)
+    second = ChatSessionRegistry(ChatSessionStore(db_path), executor)
+
+    async def scenario():
+        await first.start_waiting(1)
+        second.load()
+        assert await first.connect(1, 10, "Админ", 208) is not None
+        # Второй процесс еще не видел подключения
+        assert await second.connect(1, 20, "Другой", 214) is None
+
+    asyncio.run(scenario())
+    session = second.by_user(1)
+    assert session.status == WAITING and session.admin_id is None
+    assert second.by_admin(20) is None and second.by_topic(214) is None
+    assert second.counts() == {"connected": 0, "waiting": 1}
+
+
+def test_refresh_keeps_session_whose_write_is_in_flight(tmp_path, executor, gated):
+    db_path = str(tmp_path / "bot.db")
+    registry = ChatSessionRegistry(ChatSessionStore(db_path), gated)
+    other = ChatSessionRegistry(ChatSessionStore(db_path), executor)
+
+    async def scenario():
+        registry.load()
+        waiting = asyncio.ensure_future(registry.start_waiting(1))
+        await asyncio.sleep(0)
+        # Другой процесс меняет таблицу, пока запись сессии 1 еще в очереди
+        await other.start_waiting(2)
+        assert not await registry.refresh()
+        assert registry.is_waiting(1)
+
+        gated.gate.set()
+        await waiting
+        await registry.set_notification(1, 555)
+        assert await registry.refresh()
+        assert registry.by_user(1).notification_id == 555
+        assert registry.is_waiting(2)
+
+    asyncio.run(scenario())
+
+
+def test_refresh_does_not_resurrect_session_whose_close_is_in_flight(tmp_path, executor, gated):
+    db_path = str(tmp_path / "bot.db")
+    registry = ChatSessionRegistry(ChatSessionStore(db_path), gated)
+    other = ChatSessionRegistry(ChatSessionStore(db_path), executor)
+
+    async def scenario():
+        gated.gate.set()
+        await registry.start_waiting(1)
+        await registry.connect(1, 10, "Админ", 208)
+        gated.gate.clear()
+
+        closing = asyncio.ensure_future(registry.close(1))
+        await asyncio.sleep(0)
+        await other.start_waiting(2)
+        assert not await registry.refresh()
+        assert registry.by_topic(208) is None and registry.by_user(1) is None
+
+        gated.gate.set()
+        await closing
+        assert await registry.refresh()
+        assert registry.by_topic(208) is None and registry.by_user(1) is None
+        assert registry.is_waiting(2)
+
+    asyncio.run(scenario())
+
+
+def test_refresh_discards_snapshot_read_during_local_write(tmp_path, executor, gated):
+    db_path = str(tmp_path / "bot.db")
+    registry = ChatSessionRegistry(ChatSessionStore(db_path), gated)
+    other = ChatSessionRegistry(ChatSessionStore(db_path), executor)
+
+    async def scenario():
+        registry.load()
+        await other.start_waiting(2)
+        # Чтение снимка в пуле началось, и в это время процесс сам добавляет сессию
+        refreshing = asyncio.ensure_future(registry.refresh(other.store.version()))
+        await asyncio.sleep(0)
+        waiting = asyncio.ensure_future(registry.start_waiting(1))
+        await asyncio.sleep(0)
+        gated.gate.set()
+        assert not await refreshing
+        await waiting
+        assert registry.is_waiting(1)
+
+        assert await registry.refresh()
+        assert registry.is_waiting(1) and registry.is_waiting(2)
+
+    asyncio.run(scenario())
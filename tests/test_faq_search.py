@@ -0,0 +1,45 @@
+import heapq
+import random
+
+from utils.faq_search import FAQSearchIndex
+
+
+def exhaustive(index, text, limit=5):
+    """Полный обход: оценка каждого вопроса по всем термам запроса."""
+    scores = {}
+    for term, query_weight in index.query_vector(text).items():
+        for q_id, weight in index.postings[term].items():
+            scores[q_id] = scores.get(q_id, 0.0) + query_weight * weight
+    return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+
+def test_search_matches_exhaustive_scoring():
+    rng = random.Random(3)
+    words = ["".join(rng.choice("бвгдклмнпрст") + rng.choice("аоуеи") for _ in range(3)) for _ in range(300)]
+    # Частоты по Ципфу: у частых слов списки почти во весь FAQ
+    weights = [1 / (rank + 1) for rank in range(len(words))]
+    faq = {
+        str(q_id): {"question": " ".join(rng.choices(words, weights, k=rng.randint(4, 10))),
+                    "answer": " ".join(rng.choices(words, weights, k=rng.randint(15, 40)))}
+        for q_id in range(1, 1001)
+    }
+    index = FAQSearchIndex(faq, "ru")
+
+    for _ in range(200):
+        query = " ".join(rng.choices(words, weights, k=rng.randint(1, 6)))
+        found = index.search(query)
+        expected = exhaustive(index, query)
+        # При равных оценках порядок вопросов может отличаться, оценки - нет
+        assert [round(score, 9) for _, score in found] == [round(score, 9) for _, score in expected]
+        if len({round(score, 9) for _, score in expected}) == len(expected):
+            assert [q_id for q_id, _ in found] == [q_id for q_id, _ in expected]
+
+
+def test_search_finds_question_and_ignores_unknown_words():
+    index = FAQSearchIndex({
+        "1": {"question": "Как получить справку об обучении", "answer": "Справку выдает деканат"},
+        "2": {"question": "Где расписание экзаменов", "answer": "Расписание висит на сайте"},
+    }, "ru")
+    assert index.search("справка")[0][0] == "1"
+    assert index.search("расписание экзаменов")[0][0] == "2"
+    assert index.search("абракадабра") == []
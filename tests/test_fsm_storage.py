@@ -0,0 +1,112 @@
+import asyncio
+import time
+
+import pytest
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.fsm.storage.base import StorageKey
+
+from utils.fsm_storage import KeyValueStorage, LocalKeyValueClient, create_fsm_storage
+from utils.io_executor import IOExecutor
+
+KEY = StorageKey(bot_id=1, chat_id=100, user_id=100)
+OTHER_KEY = StorageKey(bot_id=1, chat_id=200, user_id=200)
+
+
+class Form(StatesGroup):
+    name = State()
+
+
+@pytest.fixture(params=["sqlite", "redis"])
+def storage(request, tmp_path):
+    executor = IOExecutor(max_workers=1)
+    storage = create_fsm_storage(request.param, executor, db_path=str(tmp_path / "bot.db"), redis_url="local://")
+    yield storage
+    asyncio.run(storage.close())
+    executor.shutdown()
+
+
+def stored_keys(storage):
+    """Ключи, которые бэкенд реально хранит."""
+    backend = storage.storage
+    if isinstance(backend, KeyValueStorage):
+        return set(backend.client._values)
+    return {row[0] for row in backend._conn.execute("SELECT key FROM fsm")}
+
+
+def test_state_round_trip(storage):
+    async def scenario():
+        assert await storage.get_state(KEY) is None
+        await storage.set_state(KEY, Form.name)
+        assert await storage.get_state(KEY) == "Form:name"
+        assert await storage.get_state(OTHER_KEY) is None
+        await storage.set_state(KEY, None)
+        assert await storage.get_state(KEY) is None
+        assert stored_keys(storage) == set()
+
+    asyncio.run(scenario())
+
+
+def test_data_round_trip(storage):
+    async def scenario():
+        assert await storage.get_data(KEY) == {}
+        await storage.set_data(KEY, {"question": "Когда сессия?", "step": 2})
+        assert await storage.get_data(KEY) == {"question": "Когда сессия?", "step": 2}
+        assert await storage.get_data(OTHER_KEY) == {}
+
+    asyncio.run(scenario())
+
+
+def test_empty_data_deletes_key(storage):
+    async def scenario():
+        await storage.set_data(KEY, {"step": 1})
+        assert stored_keys(storage)
+        await storage.set_data(KEY, {})
+        assert await storage.get_data(KEY) == {}
+        assert stored_keys(storage) == set()
+
+    asyncio.run(scenario())
+
+
+def test_state_and_data_are_independent(storage):
+    async def scenario():
+        await storage.set_state(KEY, Form.name)
+        await storage.set_data(KEY, {"step": 1})
+        await storage.set_state(KEY, None)
+        assert await storage.get_data(KEY) == {"step": 1}
+        await storage.set_data(KEY, {})
+        assert stored_keys(storage) == set()
+
+    asyncio.run(scenario())
+
+
+def test_stats_count_operations(storage):
+    async def scenario():
+        await storage.set_state(KEY, Form.name)
+        await storage.get_state(KEY)
+        await storage.get_state(KEY)
+        stats = storage.stats()
+        assert stats["set_state"]["count"] == 1
+        assert stats["get_state"]["count"] == 2
+
+    asyncio.run(scenario())
+
+
+def test_local_client_ttl_expiry(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    storage = KeyValueStorage(LocalKeyValueClient(), state_ttl=60, data_ttl=30)
+
+    async def scenario():
+        await storage.set_state(KEY, Form.name)
+        await storage.set_data(KEY, {"step": 1})
+        now[0] += 29
+        assert await storage.get_state(KEY) == "Form:name"
+        assert await storage.get_data(KEY) == {"step": 1}
+        now[0] += 1
+        assert await storage.get_data(KEY) == {}
+        assert await storage.get_state(KEY) == "Form:name"
+        now[0] += 30
+        assert await storage.get_state(KEY) is None
+        assert storage.client._values == {}
+
+    asyncio.run(scenario())
@@ -0,0 +1,47 @@
+import gzip
+import os
+from datetime import datetime, timedelta
+
+from utils.logger import DailyFileHandler
+
+
+def day(offset):
+    return (datetime.now() - timedelta(days=offset)).strftime('%Y-%m-%d')
+
+
+def write(path, text):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+def test_archive_compresses_past_days_and_drops_old(tmp_path):
+    write(tmp_path / f"bot_{day(1)}.log", "вчера\n")
+    write(tmp_path / f"bot_{day(40)}.log", "давно\n")
+    write(tmp_path / f"events_{day(1)}.jsonl", "{}\n")
+
+    handler = DailyFileHandler(str(tmp_path), 'bot', '.log', retention_days=30)
+    handler.close()
+
+    names = sorted(os.listdir(tmp_path))
+    assert names == sorted([f"bot_{day(0)}.log", f"bot_{day(1)}.log.gz", f"events_{day(1)}.jsonl"])
+    with gzip.open(tmp_path / f"bot_{day(1)}.log.gz", 'rt', encoding='utf-8') as f:
+        assert f.read() == "вчера\n"
+
+
+def test_archive_skips_file_already_compressed_by_another_process(tmp_path):
+    # Другой процесс уже заменил архив, но еще не удалил исходный файл
+    with gzip.open(tmp_path / f"bot_{day(1)}.log.gz", 'wt', encoding='utf-8') as f:
+        f.write("сжато другим процессом\n")
+    write(tmp_path / f"bot_{day(1)}.log", "сжато другим процессом\n")
+    # Незаконченный временный файл другого процесса не трогается
+    write(tmp_path / f"bot_{day(1)}.log.99999.gz.tmp", "")
+
+    handler = DailyFileHandler(str(tmp_path), 'bot', '.log', retention_days=30)
+    handler.close()
+
+    with gzip.open(tmp_path / f"bot_{day(1)}.log.gz", 'rt', encoding='utf-8') as f:
+        assert f.read() == "сжато другим процессом\n"
+    # Исходный файл удаляет процесс, который его сжал
+    assert (tmp_path / f"bot_{day(1)}.log").exists()
+    assert not any(name.endswith(f".{os.getpid()}.gz.tmp") for name in os.listdir(tmp_path))
+    assert (tmp_path / f"bot_{day(1)}.log.99999.gz.tmp").exists()
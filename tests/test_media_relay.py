@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.methods import CopyMessage, SendMediaGroup
+from aiogram.types import Message
+
+from utils.media_relay import relay_album, relay_message
+
+
+def message(message_id, **content):
+    return Message.model_validate({
+        "message_id": message_id,
+        "date": 0,
+        "chat": {"id": 5, "type": "private"},
+        "from": {"id": 5, "is_bot": False, "first_name": "Студент"},
+        **content
+    })
+
+
+class FakeBot:
+    """Бот, который запоминает вызовы и при error отвечает Bad Request."""
+
+    def __init__(self, error=None):
+        self.error = error
+        self.calls = []
+
+    async def copy_message(self, chat_id, from_chat_id, message_id, message_thread_id=None):
+        self.calls.append(("copy_message", chat_id, message_id, message_thread_id))
+        if self.error:
+            raise TelegramBadRequest(CopyMessage(chat_id=chat_id, from_chat_id=from_chat_id, message_id=message_id),
+                                     self.error)
+
+    async def send_media_group(self, chat_id, media, message_thread_id=None):
+        self.calls.append(("send_media_group", chat_id, len(media), message_thread_id))
+        if self.error:
+            raise TelegramBadRequest(SendMediaGroup(chat_id=chat_id, media=media), self.error)
+
+
+PHOTO = {"photo": [{"file_id": "p1", "file_unique_id": "u1", "width": 90, "height": 90}]}
+
+
+@pytest.mark.parametrize("content", [{"text": "привет"}, PHOTO, {"dice": {"emoji": "🎲", "value": 3}}])
+def test_copyable_message_is_copied(content):
+    bot = FakeBot()
+    assert asyncio.run(relay_message(bot, message(1, **content), -100, message_thread_id=7))
+    assert bot.calls == [("copy_message", -100, 1, 7)]
+
+
+def test_uncopyable_type_is_reported_without_calling_telegram():
+    bot = FakeBot()
+    invoice = {"invoice": {"title": "t", "description": "d", "start_parameter": "s", "currency": "RUB",
+                           "total_amount": 100}}
+    assert not asyncio.run(relay_message(bot, message(1, **invoice), -100))
+    assert bot.calls == []
+
+
+@pytest.mark.parametrize("error", ["Bad Request: message thread not found", "Bad Request: chat not found"])
+def test_delivery_errors_reach_the_caller(error):
+    bot = FakeBot(error)
+    with pytest.raises(TelegramBadRequest, match=error.split(": ")[1]):
+        asyncio.run(relay_message(bot, message(1, text="привет"), -100, message_thread_id=7))
+    with pytest.raises(TelegramBadRequest):
+        asyncio.run(relay_album(bot, [message(1, **PHOTO), message(2, **PHOTO)], -100, message_thread_id=7))
@@ -0,0 +1,69 @@
+import asyncio
+
+from aiohttp.test_utils import TestClient, TestServer
+
+from utils.metrics import LATENCY_BUCKETS, MetricsRegistry, create_metrics_app
+
+
+def scrape(registry):
+    async def scenario():
+        async with TestClient(TestServer(create_metrics_app(registry))) as client:
+            response = await client.get("/metrics")
+            return response.status, response.headers["Content-Type"], await response.text()
+
+    return asyncio.run(scenario())
+
+
+def samples(text):
+    """Строки значений без комментариев: {имя{метки}: значение}."""
+    result = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            result[name] = float(value)
+    return result
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.counter("bot_updates_total", "Обновления", ("type",)).inc('a"b\\c\nd')
+
+    status, content_type, text = scrape(registry)
+
+    assert status == 200
+    assert content_type.startswith("text/plain")
+    assert "# TYPE bot_updates_total counter" in text
+    assert samples(text) == {'bot_updates_total{type="a\\"b\\\\c\\nd"}': 1.0}
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("bot_handler_duration_seconds", "Время", ("handler",))
+    # 0.01 - ровно граница корзины: попадает в le="0.01"
+    for value in (0.003, 0.01, 0.2, 20.0):
+        histogram.observe(value, "start")
+
+    values = samples(scrape(registry)[2])
+
+    buckets = [values[f'bot_handler_duration_seconds_bucket{{handler="start",le="{bound}"}}']
+               for bound in LATENCY_BUCKETS]
+    assert buckets == sorted(buckets)
+    assert values['bot_handler_duration_seconds_bucket{handler="start",le="0.005"}'] == 1
+    assert values['bot_handler_duration_seconds_bucket{handler="start",le="0.01"}'] == 2
+    assert values['bot_handler_duration_seconds_bucket{handler="start",le="0.25"}'] == 3
+    assert values['bot_handler_duration_seconds_bucket{handler="start",le="10.0"}'] == 3
+    assert values['bot_handler_duration_seconds_bucket{handler="start",le="+Inf"}'] == 4
+    assert values['bot_handler_duration_seconds_count{handler="start"}'] == 4
+    assert abs(values['bot_handler_duration_seconds_sum{handler="start"}'] - 20.213) < 1e-9
+
+
+def test_gauges_are_read_on_scrape():
+    registry = MetricsRegistry()
+    queue = []
+    registry.gauge("bot_waiting_users", "Ожидающие", lambda: len(queue))
+    registry.stats_gauges("bot_io", lambda: {"in_flight": 2, "cache": {"hits": 5}, "name": "pool", "ok": True})
+
+    queue.extend([1, 2, 3])
+    values = samples(scrape(registry)[2])
+
+    assert values == {"bot_waiting_users": 3, "bot_io_in_flight": 2, "bot_io_cache_hits": 5}
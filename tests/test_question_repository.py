@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+
+from utils.io_executor import IOExecutor
+from utils.question_store import QuestionRepository, QuestionStore
+
+
+@pytest.fixture
+def repository(tmp_path):
+    executor = IOExecutor(max_workers=1)
+    yield QuestionRepository(QuestionStore(str(tmp_path / "bot.db")), executor)
+    executor.shutdown()
+
+
+def question(user_id=1):
+    return {"user_id": user_id, "full_name": "Студент", "status": "pending", "admin_id": None, "answer": None}
+
+
+def test_reassign_and_answer_keeps_admin_index_consistent(repository):
+    async def scenario():
+        question_id = await repository.create(question())
+
+        # Первый администратор берет вопрос
+        data = await repository.get(question_id)
+        data["admin_id"] = 10
+        await repository.save(data)
+        assert [q["question_id"] for q in repository.assigned_to(10)] == [question_id]
+
+        # Вопрос переходит ко второму администратору
+        data = await repository.get(question_id)
+        data["admin_id"] = 20
+        assert [q["admin_id"] for q in repository.assigned_to(10)] == [10]
+        await repository.save(data)
+        assert repository.assigned_to(10) == []
+        assert [q["question_id"] for q in repository.assigned_to(20)] == [question_id]
+
+        # Ответ убирает вопрос из памяти и из всех индексов
+        data = await repository.get(question_id)
+        data["status"] = "answered"
+        await repository.save(data)
+        assert repository.assigned_to(10) == []
+        assert repository.assigned_to(20) == []
+        assert repository.counts() == {"total": 1, "answered": 1, "pending": 0}
+        assert (await repository.get(question_id))["status"] == "answered"
+
+    asyncio.run(scenario())
+
+
+def test_get_returns_copy(repository):
+    async def scenario():
+        question_id = await repository.create(question())
+        data = await repository.get(question_id)
+        data["admin_id"] = 10
+        # Без save изменения не видны другим обработчикам
+        assert (await repository.get(question_id))["admin_id"] is None
+        assert repository.assigned_to(10) == []
+
+    asyncio.run(scenario())
+
+
+def test_pending_survives_reload(repository):
+    async def scenario():
+        first = await repository.create(question(1))
+        second = await repository.create(question(2))
+        data = await repository.get(first)
+        data["admin_id"] = 10
+        await repository.save(data)
+
+        assert repository.load_pending() == 2
+        assert [q["question_id"] for q in repository.pending()] == [first, second]
+        assert [q["question_id"] for q in repository.assigned_to(10)] == [first]
+
+    asyncio.run(scenario())
+
+
+def test_refresh_waits_for_own_save(tmp_path, gated):
+    store = QuestionStore(str(tmp_path / "bot.db"))
+    repository = QuestionRepository(store, gated)
+
+    async def scenario():
+        gated.gate.set()
+        question_id = await repository.create(question(1))
+        repository.load_pending()
+        data = await repository.get(question_id)
+        data["admin_id"] = 10
+        gated.gate.clear()
+        saving = asyncio.ensure_future(repository.save(data))
+        await asyncio.sleep(0)
+        # Другой процесс меняет таблицу, пока save еще не дошел до базы
+        store.create(question(2))
+        assert not await repository.refresh()
+        assert [q["question_id"] for q in repository.assigned_to(10)] == [question_id]
+
+        gated.gate.set()
+        await saving
+        assert await repository.refresh()
+        assert [q["question_id"] for q in repository.assigned_to(10)] == [question_id]
+        assert repository.counts() == {"total": 2, "answered": 0, "pending": 2}
+
+    asyncio.run(scenario())
@@ -0,0 +1,87 @@
+import asyncio
+import json
+
+import aiohttp
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+
+import utils.sharding
+from config import WEBHOOK_PATH
+from utils.sharding import ShardRouter, Worker
+
+SECRET = "test-secret"
+HEADERS = {"X-Telegram-Bot-Api-Secret-Token": SECRET, "Content-Type": "application/json"}
+
+UPDATE = {
+    "update_id": 2001,
+    "message": {
+        "message_id": 3,
+        "date": 0,
+        "chat": {"id": 5, "type": "private"},
+        "from": {"id": 5, "is_bot": False, "first_name": "Студент"},
+        "text": "привет"
+    }
+}
+
+
+def post(body, headers=HEADERS):
+    router = ShardRouter("main.py", 2)
+
+    async def scenario():
+        async with TestClient(TestServer(router.create_app(SECRET))) as client:
+            response = await client.post(WEBHOOK_PATH, data=body, headers=headers)
+            return response.status
+
+    status = asyncio.run(scenario())
+    return status, router
+
+
+def test_update_is_routed_by_user():
+    status, router = post(json.dumps(UPDATE))
+    assert status == 200
+    assert [worker.queue.qsize() for worker in router.workers] == [0, 1]
+    assert (router.received, router.rejected) == (1, 0)
+
+
+def test_update_without_secret_is_rejected():
+    status, router = post(json.dumps(UPDATE), {"Content-Type": "application/json"})
+    assert status == 401
+    assert router.received == 0
+
+
+@pytest.mark.parametrize("body", [b"{not json", b"[1, 2]", b'{"message": {}}', b"\xff\xfe"])
+def test_malformed_body_is_rejected_with_400(body):
+    status, router = post(body)
+    assert status == 400
+    assert (router.received, router.rejected) == (0, 1)
+    assert all(worker.queue.empty() for worker in router.workers)
+
+
+def test_router_requires_secret():
+    with pytest.raises(ValueError):
+        ShardRouter("main.py", 1).create_app("")
+
+
+def test_forward_drops_update_after_attempts(monkeypatch):
+    delays = []
+
+    async def fake_sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(utils.sharding, "WORKER_FORWARD_ATTEMPTS", 4)
+    monkeypatch.setattr(utils.sharding.asyncio, "sleep", fake_sleep)
+
+    async def scenario():
+        worker = Worker(0, "main.py", SECRET, 1)
+        # Порт, на котором никто не слушает
+        worker.url = "http://127.0.0.1:9/webhook"
+        worker.queue.put_nowait(json.dumps(UPDATE).encode())
+        async with aiohttp.ClientSession() as session:
+            task = asyncio.ensure_future(worker.forward(session))
+            await asyncio.wait_for(worker.queue.join(), 10)
+            task.cancel()
+        return worker.stats()
+
+    stats = asyncio.run(scenario())
+    assert (stats["forwarded"], stats["dropped"], stats["queued"]) == (0, 1, 0)
+    assert delays == [0.5, 1.0, 2.0]
@@ -0,0 +1,79 @@
+import asyncio
+import json
+import time
+
+import pytest
+from aiogram import Bot, Dispatcher, Router
+from aiogram.types import Message
+from aiohttp.test_utils import TestClient, TestServer
+
+from utils.webhook import WEBHOOK_HANDLER, WebhookHandler, create_webhook_app
+
+SECRET = "test-secret"
+PATH = "/webhook"
+
+# Записанное обновление: сообщение администратора в личном чате с ботом
+UPDATE = {
+    "update_id": 1001,
+    "message": {
+        "message_id": 7,
+        "date": int(time.time()),
+        "chat": {"id": 609461858, "type": "private"},
+        "from": {"id": 609461858, "is_bot": False, "first_name": "Админ"},
+        "text": "/list"
+    }
+}
+
+
+def make_app(received):
+    router = Router()
+
+    @router.message()
+    async def record(message: Message):
+        received.append(message.text)
+
+    dispatcher = Dispatcher()
+    dispatcher.include_router(router)
+    bot = Bot("123456:TEST")
+    return create_webhook_app(dispatcher, bot, PATH, SECRET, shutdown_timeout=1)
+
+
+def post(headers):
+    received = []
+
+    async def scenario():
+        async with TestClient(TestServer(make_app(received))) as client:
+            response = await client.post(PATH, data=json.dumps(UPDATE), headers=headers)
+            # Обновление обрабатывается в фоне
+            await asyncio.sleep(0.1)
+            stats = client.app[WEBHOOK_HANDLER].stats()
+            return response.status, stats
+
+    status, stats = asyncio.run(scenario())
+    return status, stats, received
+
+
+def test_update_with_secret_is_dispatched():
+    status, stats, received = post({
+        "X-Telegram-Bot-Api-Secret-Token": SECRET, "Content-Type": "application/json"
+    })
+    assert status == 200
+    assert received == ["/list"]
+    assert (stats["received"], stats["rejected"]) == (1, 0)
+
+
+@pytest.mark.parametrize("headers", [
+    {"Content-Type": "application/json"},
+    {"X-Telegram-Bot-Api-Secret-Token": "wrong", "Content-Type": "application/json"},
+])
+def test_update_without_secret_is_rejected(headers):
+    status, stats, received = post(headers)
+    assert status == 401
+    assert received == []
+    assert (stats["received"], stats["rejected"]) == (0, 1)
+
+
+@pytest.mark.parametrize("secret", [None, ""])
+def test_webhook_requires_secret(secret):
+    with pytest.raises(ValueError):
+        WebhookHandler(Dispatcher(), Bot("123456:TEST"), secret_token=secret)
@@ -0,0 +1,22 @@
+import argparse
+import gzip
+
+from utils.tracing import fold_spans
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Свертка спанов logs/spans_*.jsonl в стеки для флейм-графа")
+    parser.add_argument("files", nargs="+", help="Файлы спанов (.jsonl или .jsonl.gz)")
+    parser.add_argument("--output", default="spans.folded", help="Файл со стеками (формат flamegraph.pl / speedscope)")
+    args = parser.parse_args()
+
+    lines = []
+    for path in args.files:
+        with (gzip.open(path, "rt", encoding="utf-8") if path.endswith(".gz") else open(path, encoding="utf-8")) as f:
+            lines.extend(f)
+
+    folded = fold_spans(lines)
+    with open(args.output, "w", encoding="utf-8") as f:
+        for stack, microseconds in sorted(folded.items()):
+            f.write(f"{stack} {round(microseconds)}\n")
+    print(f"Стеков: {len(folded)}, записано в {args.output}")
@@ -1,10 +1,13 @@
 from utils.file_operations import (
     get_user_data_path, is_user_registered, load_user_data,
     save_user_data, load_faq, is_user_banned, setup_sample_faq,
-    ban_user, unban_user
+    ban_user, unban_user, get_user_cache_stats,
+    is_user_registered_async, load_user_data_async, save_user_data_async,
+    get_user_language_async, set_user_language_async, load_faq_async,
+    is_user_banned_async, ban_user_async, unban_user_async, get_io_stats
 )
 from utils.keyboards import (
-    get_main_keyboard, get_faq_list_keyboard, get_faq_back_keyboard
+    get_main_keyboard, get_main_keyboard_async, get_faq_list_keyboard, get_faq_back_keyboard
 )
 from utils.media import save_media_file
 from utils.logger import (
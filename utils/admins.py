@@ -0,0 +1,151 @@
+import asyncio
+import json
+import os
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from config import ADMIN_TOPICS, ADMIN_TOPICS_FILE
+from utils.logger import log_info, log_error
+
+# Статусы администратора
+OPEN = "open"
+BUSY = "busy"
+
+
+class AdminInfo:
+    """Администратор и его топик в группе администраторов."""
+
+    __slots__ = ("name", "user_id", "topic_id", "status")
+
+    def __init__(self, name: str, user_id: int, topic_id: int, status: str = OPEN):
+        self.name = name
+        self.user_id = user_id
+        self.topic_id = topic_id
+        self.status = status
+
+    def __repr__(self) -> str:
+        return f"AdminInfo(name={self.name}, user_id={self.user_id}, topic_id={self.topic_id}, status={self.status})"
+
+
+class AdminDirectory:
+    """
+    Справочник администраторов с индексами по имени, user_id и ID топика.
+
+    Список берется из файла path (формат как у ADMIN_TOPICS в config.py),
+    а если файла нет - из ADMIN_TOPICS. Правки файла подхватываются фоновой
+    проверкой mtime без перезапуска; статусы оставшихся администраторов при
+    этом сохраняются.
+    """
+
+    def __init__(self, topics: Mapping[str, Mapping[str, Any]], path: Optional[str] = None):
+        self.topics = topics
+        self.path = path
+        self._by_name: Dict[str, AdminInfo] = {}
+        self._by_user_id: Dict[int, AdminInfo] = {}
+        self._by_topic: Dict[int, AdminInfo] = {}
+        self._version: Optional[Tuple[int, int]] = None
+        self.reload()
+
+    def _file_version(self) -> Optional[Tuple[int, int]]:
+        """mtime и размер файла администраторов. None, если файла нет."""
+        if not self.path:
+            return None
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _build(self, topics: Mapping[str, Any]) -> Dict[str, AdminInfo]:
+        """Администраторы из словаря {имя: {id, user_id, status}}; неправильные записи пропускаются."""
+        admins = {}
+        for name, info in topics.items():
+            try:
+                user_id = int(info["user_id"])
+                topic_id = int(info["id"])
+            except (KeyError, TypeError, ValueError) as e:
+                log_error(f"Пропущена запись администратора {name!r}: {e!r}")
+                continue
+            previous = self._by_name.get(name)
+            status = previous.status if previous is not None else info.get("status", OPEN)
+            admins[name] = AdminInfo(name, user_id, topic_id, status)
+        return admins
+
+    def reload(self) -> None:
+        """
+        Перестроение справочника из файла или из ADMIN_TOPICS.
+
+        Записи без user_id/id или с нечисловыми значениями пропускаются. Если
+        файл не читается или в нем нет ни одной правильной записи, остается
+        прежний справочник (при запуске - ADMIN_TOPICS).
+        """
+        version = self._file_version()
+        admins = None
+        if version is not None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as file:
+                    topics = json.load(file)
+                if not isinstance(topics, dict):
+                    raise ValueError("ожидается объект {имя: {id, user_id}}")
+                admins = self._build(topics)
+                if topics and not admins:
+                    raise ValueError("нет ни одной правильной записи")
+            except (OSError, ValueError) as e:
+                # Поврежденный файл не должен оставлять бота без администраторов
+                log_error(f"Ошибка при чтении файла администраторов {self.path}: {e}")
+                admins = None
+                # Файл перечитается после следующего изменения
+                self._version = version
+                if self._by_name:
+                    return
+        if admins is None:
+            admins = self._build(self.topics)
+
+        self._by_name = admins
+        self._by_user_id = {admin.user_id: admin for admin in admins.values()}
+        self._by_topic = {admin.topic_id: admin for admin in admins.values()}
+        self._version = version
+
+    def reload_if_changed(self) -> bool:
+        """Перечитывание файла, если он изменился. Возвращает True при перезагрузке."""
+        if self._file_version() == self._version:
+            return False
+        self.reload()
+        log_info(f"Список администраторов перезагружен: {len(self._by_name)}")
+        return True
+
+    def by_name(self, name: str) -> Optional[AdminInfo]:
+        return self._by_name.get(name)
+
+    def by_user_id(self, user_id: int) -> Optional[AdminInfo]:
+        return self._by_user_id.get(user_id)
+
+    def by_topic(self, topic_id: int) -> Optional[AdminInfo]:
+        return self._by_topic.get(topic_id)
+
+    def set_status(self, name: str, status: str) -> bool:
+        """Изменение статуса администратора. False, если администратора нет."""
+        admin = self._by_name.get(name)
+        if admin is None:
+            return False
+        admin.status = status
+        return True
+
+    def admins(self) -> List[AdminInfo]:
+        """Все администраторы."""
+        return list(self._by_name.values())
+
+    def __len__(self) -> int:
+        return len(self._by_name)
+
+    async def watch(self, interval: float = 5.0) -> None:
+        """Фоновая проверка изменений файла администраторов."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.reload_if_changed)
+            except Exception as e:
+                log_error(f"Ошибка при перезагрузке файла администраторов: {e}")
+
+
+# Общий справочник администраторов
+admin_directory = AdminDirectory(ADMIN_TOPICS, ADMIN_TOPICS_FILE)
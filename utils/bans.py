@@ -0,0 +1,112 @@
+import asyncio
+import json
+import os
+import threading
+from typing import Optional, Set, Tuple
+
+from utils.logger import log_info, log_error
+
+
+class BanRegistry:
+    """
+    Реестр забаненных пользователей.
+
+    Список ID хранится в памяти в виде множества, поэтому проверка бана не
+    обращается к диску. Изменения записываются в banned.json атомарно (через
+    временный файл и os.replace), а ручные правки файла подхватываются
+    фоновой проверкой mtime.
+    """
+
+    def __init__(self, path: str = "banned.json"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._banned: Set[int] = set()
+        self._version: Optional[Tuple[int, int]] = None
+        self.reload()
+
+    def _file_version(self) -> Optional[Tuple[int, int]]:
+        """mtime и размер файла банов. None, если файла нет."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self) -> None:
+        """Чтение файла банов. Вызывается под блокировкой, чтобы не затереть бан, записываемый в этот момент."""
+        version = self._file_version()
+        banned = set()
+        if version is not None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as file:
+                    banned = {int(user_id) for user_id in json.load(file)}
+            except (ValueError, TypeError) as e:
+                # Поврежденный файл не должен снимать текущие баны
+                log_error(f"Ошибка при чтении файла банов {self.path}: {e}")
+                return
+        self._banned = banned
+        self._version = version
+
+    def reload(self) -> None:
+        """Перечитывание файла банов."""
+        with self._lock:
+            self._load()
+
+    def reload_if_changed(self) -> bool:
+        """Перечитывание файла, если он изменился. Возвращает True при перезагрузке."""
+        with self._lock:
+            if self._file_version() == self._version:
+                return False
+            self._load()
+        log_info(f"Список банов перезагружен: {len(self._banned)} пользователей")
+        return True
+
+    def _write(self) -> None:
+        """Атомарная запись текущего списка банов. Вызывается под блокировкой."""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(sorted(self._banned), file, ensure_ascii=False, indent=4)
+        os.replace(tmp_path, self.path)
+        self._version = self._file_version()
+
+    def is_banned(self, user_id: int) -> bool:
+        """Проверка бана без обращения к диску."""
+        return user_id in self._banned
+
+    def ban(self, user_id: int) -> bool:
+        """Бан пользователя. False, если он уже забанен."""
+        with self._lock:
+            if user_id in self._banned:
+                return False
+            self._banned.add(user_id)
+            try:
+                self._write()
+            except OSError:
+                self._banned.discard(user_id)
+                raise
+        return True
+
+    def unban(self, user_id: int) -> bool:
+        """Разбан пользователя. False, если он не был забанен."""
+        with self._lock:
+            if user_id not in self._banned:
+                return False
+            self._banned.discard(user_id)
+            try:
+                self._write()
+            except OSError:
+                self._banned.add(user_id)
+                raise
+        return True
+
+    def __len__(self) -> int:
+        return len(self._banned)
+
+    async def watch(self, interval: float = 5.0) -> None:
+        """Фоновая проверка изменений файла банов."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.reload_if_changed)
+            except Exception as e:
+                log_error(f"Ошибка при перезагрузке файла банов: {e}")
@@ -0,0 +1,61 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class LRUCache:
+    """
+    Ограниченный кэш с вытеснением давно неиспользуемых записей (LRU).
+
+    Каждая запись хранится вместе с "версией" источника (например, mtime файла).
+    При чтении вызывающая сторона передает текущую версию, и если она не совпадает
+    с сохраненной, запись считается устаревшей. Так изменения, сделанные в обход
+    бота (ручная правка файла), подхватываются без перезапуска.
+
+    Кэш потокобезопасен: к нему обращаются потоки пула ввода-вывода.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Tuple[Any, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, version: Any) -> Optional[Any]:
+        """Получение значения из кэша. Возвращает None, если записи нет или она устарела."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, version: Any, value: Any) -> None:
+        """Сохранение значения в кэш с вытеснением самой старой записи."""
+        with self._lock:
+            self._data[key] = (version, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Удаление записи из кэша."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Полная очистка кэша."""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Статистика попаданий и промахов."""
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses
+        }
@@ -0,0 +1,295 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils.io_executor import IOExecutor
+from utils.table_versions import table_version, track_changes
+
+# Статусы сессии чата
+WAITING = "waiting"
+CONNECTED = "connected"
+CLOSED = "closed"
+
+
+class ChatSession:
+    """Сессия чата пользователя с администратором."""
+
+    __slots__ = ("user_id", "status", "admin_id", "admin_name", "topic_id",
+                 "notification_id", "created_at", "connected_at")
+
+    def __init__(self, user_id: int, status: str = WAITING, admin_id: Optional[int] = None,
+                 admin_name: Optional[str] = None, topic_id: Optional[int] = None,
+                 notification_id: Optional[int] = None, created_at: Optional[float] = None,
+                 connected_at: Optional[float] = None):
+        self.user_id = user_id
+        self.status = status
+        self.admin_id = admin_id
+        self.admin_name = admin_name
+        self.topic_id = topic_id
+        self.notification_id = notification_id
+        self.created_at = created_at if created_at is not None else time.time()
+        self.connected_at = connected_at
+
+    def copy(self) -> "ChatSession":
+        return ChatSession(self.user_id, self.status, self.admin_id, self.admin_name, self.topic_id,
+                           self.notification_id, self.created_at, self.connected_at)
+
+    def __repr__(self) -> str:
+        return f"ChatSession(user_id={self.user_id}, status={self.status}, admin={self.admin_name})"
+
+
+class ChatSessionStore:
+    """Хранение живых сессий чата в SQLite, чтобы их можно было восстановить после перезапуска."""
+
+    def __init__(self, db_path: str = "data/bot.db"):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS chat_sessions ("
+            "user_id INTEGER PRIMARY KEY, "
+            "status TEXT NOT NULL, "
+            "admin_id INTEGER, "
+            "admin_name TEXT, "
+            "topic_id INTEGER, "
+            "notification_id INTEGER, "
+            "created_at REAL NOT NULL, "
+            "connected_at REAL)"
+        )
+        track_changes(self._conn, "chat_sessions")
+
+    def save(self, session: ChatSession) -> None:
+        """Сохранение сессии."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO chat_sessions "
+                "(user_id, status, admin_id, admin_name, topic_id, notification_id, created_at, connected_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (session.user_id, session.status, session.admin_id, session.admin_name, session.topic_id,
+                 session.notification_id, session.created_at, session.connected_at)
+            )
+
+    def claim(self, session: ChatSession) -> bool:
+        """
+        Запись подключения, только если пользователь все еще ожидает.
+
+        Условие проверяется в базе, поэтому из двух процессов, одновременно
+        подключающих администраторов к одному пользователю, успеет один.
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE chat_sessions SET status = ?, admin_id = ?, admin_name = ?, topic_id = ?, connected_at = ? "
+                "WHERE user_id = ? AND status = ?",
+                (session.status, session.admin_id, session.admin_name, session.topic_id, session.connected_at,
+                 session.user_id, WAITING)
+            )
+        return cursor.rowcount == 1
+
+    def version(self) -> int:
+        """Версия таблицы сессий (растет при любом изменении из любого процесса)."""
+        with self._lock:
+            return table_version(self._conn, "chat_sessions")
+
+    def delete(self, user_id: int) -> None:
+        """Удаление закрытой сессии."""
+        with self._lock:
+            self._conn.execute("DELETE FROM chat_sessions WHERE user_id = ?", (user_id,))
+
+    def load_all(self) -> List[ChatSession]:
+        """Все живые сессии."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT user_id, status, admin_id, admin_name, topic_id, notification_id, created_at, connected_at "
+                "FROM chat_sessions ORDER BY created_at"
+            ).fetchall()
+        return [ChatSession(*row) for row in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class ChatSessionRegistry:
+    """
+    Реестр сессий чата с индексами по пользователю, администратору и топику.
+
+    Переходы waiting -> connected -> closed обновляют все индексы до первого
+    await, поэтому реестр всегда согласован. Если задан store, каждое
+    изменение записывается в базу в пуле ввода-вывода; записи выполняются
+    строго в порядке изменений. Если базу используют несколько процессов,
+    refresh перечитывает сессии, измененные другими процессами: индексы
+    строятся в пуле ввода-вывода и подменяются целиком.
+    """
+
+    def __init__(self, store: Optional[ChatSessionStore] = None, executor: Optional[IOExecutor] = None):
+        self.store = store
+        self.executor = executor
+        self._by_user: Dict[int, ChatSession] = {}
+        self._by_admin: Dict[int, ChatSession] = {}
+        self._by_topic: Dict[int, ChatSession] = {}
+        self._version = None
+        # Очередность записей: asyncio.Lock пропускает ожидающих по порядку
+        self._write_lock = asyncio.Lock()
+        # Записи, которые уже изменили реестр, но еще не дошли до базы, и всего начатых записей
+        self._pending_writes = 0
+        self._writes = 0
+
+    async def _run(self, func: Callable[..., Any], *args) -> Any:
+        if self.executor is None:
+            return func(*args)
+        return await self.executor.run(func, *args)
+
+    async def _write(self, func: Callable[..., Any], *args) -> Any:
+        """Запись в базу в пуле ввода-вывода после всех ранее начатых записей."""
+        self._pending_writes += 1
+        self._writes += 1
+        try:
+            async with self._write_lock:
+                if self.executor is None:
+                    return func(*args)
+                return await self.executor.run(func, *args)
+        finally:
+            self._pending_writes -= 1
+
+    async def _persist(self, session: ChatSession) -> None:
+        if self.store is not None:
+            await self._write(self.store.save, session.copy())
+
+    def _read(self) -> Tuple[int, Dict[int, ChatSession], Dict[int, ChatSession], Dict[int, ChatSession]]:
+        """Версия таблицы и индексы по пользователю, администратору и топику, построенные по базе."""
+        by_user, by_admin, by_topic = {}, {}, {}
+        version = self.store.version()
+        for session in self.store.load_all():
+            by_user[session.user_id] = session
+            if session.status == CONNECTED:
+                by_admin[session.admin_id] = session
+                by_topic[session.topic_id] = session
+        return version, by_user, by_admin, by_topic
+
+    def load(self) -> int:
+        """Восстановление живых сессий из базы. Возвращает количество сессий."""
+        if self.store is None:
+            self._by_user, self._by_admin, self._by_topic = {}, {}, {}
+            return 0
+        self._version, self._by_user, self._by_admin, self._by_topic = self._read()
+        return len(self._by_user)
+
+    async def refresh(self, version: Optional[int] = None) -> bool:
+        """
+        Перечитывание сессий, если таблицу изменили. True, если сессии перечитаны.
+
+        version - уже прочитанная версия таблицы. Чтение и построение
+        индексов идут в пуле ввода-вывода. Пока собственные записи не дошли
+        до базы, или если реестр изменился за время чтения, в базе (или в
+        прочитанном) нет изменений, которые уже есть в реестре: перечитывание
+        откладывается до следующего вызова.
+        """
+        if self.store is None or self._pending_writes:
+            return False
+        if version is None:
+            version = await self._run(self.store.version)
+        if version == self._version or self._pending_writes:
+            return False
+        writes = self._writes
+        snapshot = await self._run(self._read)
+        if self._pending_writes or self._writes != writes:
+            return False
+        self._version, self._by_user, self._by_admin, self._by_topic = snapshot
+        return True
+
+    async def start_waiting(self, user_id: int) -> Optional[ChatSession]:
+        """Новая сессия в ожидании администратора. None, если у пользователя уже есть сессия."""
+        if user_id in self._by_user:
+            return None
+        session = ChatSession(user_id)
+        self._by_user[user_id] = session
+        await self._persist(session)
+        return session
+
+    async def set_notification(self, user_id: int, message_id: int) -> None:
+        """Запоминание ID уведомления в топике администраторов."""
+        session = self._by_user.get(user_id)
+        if session is not None:
+            session.notification_id = message_id
+            await self._persist(session)
+
+    async def connect(self, user_id: int, admin_id: int, admin_name: str, topic_id: int) -> Optional[ChatSession]:
+        """
+        Подключение администратора к ожидающему пользователю.
+
+        None, если пользователь не ожидает или администратор уже в другом чате.
+        Подключение сразу видно в реестре; если в базе пользователя уже
+        подключил другой процесс, оно отменяется.
+        """
+        session = self._by_user.get(user_id)
+        if session is None or session.status != WAITING or admin_id in self._by_admin:
+            return None
+        session.status = CONNECTED
+        session.admin_id = admin_id
+        session.admin_name = admin_name
+        session.topic_id = topic_id
+        session.connected_at = time.time()
+        self._by_admin[admin_id] = session
+        self._by_topic[topic_id] = session
+        if self.store is not None and not await self._write(self.store.claim, session.copy()):
+            # Пользователя уже подключил другой процесс
+            if self._by_admin.get(admin_id) is session:
+                del self._by_admin[admin_id]
+            if self._by_topic.get(topic_id) is session:
+                del self._by_topic[topic_id]
+            if session.status == CONNECTED:
+                session.status = WAITING
+                session.admin_id = session.admin_name = session.topic_id = session.connected_at = None
+            return None
+        return session
+
+    async def close(self, user_id: int) -> Optional[ChatSession]:
+        """Закрытие сессии пользователя. Возвращает закрытую сессию или None."""
+        session = self._by_user.pop(user_id, None)
+        if session is None:
+            return None
+        if session.status == CONNECTED:
+            self._by_admin.pop(session.admin_id, None)
+            self._by_topic.pop(session.topic_id, None)
+        session.status = CLOSED
+        if self.store is not None:
+            await self._write(self.store.delete, user_id)
+        return session
+
+    def by_user(self, user_id: int) -> Optional[ChatSession]:
+        return self._by_user.get(user_id)
+
+    def by_admin(self, admin_id: int) -> Optional[ChatSession]:
+        return self._by_admin.get(admin_id)
+
+    def by_topic(self, topic_id: int) -> Optional[ChatSession]:
+        return self._by_topic.get(topic_id)
+
+    def is_waiting(self, user_id: int) -> bool:
+        session = self._by_user.get(user_id)
+        return session is not None and session.status == WAITING
+
+    def is_connected(self, user_id: int) -> bool:
+        session = self._by_user.get(user_id)
+        return session is not None and session.status == CONNECTED
+
+    def waiting(self) -> List[ChatSession]:
+        """Пользователи, ожидающие администратора."""
+        return [session for session in self._by_user.values() if session.status == WAITING]
+
+    def connected(self) -> List[ChatSession]:
+        """Активные чаты."""
+        return list(self._by_admin.values())
+
+    def counts(self) -> Dict[str, int]:
+        """Количество активных чатов и ожидающих пользователей."""
+        connected = len(self._by_admin)
+        return {"connected": connected, "waiting": len(self._by_user) - connected}
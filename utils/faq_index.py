@@ -0,0 +1,236 @@
+import asyncio
+import glob
+import json
+import os
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional, Tuple
+
+from config import FAQ_PAGE_SIZE
+from utils.faq_search import FAQSearchIndex
+from utils.logger import log_info, log_error
+from utils.messages import MESSAGES, get_message
+
+# Максимальная длина сообщения Telegram
+MESSAGE_LIMIT = 4096
+# Запас под номер страницы и разметку
+PAGE_RESERVE = 32
+
+# Подписи в ответе на выбранный вопрос
+QUESTION_LABELS = {
+    "ru": "Вопрос",
+    "kz": "Сұрақ",
+    "en": "Question"
+}
+
+ANSWER_LABELS = {
+    "ru": "Ответ",
+    "kz": "Жауап",
+    "en": "Answer"
+}
+
+
+class FAQSnapshot(NamedTuple):
+    """
+    Неизменяемый снимок FAQ одного языка.
+
+    Ответы и поисковый индекс подготавливаются сразу, а страницы списка
+    вопросов формируются при первом запросе и кэшируются в page_cache.
+    """
+    language: str
+    entries: Mapping[str, Mapping[str, str]]
+    pages: Tuple[Tuple[str, ...], ...]
+    answers: Mapping[str, str]
+    search: FAQSearchIndex
+    page_cache: Dict[int, str]
+
+    @property
+    def total_pages(self) -> int:
+        """Количество страниц списка вопросов."""
+        return len(self.pages)
+
+    def page_text(self, page: int) -> str:
+        """Текст страницы списка вопросов (номер страницы с нуля)."""
+        text = self.page_cache.get(page)
+        if text is None:
+            text = render_faq_page(self, page)
+            self.page_cache[page] = text
+        return text
+
+
+def _page_header(language: str) -> str:
+    return f"<b>{get_message('faq_title', language)}</b>\n\n"
+
+
+def _page_footer(language: str) -> str:
+    return f"\n{get_message('faq_question_prompt', language)}"
+
+
+def _question_line(q_id: str, q_data: Mapping[str, str]) -> str:
+    return f"{q_id}. {q_data['question']}\n\n"
+
+
+def paginate_faq(entries: Mapping[str, Mapping[str, str]], language: str, page_size: int) -> Tuple[Tuple[str, ...], ...]:
+    """
+    Разбиение вопросов на страницы.
+
+    На страницу попадает не больше page_size вопросов и не больше, чем
+    помещается в одно сообщение вместе с заголовком и подсказкой.
+    """
+    budget = MESSAGE_LIMIT - PAGE_RESERVE - len(_page_header(language)) - len(_page_footer(language))
+    pages = []
+    current = []
+    used = 0
+    for q_id, q_data in entries.items():
+        line_length = len(_question_line(q_id, q_data))
+        if current and (used + line_length > budget or len(current) >= page_size):
+            pages.append(tuple(current))
+            current = []
+            used = 0
+        current.append(q_id)
+        used += line_length
+    if current or not pages:
+        pages.append(tuple(current))
+    return tuple(pages)
+
+
+def render_faq_page(snapshot: FAQSnapshot, page: int) -> str:
+    """Формирование текста страницы со списком вопросов."""
+    language = snapshot.language
+    header = _page_header(language)
+    footer = _page_footer(language)
+    budget = MESSAGE_LIMIT - PAGE_RESERVE - len(header) - len(footer)
+
+    faq_list = header
+    for q_id in snapshot.pages[page]:
+        line = _question_line(q_id, snapshot.entries[q_id])
+        if len(line) > budget:
+            # Слишком длинный вопрос обрезаем, чтобы страница поместилась в сообщение
+            line = line[:budget - 3] + "…\n\n"
+        faq_list += line
+
+    if snapshot.total_pages > 1:
+        faq_list += f"📄 {page + 1}/{snapshot.total_pages}\n"
+
+    faq_list += footer
+    return faq_list
+
+
+def render_faq_answer(question_id: str, q_data: Mapping[str, str], language: str) -> str:
+    """Формирование текста ответа на выбранный вопрос."""
+    q_text = QUESTION_LABELS.get(language, QUESTION_LABELS["ru"])
+    a_text = ANSWER_LABELS.get(language, ANSWER_LABELS["ru"])
+    return f"<b>{q_text} {question_id}:</b>\n{q_data['question']}\n\n<b>{a_text}:</b>\n{q_data['answer']}"
+
+
+def build_snapshot(faq_data: Dict[str, Any], language: str, page_size: int = FAQ_PAGE_SIZE) -> FAQSnapshot:
+    """Построение снимка FAQ для языка."""
+    entries = MappingProxyType({
+        q_id: MappingProxyType(dict(q_data)) for q_id, q_data in faq_data.items()
+    })
+    answers = MappingProxyType({
+        q_id: render_faq_answer(q_id, q_data, language) for q_id, q_data in entries.items()
+    })
+    pages = paginate_faq(entries, language, page_size)
+    search = FAQSearchIndex(entries, language)
+    return FAQSnapshot(language, entries, pages, answers, search, {})
+
+
+class FAQIndex:
+    """
+    Индекс FAQ по всем языкам из faq/faq_*.json.
+
+    Строится один раз при запуске; при изменении файлов перестраивается целиком
+    и подменяется одной операцией присваивания, поэтому обработчики всегда видят
+    согласованный снимок.
+    """
+
+    def __init__(self, directory: str = "faq"):
+        self.directory = directory
+        self._snapshots: Dict[str, FAQSnapshot] = {}
+        self._versions: Dict[str, Tuple[int, int]] = {}
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        """mtime и размер всех файлов FAQ."""
+        versions = {}
+        for path in glob.glob(os.path.join(self.directory, "faq_*.json")):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            versions[path] = (stat.st_mtime_ns, stat.st_size)
+        return versions
+
+    def _language_of(self, path: str) -> str:
+        return os.path.splitext(os.path.basename(path))[0][len("faq_"):]
+
+    def build(self) -> None:
+        """Полное построение индекса."""
+        versions = self._scan()
+        raw: Dict[str, Dict[str, Any]] = {}
+        for path in versions:
+            language = self._language_of(path)
+            try:
+                with open(path, 'r', encoding='utf-8') as file:
+                    raw[language] = json.load(file)
+            except (OSError, json.JSONDecodeError) as e:
+                log_error(f"Ошибка при чтении FAQ файла {path}: {e}")
+                # Оставляем предыдущую версию языка, если она была
+                if language in self._snapshots:
+                    raw[language] = {q_id: dict(q) for q_id, q in self._snapshots[language].entries.items()}
+
+        snapshots = {}
+        for language in set(raw) | set(MESSAGES):
+            # Если файла для языка нет, используем русский как запасной вариант
+            faq_data = raw[language] if language in raw else raw.get("ru", {})
+            snapshots[language] = build_snapshot(faq_data, language)
+
+        self._snapshots = snapshots
+        self._versions = versions
+
+    def rebuild_if_changed(self) -> bool:
+        """Перестроение индекса при изменении файлов. Возвращает True при перестроении."""
+        if self._scan() == self._versions:
+            return False
+        self.build()
+        log_info("Индекс FAQ перестроен")
+        return True
+
+    def get(self, language: str = "ru") -> FAQSnapshot:
+        """Снимок FAQ для языка."""
+        if not self._snapshots:
+            self.build()
+        snapshot = self._snapshots.get(language)
+        if snapshot is None:
+            snapshot = self._snapshots["ru"]
+        return snapshot
+
+    def get_page(self, language: str, page: int = 0) -> Tuple[str, int, int]:
+        """Текст страницы списка, фактический номер страницы и количество страниц."""
+        snapshot = self.get(language)
+        page = min(max(page, 0), snapshot.total_pages - 1)
+        return snapshot.page_text(page), page, snapshot.total_pages
+
+    def get_answer(self, language: str, question_id: str) -> Optional[str]:
+        """Готовый текст ответа на вопрос или None, если вопроса нет."""
+        return self.get(language).answers.get(question_id)
+
+    def search(self, language: str, text: str, limit: int = 5) -> List[Tuple[str, str, float]]:
+        """Полнотекстовый поиск по FAQ. Возвращает [(ID, текст вопроса, оценка)]."""
+        snapshot = self.get(language)
+        return [
+            (q_id, snapshot.entries[q_id]["question"], score)
+            for q_id, score in snapshot.search.search(text, limit)
+        ]
+
+    async def watch(self, interval: float = 5.0) -> None:
+        """Фоновая проверка изменений файлов FAQ."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.rebuild_if_changed)
+            except Exception as e:
+                log_error(f"Ошибка при перестроении индекса FAQ: {e}")
+
+
+# Общий индекс FAQ
+faq_index = FAQIndex("faq")
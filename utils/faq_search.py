@@ -0,0 +1,200 @@
+import functools
+import heapq
+import math
+import re
+from typing import Dict, List, Mapping, Tuple
+
+# Слова из букв любого алфавита (кириллица, казахские буквы, латиница) или числа
+TOKEN_PATTERN = re.compile(r"[^\W\d_]+|\d+")
+
+# Окончания для упрощенного стемминга, от длинных к коротким
+RU_SUFFIXES = sorted([
+    "иями", "ями", "ами", "иях", "ях", "ах", "ием", "ем", "ом", "ией", "ей", "ой", "ий", "ый",
+    "ого", "его", "ому", "ему", "ыми", "ими", "ых", "их", "ая", "яя", "ое", "ее", "ые", "ие",
+    "ую", "юю", "ов", "ев", "ия", "ию", "ья", "ье", "ью", "ость", "ости", "ать", "ять",
+    "ить", "еть", "ешь", "ете", "ет", "ут", "ют", "ит", "ат", "ят", "ил", "ла", "ли", "ло",
+    "а", "я", "о", "е", "ы", "и", "у", "ю", "ь", "й", "ся", "сь"
+], key=len, reverse=True)
+
+KZ_SUFFIXES = sorted([
+    # Множественное число
+    "лар", "лер", "дар", "дер", "тар", "тер",
+    # Падежи
+    "ның", "нің", "дың", "дің", "тың", "тің",
+    "ға", "ге", "қа", "ке", "на", "не",
+    "да", "де", "та", "те", "нда", "нде",
+    "дан", "ден", "тан", "тен", "нан", "нен",
+    "ды", "ді", "ты", "ті", "ны", "ні",
+    "мен", "бен", "пен",
+    # Притяжательные окончания
+    "ымыз", "іміз", "мыз", "міз", "ыңыз", "іңіз", "ңыз", "ңіз",
+    "сы", "сі", "ым", "ім", "ың", "ің", "ы", "і",
+    # Словообразовательные и глагольные
+    "шы", "ші", "лық", "лік", "дық", "дік", "тық", "тік", "у"
+], key=len, reverse=True)
+
+EN_SUFFIXES = sorted(["ing", "ed", "es", "s", "ly"], key=len, reverse=True)
+
+SUFFIXES = {
+    "ru": RU_SUFFIXES,
+    "kz": KZ_SUFFIXES,
+    "en": EN_SUFFIXES
+}
+
+# Служебные слова, которые не индексируются
+STOP_WORDS = {
+    "ru": {"и", "в", "во", "на", "с", "со", "по", "к", "ко", "о", "об", "от", "до", "за", "из", "у",
+           "для", "не", "ли", "же", "а", "но", "или", "что", "как", "это", "то", "я", "мне", "мой"},
+    "kz": {"және", "мен", "бен", "пен", "үшін", "туралы", "бұл", "ол", "да", "де", "та", "те",
+           "ма", "ме", "ба", "бе", "па", "пе", "не", "қалай"},
+    "en": {"a", "an", "the", "and", "or", "of", "to", "in", "on", "for", "is", "are", "do", "does",
+           "how", "what", "i", "my", "can", "it"}
+}
+
+# Сколько раз снимать окончания (в русском - возвратная частица и окончание,
+# в казахском окончания идут цепочкой)
+STEM_PASSES = {
+    "ru": 2,
+    "kz": 2,
+    "en": 1
+}
+
+# Минимальная длина основы после отсечения окончания
+MIN_STEM_LENGTH = 3
+
+# Слова вопроса весят больше, чем слова ответа
+QUESTION_WEIGHT = 2.0
+
+
+def tokenize(text: str) -> List[str]:
+    """Разбиение текста на слова в нижнем регистре."""
+    return TOKEN_PATTERN.findall(text.lower().replace("ё", "е"))
+
+
+@functools.lru_cache(maxsize=65536)
+def stem(word: str, language: str = "ru") -> str:
+    """Упрощенный стемминг отсечением окончаний."""
+    suffixes = SUFFIXES.get(language, RU_SUFFIXES)
+    for _ in range(STEM_PASSES.get(language, 1)):
+        for suffix in suffixes:
+            if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM_LENGTH:
+                word = word[:-len(suffix)]
+                break
+        else:
+            break
+    return word
+
+
+def analyze(text: str, language: str = "ru") -> List[str]:
+    """Токенизация, удаление служебных слов и стемминг текста."""
+    stop_words = STOP_WORDS.get(language, STOP_WORDS["ru"])
+    return [stem(token, language) for token in tokenize(text) if token not in stop_words]
+
+
+class FAQSearchIndex:
+    """
+    Инвертированный индекс по вопросам и ответам FAQ одного языка.
+
+    Для каждого терма хранится словарь {ID вопроса: вес TF-IDF} и тот же
+    список, упорядоченный по убыванию веса, а векторы документов
+    нормированы, поэтому сумма весов совпавших термов дает косинусное
+    сходство запроса с вопросом.
+    """
+
+    def __init__(self, entries: Mapping[str, Mapping[str, str]], language: str = "ru"):
+        self.language = language
+        self.postings: Dict[str, Dict[str, float]] = {}
+        self.ranked: Dict[str, List[Tuple[float, str]]] = {}
+
+        term_frequencies: Dict[str, Dict[str, float]] = {}
+        document_frequency: Dict[str, int] = {}
+        for q_id, q_data in entries.items():
+            frequencies: Dict[str, float] = {}
+            for term in analyze(q_data.get("question", ""), language):
+                frequencies[term] = frequencies.get(term, 0.0) + QUESTION_WEIGHT
+            for term in analyze(q_data.get("answer", ""), language):
+                frequencies[term] = frequencies.get(term, 0.0) + 1.0
+            term_frequencies[q_id] = frequencies
+            for term in frequencies:
+                document_frequency[term] = document_frequency.get(term, 0) + 1
+
+        total = len(term_frequencies)
+        # Вес слова, которого нет в индексе: оно уменьшает сходство запроса с любым вопросом
+        self.unknown_idf = math.log(1 + total) + 1.0
+        self.idf = {
+            term: math.log((1 + total) / (1 + count)) + 1.0
+            for term, count in document_frequency.items()
+        }
+
+        for q_id, frequencies in term_frequencies.items():
+            weights = {term: (1.0 + math.log(tf)) * self.idf[term] for term, tf in frequencies.items()}
+            norm = math.sqrt(sum(weight * weight for weight in weights.values())) or 1.0
+            for term, weight in weights.items():
+                self.postings.setdefault(term, {})[q_id] = weight / norm
+        self.ranked = {
+            term: sorted(((weight, q_id) for q_id, weight in postings.items()), reverse=True)
+            for term, postings in self.postings.items()
+        }
+
+    def query_vector(self, text: str) -> Dict[str, float]:
+        """
+        Нормированный TF-IDF вектор запроса.
+
+        Неизвестные индексу слова участвуют в норме, но в вектор не попадают.
+        """
+        frequencies: Dict[str, int] = {}
+        for term in analyze(text, self.language):
+            frequencies[term] = frequencies.get(term, 0) + 1
+        weights = {
+            term: (1.0 + math.log(tf)) * self.idf.get(term, self.unknown_idf)
+            for term, tf in frequencies.items()
+        }
+        norm = math.sqrt(sum(weight * weight for weight in weights.values())) or 1.0
+        return {term: weight / norm for term, weight in weights.items() if term in self.idf}
+
+    def search(self, text: str, limit: int = 5) -> List[Tuple[str, float]]:
+        """
+        Поиск вопросов, наиболее похожих на запрос. Возвращает [(ID, оценка)].
+
+        Списки термов запроса читаются параллельно от больших весов к меньшим
+        (пороговый алгоритм Фейгина); для каждого нового вопроса оценка
+        считается сразу по всем термам. Вопрос, еще не встреченный ни в одном
+        списке, не может набрать больше суммы весов на текущей глубине, поэтому
+        когда limit-я лучшая оценка достигает этой суммы, обход прекращается.
+        Результат тот же, что при полном обходе, но длинные списки частых
+        слов читаются только до нужной глубины.
+        """
+        terms = [(query_weight, self.ranked[term], self.postings[term].get)
+                 for term, query_weight in self.query_vector(text).items()]
+        seen = set()
+        top: List[Tuple[float, str]] = []
+        depth = 0
+        while True:
+            threshold = 0.0
+            exhausted = True
+            for query_weight, ranked, _ in terms:
+                if depth >= len(ranked):
+                    continue
+                exhausted = False
+                weight, q_id = ranked[depth]
+                threshold += query_weight * weight
+                if q_id in seen:
+                    continue
+                seen.add(q_id)
+                score = 0.0
+                for other_weight, _, get_weight in terms:
+                    doc_weight = get_weight(q_id)
+                    if doc_weight is not None:
+                        score += other_weight * doc_weight
+                if len(top) < limit:
+                    heapq.heappush(top, (score, q_id))
+                elif score > top[0][0]:
+                    heapq.heapreplace(top, (score, q_id))
+            if exhausted or (len(top) >= limit and top[0][0] >= threshold):
+                break
+            depth += 1
+        return [(q_id, score) for score, q_id in sorted(top, reverse=True)]
+
+    def __len__(self) -> int:
+        return len(self.postings)
+
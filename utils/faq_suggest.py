@@ -0,0 +1,67 @@
+import time
+from typing import Dict, Optional, Tuple
+
+from config import FAQ_SUGGEST_THRESHOLD
+from utils.faq_index import FAQIndex, faq_index
+from utils.logger import log_debug
+
+
+class FAQSuggester:
+    """
+    Подбор ответа из FAQ для вопроса до отправки его администраторам.
+
+    Использует TF-IDF индекс FAQ (косинусное сходство) и ведет статистику:
+    время подбора, сколько раз ответ был предложен и сколько раз он подошел.
+    """
+
+    def __init__(self, index: FAQIndex, threshold: float = 0.5):
+        self.index = index
+        self.threshold = threshold
+        self.matches = 0
+        self.suggested = 0
+        self.accepted = 0
+        self.declined = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def suggest(self, language: str, text: str) -> Optional[Tuple[str, float]]:
+        """Лучший вопрос FAQ и его оценка, если оценка не ниже порога."""
+        started = time.perf_counter()
+        results = self.index.get(language).search.search(text, 1)
+        latency = time.perf_counter() - started
+
+        self.matches += 1
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+
+        if not results:
+            return None
+        question_id, score = results[0]
+        log_debug("FAQ match for question: #%s score=%.3f latency=%.3fms", question_id, score, latency * 1000)
+        if score < self.threshold:
+            return None
+        self.suggested += 1
+        return question_id, score
+
+    def record_outcome(self, accepted: bool) -> None:
+        """Учет того, подошел ли пользователю предложенный ответ."""
+        if accepted:
+            self.accepted += 1
+        else:
+            self.declined += 1
+
+    def stats(self) -> Dict[str, float]:
+        """Статистика подбора ответов."""
+        return {
+            "threshold": self.threshold,
+            "matches": self.matches,
+            "suggested": self.suggested,
+            "accepted": self.accepted,
+            "declined": self.declined,
+            "avg_latency_ms": self.total_latency / self.matches * 1000 if self.matches else 0.0,
+            "max_latency_ms": self.max_latency * 1000
+        }
+
+
+# Общий экземпляр для обработчиков вопросов
+faq_suggester = FAQSuggester(faq_index, FAQ_SUGGEST_THRESHOLD)
@@ -1,71 +1,104 @@
 import json
+import logging
 import os
 from typing import Dict, Any
 
+from config import USER_CACHE_SIZE, USER_STORE_BACKEND, DATABASE_PATH, IO_WORKERS
+from utils.bans import BanRegistry
+from utils.cache import LRUCache
+from utils.io_executor import IOExecutor
+from utils.logger import get_debug_logger, log_error
+from utils.user_store import create_user_store
+
+# Хранилище пользовательских данных (json или sqlite, см. USER_STORE_BACKEND)
+user_store = create_user_store(USER_STORE_BACKEND, db_path=DATABASE_PATH)
+# Кэш пользовательских данных: {user_id: (версия записи, данные)}
+user_cache = LRUCache(maxsize=USER_CACHE_SIZE)
+# Реестр забаненных пользователей (в памяти, с перезагрузкой banned.json)
+ban_registry = BanRegistry("banned.json")
+# Пул потоков для асинхронных вариантов функций
+io_executor = IOExecutor(max_workers=IO_WORKERS)
+# Отладочный канал модуля (включается через LOG_DEBUG_MODULES или /debug)
+debug_log = get_debug_logger("file_operations")
+
 
 def get_user_data_path(user_id: int) -> str:
     """Получение пути к файлу пользовательских данных."""
     return f"data/{user_id}.json"
 
 
+def _read_user_record(user_id: int) -> Dict[str, Any]:
+    """Получение записи пользователя через кэш. Возвращаемый словарь нельзя изменять."""
+    version = user_store.version(user_id)
+
+    user_data = user_cache.get(user_id, version)
+    if user_data is not None:
+        return user_data
+
+    user_data = user_store.load(user_id) or {}
+    user_cache.set(user_id, version, user_data)
+    return user_data
+
+
 def is_user_registered(user_id: int) -> bool:
     """Проверка на зарегистрирован ли уже пользователь."""
-    file_path = get_user_data_path(user_id)
-    
-    print(f"DEBUG: Checking registration for user {user_id}, path: {file_path}")
-    
-    # Проверяем, существует ли файл
-    if not os.path.exists(file_path):
-        print(f"DEBUG: File doesn't exist for user {user_id}")
-        return False
+    debug_log.debug("Checking registration for user %s", user_id)
     
     try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            user_data = json.load(file)
-            print(f"DEBUG: User data keys: {list(user_data.keys())}")
-            
-            # Проверяем наличие всех необходимых полей регистрации
-            has_registration = ("full_name" in user_data and 
-                                "course" in user_data and 
-                                "faculty" in user_data)
-            
-            print(f"DEBUG: User {user_id} has registration data: {has_registration}")
-            return has_registration
+        user_data = _read_user_record(user_id)
     except Exception as e:
-        print(f"DEBUG: Error reading user data: {e}")
+        debug_log.debug("Error reading user data: %s", e)
+        return False
+
+    if not user_data:
+        debug_log.debug("No data for user %s", user_id)
         return False
 
+    if debug_log.isEnabledFor(logging.DEBUG):
+        debug_log.debug("User data keys: %s", list(user_data.keys()))
+    
+    # Проверяем наличие всех необходимых полей регистрации
+    has_registration = ("full_name" in user_data and 
+                        "course" in user_data and 
+                        "faculty" in user_data)
+    
+    debug_log.debug("User %s has registration data: %s", user_id, has_registration)
+    return has_registration
+
 
 def load_user_data(user_id: int) -> Dict[str, Any]:
-    """Загрузка пользовательских данных из файла JSON."""
-    file_path = get_user_data_path(user_id)
-    if os.path.exists(file_path):
-        with open(file_path, 'r', encoding='utf-8') as file:
-            return json.load(file)
-    return {}
+    """Загрузка пользовательских данных из хранилища."""
+    # Возвращаем копию, чтобы изменения вызывающей стороны не попадали в кэш
+    return dict(_read_user_record(user_id))
 
 
 def save_user_data(user_id: int, data: Dict[str, Any]) -> None:
-    """Сохранение пользовательских данных в файл JSON."""
-    os.makedirs("data", exist_ok=True)
-    with open(get_user_data_path(user_id), 'w', encoding='utf-8') as file:
-        json.dump(data, file, ensure_ascii=False, indent=4)
+    """Сохранение пользовательских данных в хранилище."""
+    user_store.save(user_id, data)
+
+    # Обновляем кэш сразу после записи (write-through)
+    user_cache.set(user_id, user_store.version(user_id), dict(data))
 
 
 def get_user_language(user_id: int) -> str:
     """Получение языка пользователя. По умолчанию - русский."""
-    user_data = load_user_data(user_id)
+    user_data = _read_user_record(user_id)
     return user_data.get("language", "ru")
 
 
 def set_user_language(user_id: int, language: str) -> None:
     """Сохранение выбранного языка пользователя."""
-    print(f"DEBUG: Setting language {language} for user {user_id}")
+    debug_log.debug("Setting language %s for user %s", language, user_id)
     user_data = load_user_data(user_id)
-    print(f"DEBUG: Current user data before language set: {user_data}")
+    debug_log.debug("Current user data before language set: %s", user_data)
     user_data["language"] = language
     save_user_data(user_id, user_data)
-    print(f"DEBUG: Saved user data with language: {user_data}")
+    debug_log.debug("Saved user data with language: %s", user_data)
+
+
+def get_user_cache_stats() -> Dict[str, int]:
+    """Статистика кэша пользовательских данных (попадания/промахи)."""
+    return user_cache.stats()
 
 
 def load_faq(language: str = "ru") -> Dict[str, Any]:
@@ -79,7 +112,7 @@ def load_faq(language: str = "ru") -> Dict[str, Any]:
                 return json.load(file)
         except json.JSONDecodeError:
             # Если файл поврежден или имеет неверный формат, логируем ошибку
-            print(f"Ошибка при чтении FAQ файла {faq_path}")
+            log_error(f"Ошибка при чтении FAQ файла {faq_path}")
     
     # Только если файла нет или была ошибка чтения, используем русский как запасной вариант
     if language != "ru":
@@ -89,7 +122,7 @@ def load_faq(language: str = "ru") -> Dict[str, Any]:
                 with open(ru_faq_path, 'r', encoding='utf-8') as file:
                     return json.load(file)
             except json.JSONDecodeError:
-                print(f"Ошибка при чтении FAQ файла {ru_faq_path}")
+                log_error(f"Ошибка при чтении FAQ файла {ru_faq_path}")
     
     # Если ни одного файла нет или все поврежденны, возвращаем пустой словарь
     return {}
@@ -97,56 +130,79 @@ def load_faq(language: str = "ru") -> Dict[str, Any]:
 
 def is_user_banned(user_id: int) -> bool:
     """Проверка, забанен ли пользователь."""
-    try:
-        if os.path.exists("banned.json"):
-            with open("banned.json", 'r', encoding='utf-8') as file:
-                banned_ids = json.load(file)
-                return user_id in banned_ids
-        return False
-    except Exception as e:
-        print(f"Ошибка при проверке бана пользователя: {e}")
-        return False
+    return ban_registry.is_banned(user_id)
 
 
 def ban_user(user_id: int) -> bool:
     """Забанить пользователя, добавив его ID в banned.json."""
     try:
-        banned_ids = []
-        if os.path.exists("banned.json"):
-            with open("banned.json", 'r', encoding='utf-8') as file:
-                banned_ids = json.load(file)
-        
-        if user_id not in banned_ids:
-            banned_ids.append(user_id)
-            with open("banned.json", 'w', encoding='utf-8') as file:
-                json.dump(banned_ids, file, ensure_ascii=False, indent=4)
-            return True
-        return False  # Пользователь уже забанен
+        return ban_registry.ban(user_id)
     except Exception as e:
-        print(f"Ошибка при бане пользователя: {e}")
+        log_error(f"Ошибка при бане пользователя: {e}")
         return False
 
 
 def unban_user(user_id: int) -> bool:
     """Разбанить пользователя, удалив его ID из banned.json."""
     try:
-        if not os.path.exists("banned.json"):
-            return False  # Файл бана не существует
-        
-        with open("banned.json", 'r', encoding='utf-8') as file:
-            banned_ids = json.load(file)
-        
-        if user_id in banned_ids:
-            banned_ids.remove(user_id)
-            with open("banned.json", 'w', encoding='utf-8') as file:
-                json.dump(banned_ids, file, ensure_ascii=False, indent=4)
-            return True
-        return False  # Пользователь не был забанен
+        return ban_registry.unban(user_id)
     except Exception as e:
-        print(f"Ошибка при разбане пользователя: {e}")
+        log_error(f"Ошибка при разбане пользователя: {e}")
         return False
 
 
+# Асинхронные варианты для обработчиков: дисковые операции выполняются в пуле потоков,
+# чтобы медленный диск не блокировал цикл событий
+async def is_user_registered_async(user_id: int) -> bool:
+    """Асинхронный вариант is_user_registered."""
+    return await io_executor.run(is_user_registered, user_id)
+
+
+async def load_user_data_async(user_id: int) -> Dict[str, Any]:
+    """Асинхронный вариант load_user_data."""
+    return await io_executor.run(load_user_data, user_id)
+
+
+async def save_user_data_async(user_id: int, data: Dict[str, Any]) -> None:
+    """Асинхронный вариант save_user_data."""
+    await io_executor.run(save_user_data, user_id, data)
+
+
+async def get_user_language_async(user_id: int) -> str:
+    """Асинхронный вариант get_user_language."""
+    return await io_executor.run(get_user_language, user_id)
+
+
+async def set_user_language_async(user_id: int, language: str) -> None:
+    """Асинхронный вариант set_user_language."""
+    await io_executor.run(set_user_language, user_id, language)
+
+
+async def load_faq_async(language: str = "ru") -> Dict[str, Any]:
+    """Асинхронный вариант load_faq."""
+    return await io_executor.run(load_faq, language)
+
+
+async def is_user_banned_async(user_id: int) -> bool:
+    """Асинхронный вариант is_user_banned (проверка идет по памяти, пул не нужен)."""
+    return is_user_banned(user_id)
+
+
+async def ban_user_async(user_id: int) -> bool:
+    """Асинхронный вариант ban_user."""
+    return await io_executor.run(ban_user, user_id)
+
+
+async def unban_user_async(user_id: int) -> bool:
+    """Асинхронный вариант unban_user."""
+    return await io_executor.run(unban_user, user_id)
+
+
+def get_io_stats() -> Dict[str, int]:
+    """Статистика пула ввода-вывода (в т.ч. глубина очереди)."""
+    return io_executor.stats()
+
+
 async def setup_sample_faq():
     """Создание файлов faq_*.json, если их нет"""
     os.makedirs("faq", exist_ok=True)
@@ -0,0 +1,261 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from utils.io_executor import IOExecutor
+from utils.tracing import trace_span
+
+
+def _state_name(state: StateType) -> Optional[str]:
+    """Название состояния для записи в хранилище."""
+    return state.state if isinstance(state, State) else state
+
+
+class SQLiteStorage(BaseStorage):
+    """
+    FSM-хранилище в SQLite (режим WAL).
+
+    Состояние и данные каждого ключа лежат в одной строке таблицы fsm,
+    поэтому пользователи не теряют шаг регистрации или чата после
+    перезапуска. Запросы к базе выполняются в пуле ввода-вывода.
+    """
+
+    def __init__(self, db_path: str, executor: IOExecutor, key_builder: Optional[KeyBuilder] = None):
+        self.db_path = db_path
+        self.executor = executor
+        self.key_builder = key_builder or DefaultKeyBuilder(with_destiny=True)
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS fsm ("
+            "key TEXT PRIMARY KEY, "
+            "state TEXT, "
+            "data TEXT NOT NULL DEFAULT '{}', "
+            "updated_at REAL NOT NULL)"
+        )
+
+    def _get(self, key: str) -> Tuple[Optional[str], Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT state, data FROM fsm WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None, {}
+        return row[0], json.loads(row[1])
+
+    def _set_state(self, key: str, state: Optional[str]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO fsm (key, state, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET state = excluded.state, updated_at = excluded.updated_at",
+                (key, state, time.time())
+            )
+            # Пустые строки не храним
+            self._conn.execute("DELETE FROM fsm WHERE key = ? AND state IS NULL AND data = '{}'", (key,))
+
+    def _set_data(self, key: str, data: Dict[str, Any]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO fsm (key, data, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at",
+                (key, json.dumps(data, ensure_ascii=False), time.time())
+            )
+            self._conn.execute("DELETE FROM fsm WHERE key = ? AND state IS NULL AND data = '{}'", (key,))
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        await self.executor.run(self._set_state, self.key_builder.build(key), _state_name(state))
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        state, _ = await self.executor.run(self._get, self.key_builder.build(key))
+        return state
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        await self.executor.run(self._set_data, self.key_builder.build(key), data)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        _, data = await self.executor.run(self._get, self.key_builder.build(key))
+        return data
+
+    async def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class LocalKeyValueClient:
+    """
+    Локальная замена Redis внутри процесса.
+
+    Поддерживает те же команды get/set/delete (с ex в секундах), что
+    использует KeyValueStorage, поэтому Redis-бэкенд можно проверить без
+    сервера Redis (REDIS_URL=local://).
+    """
+
+    def __init__(self):
+        self._values: Dict[str, Tuple[bytes, Optional[float]]] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        item = self._values.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._values[key]
+            return None
+        return value
+
+    async def set(self, key: str, value: Any, ex: Optional[int] = None) -> bool:
+        if isinstance(value, str):
+            value = value.encode("utf-8")
+        expires_at = time.monotonic() + ex if ex else None
+        self._values[key] = (value, expires_at)
+        return True
+
+    async def delete(self, *keys: str) -> int:
+        return sum(self._values.pop(key, None) is not None for key in keys)
+
+    async def aclose(self) -> None:
+        self._values.clear()
+
+
+class KeyValueStorage(BaseStorage):
+    """
+    FSM-хранилище поверх клиента с протоколом Redis (get/set/delete).
+
+    Ключи строятся так же, как в RedisStorage из aiogram, поэтому несколько
+    процессов бота могут работать с одним сервером Redis.
+    """
+
+    def __init__(self, client: Any, key_builder: Optional[KeyBuilder] = None,
+                 state_ttl: Optional[int] = None, data_ttl: Optional[int] = None):
+        self.client = client
+        self.key_builder = key_builder or DefaultKeyBuilder(with_destiny=True)
+        self.state_ttl = state_ttl
+        self.data_ttl = data_ttl
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        redis_key = self.key_builder.build(key, "state")
+        state = _state_name(state)
+        if state is None:
+            await self.client.delete(redis_key)
+        else:
+            await self.client.set(redis_key, state, ex=self.state_ttl)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        value = await self.client.get(self.key_builder.build(key, "state"))
+        if isinstance(value, bytes):
+            return value.decode("utf-8")
+        return value
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        redis_key = self.key_builder.build(key, "data")
+        if not data:
+            await self.client.delete(redis_key)
+        else:
+            await self.client.set(redis_key, json.dumps(data, ensure_ascii=False), ex=self.data_ttl)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        value = await self.client.get(self.key_builder.build(key, "data"))
+        if value is None:
+            return {}
+        if isinstance(value, bytes):
+            value = value.decode("utf-8")
+        return json.loads(value)
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+class TimedStorage(BaseStorage):
+    """Обертка над FSM-хранилищем, которая измеряет задержку каждой операции (и открывает спан fsm.<операция>)."""
+
+    OPERATIONS = ("get_state", "set_state", "get_data", "set_data")
+
+    def __init__(self, storage: BaseStorage):
+        self.storage = storage
+        # {операция: [количество, суммарное время, максимальное время]}
+        self._timings: Dict[str, list] = {operation: [0, 0.0, 0.0] for operation in self.OPERATIONS}
+
+    def _record(self, operation: str, started: float) -> None:
+        elapsed = time.perf_counter() - started
+        timing = self._timings[operation]
+        timing[0] += 1
+        timing[1] += elapsed
+        timing[2] = max(timing[2], elapsed)
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        started = time.perf_counter()
+        try:
+            with trace_span("fsm.set_state"):
+                await self.storage.set_state(key, state)
+        finally:
+            self._record("set_state", started)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        started = time.perf_counter()
+        try:
+            with trace_span("fsm.get_state"):
+                return await self.storage.get_state(key)
+        finally:
+            self._record("get_state", started)
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        started = time.perf_counter()
+        try:
+            with trace_span("fsm.set_data"):
+                await self.storage.set_data(key, data)
+        finally:
+            self._record("set_data", started)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            with trace_span("fsm.get_data"):
+                return await self.storage.get_data(key)
+        finally:
+            self._record("get_data", started)
+
+    async def close(self) -> None:
+        await self.storage.close()
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Количество вызовов, средняя и максимальная задержка (мс) по операциям."""
+        return {
+            operation: {
+                "count": count,
+                "avg_ms": round(total / count * 1000, 3) if count else 0.0,
+                "max_ms": round(maximum * 1000, 3)
+            }
+            for operation, (count, total, maximum) in self._timings.items()
+        }
+
+
+def create_fsm_storage(backend: str, executor: IOExecutor, db_path: str = "data/bot.db",
+                       redis_url: str = "redis://localhost:6379/0") -> TimedStorage:
+    """Создание FSM-хранилища по названию бэкенда (memory, sqlite или redis)."""
+    if backend == "memory":
+        storage = MemoryStorage()
+    elif backend == "sqlite":
+        storage = SQLiteStorage(db_path, executor)
+    elif backend == "redis":
+        if redis_url.startswith("local://"):
+            client = LocalKeyValueClient()
+        else:
+            try:
+                from redis.asyncio import Redis
+            except ImportError as e:
+                raise RuntimeError("Для FSM_STORAGE_BACKEND=redis установите пакет redis") from e
+            client = Redis.from_url(redis_url)
+        storage = KeyValueStorage(client)
+    else:
+        raise ValueError(f"Неизвестный тип FSM-хранилища: {backend}")
+    return TimedStorage(storage)
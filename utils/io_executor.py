@@ -0,0 +1,57 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from utils.tracing import trace_span
+
+
+class IOExecutor:
+    """
+    Ограниченный пул потоков для блокирующих дисковых операций.
+
+    Ведет счетчик задач в очереди, чтобы было видно, когда пул не успевает
+    обрабатывать операции ввода-вывода.
+    """
+
+    def __init__(self, max_workers: int = 4):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="file_io")
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.max_in_flight = 0
+        self.completed = 0
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Выполнение синхронной функции в пуле потоков (в трассировке - спан io.<функция>)."""
+        with self._lock:
+            self._in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self._in_flight)
+        try:
+            loop = asyncio.get_running_loop()
+            with trace_span(f"io.{getattr(func, '__qualname__', type(func).__name__)}"):
+                return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                self.completed += 1
+
+    @property
+    def queue_depth(self) -> int:
+        """Количество задач, ожидающих свободный поток."""
+        return max(0, self._in_flight - self.max_workers)
+
+    def stats(self) -> Dict[str, int]:
+        """Статистика пула ввода-вывода."""
+        return {
+            "workers": self.max_workers,
+            "in_flight": self._in_flight,
+            "queue_depth": self.queue_depth,
+            "max_in_flight": self.max_in_flight,
+            "completed": self.completed
+        }
+
+    def shutdown(self) -> None:
+        """Остановка пула потоков."""
+        self._executor.shutdown(wait=True)
@@ -1,6 +1,12 @@
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from aiogram.types import InlineKeyboardMarkup
-from utils.file_operations import is_user_registered, get_user_language
+from utils.file_operations import (
+    is_user_registered, get_user_language, is_user_registered_async, get_user_language_async
+)
+from utils.logger import get_debug_logger
+
+# Отладочный канал модуля (включается через LOG_DEBUG_MODULES или /debug)
+debug_log = get_debug_logger("keyboards")
 
 
 # Словарь с текстами кнопок на разных языках
@@ -13,8 +19,12 @@ BUTTON_TEXTS = {
         "menu": "Меню",
         "back_to_list": "Назад к списку",
         "back": "Назад",
+        "prev_page": "◀️ Назад",
+        "next_page": "Вперед ▶️",
         "confirm": "Подтвердить",
-        "cancel": "Отмена"
+        "cancel": "Отмена",
+        "suggest_accept": "✅ Это ответ на мой вопрос",
+        "suggest_send": "📨 Всё равно отправить вопрос"
     },
     "kz": {
         "register": "Тіркелу",
@@ -24,8 +34,12 @@ BUTTON_TEXTS = {
         "menu": "Мәзір",
         "back_to_list": "Тізімге оралу",
         "back": "Артқа",
+        "prev_page": "◀️ Артқа",
+        "next_page": "Алға ▶️",
         "confirm": "Растау",
-        "cancel": "Болдырмау"
+        "cancel": "Болдырмау",
+        "suggest_accept": "✅ Бұл менің сұрағыма жауап",
+        "suggest_send": "📨 Сұрақты бәрібір жіберу"
     },
     "en": {
         "register": "Register",
@@ -35,8 +49,12 @@ BUTTON_TEXTS = {
         "menu": "Menu",
         "back_to_list": "Back to list",
         "back": "Back",
+        "prev_page": "◀️ Previous",
+        "next_page": "Next ▶️",
         "confirm": "Confirm",
-        "cancel": "Cancel"
+        "cancel": "Cancel",
+        "suggest_accept": "✅ This answers my question",
+        "suggest_send": "📨 Send my question anyway"
     }
 }
 
@@ -50,8 +68,6 @@ def get_button_text(key: str, language: str) -> str:
 
 def get_main_keyboard(user_id: int = None):
     """Создайте клавиатуру главного меню."""
-    builder = InlineKeyboardBuilder()
-    
     # Получаем язык пользователя
     language = "ru"
     if user_id is not None:
@@ -61,12 +77,33 @@ def get_main_keyboard(user_id: int = None):
     is_registered = False
     if user_id is not None:
         is_registered = is_user_registered(user_id)
-        print(f"DEBUG: In keyboard - User {user_id} is_registered={is_registered}")
+        debug_log.debug("In keyboard - User %s is_registered=%s", user_id, is_registered)
+    
+    if not is_registered:
+        debug_log.debug("Adding registration button for user %s", user_id)
+    
+    return build_main_keyboard(language, is_registered)
+
+
+async def get_main_keyboard_async(user_id: int = None):
+    """Асинхронный вариант get_main_keyboard: данные пользователя читаются вне цикла событий."""
+    language = "ru"
+    is_registered = False
+    if user_id is not None:
+        language = await get_user_language_async(user_id)
+        is_registered = await is_user_registered_async(user_id)
+        debug_log.debug("In keyboard - User %s is_registered=%s", user_id, is_registered)
+    
+    return build_main_keyboard(language, is_registered)
+
+
+def build_main_keyboard(language: str, is_registered: bool):
+    """Сборка клавиатуры главного меню по языку и статусу регистрации."""
+    builder = InlineKeyboardBuilder()
     
     # User is not registered
     if not is_registered:
         # Show only "Registration" and "FAQ" for unregistered users
-        print(f"DEBUG: Adding registration button for user {user_id}")
         builder.button(
             text=get_button_text("register", language),
             callback_data="register"
@@ -97,14 +134,33 @@ def get_main_keyboard(user_id: int = None):
     return builder.as_markup()
 
 
-def get_faq_list_keyboard(language: str = "ru"):
-    """Создание клавиатуры со списком вопросов FAQ."""
+def get_faq_list_keyboard(language: str = "ru", page: int = 0, total_pages: int = 1):
+    """Создание клавиатуры со списком вопросов FAQ и переключением страниц."""
     builder = InlineKeyboardBuilder()
+    
+    # Кнопки переключения страниц в одном ряду
+    nav_buttons = 0
+    if page > 0:
+        builder.button(
+            text=get_button_text("prev_page", language),
+            callback_data=f"faq_page_{page - 1}"
+        )
+        nav_buttons += 1
+    if page < total_pages - 1:
+        builder.button(
+            text=get_button_text("next_page", language),
+            callback_data=f"faq_page_{page + 1}"
+        )
+        nav_buttons += 1
+    
     builder.button(
         text=get_button_text("menu", language),
         callback_data="main_menu"
     )
-    builder.adjust(1)  # Place button vertically
+    if nav_buttons:
+        builder.adjust(nav_buttons, 1)
+    else:
+        builder.adjust(1)  # Place button vertically
     return builder.as_markup()
 
 
@@ -119,6 +175,38 @@ def get_faq_back_keyboard(language: str = "ru"):
     return builder.as_markup()
 
 
+def get_faq_search_keyboard(results: list, language: str = "ru"):
+    """Создание клавиатуры с найденными вопросами FAQ."""
+    builder = InlineKeyboardBuilder()
+    for question_id, question, _ in results:
+        # Текст кнопки ограничен, поэтому длинные вопросы обрезаем
+        text = f"{question_id}. {question}"
+        if len(text) > 60:
+            text = text[:59] + "…"
+        builder.button(text=text, callback_data=f"faq_show_{question_id}")
+    builder.button(
+        text=get_button_text("back_to_list", language),
+        callback_data="faq_list"
+    )
+    builder.adjust(1)  # Place buttons vertically
+    return builder.as_markup()
+
+
+def get_faq_suggestion_keyboard(language: str = "ru"):
+    """Создание клавиатуры для ответа из FAQ, предложенного вместо вопроса."""
+    builder = InlineKeyboardBuilder()
+    builder.button(
+        text=get_button_text("suggest_accept", language),
+        callback_data="suggest_accept"
+    )
+    builder.button(
+        text=get_button_text("suggest_send", language),
+        callback_data="suggest_send"
+    )
+    builder.adjust(1)  # Place buttons vertically
+    return builder.as_markup()
+
+
 def get_back_keyboard(language: str = "ru") -> InlineKeyboardMarkup:
     """Создает пустую клавиатуру вместо кнопки 'Назад'."""
     builder = InlineKeyboardBuilder()
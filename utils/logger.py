@@ -1,56 +1,303 @@
+import atexit
+import contextvars
+import gzip
+import json
 import logging
+import logging.handlers
 import os
-from datetime import datetime
+import queue
+import shutil
+from datetime import datetime, timedelta
+
+from config import LOG_LEVEL, LOG_BATCH_SIZE, LOG_RETENTION_DAYS, EVENT_LOG, LOG_DEBUG_MODULES, TRACING
 
 # Создаем папку для логов, если она не существует
 os.makedirs('logs', exist_ok=True)
 
-# Настраиваем логгер
+# Настраиваем логгер: сообщения ниже LOG_LEVEL отбрасываются до форматирования
 logger = logging.getLogger('semgu_support')
-logger.setLevel(logging.DEBUG)
+logger.setLevel(LOG_LEVEL)
+
+# ID трассировки обрабатываемого обновления (задает utils.tracing); попадает в каждую строку лога
+current_trace_id: contextvars.ContextVar[str] = contextvars.ContextVar("trace_id", default="")
+
+
+class BatchFlushMixin:
+    """Запись без flush после каждой строки: буфер сбрасывается один раз на пачку записей."""
+
+    def flush(self):
+        pass
+
+    def flush_batch(self):
+        # При выходе интерпретатора поток консоли может быть уже закрыт
+        try:
+            super().flush()
+        except (ValueError, OSError):
+            pass
+
+
+class BatchStreamHandler(BatchFlushMixin, logging.StreamHandler):
+    pass
+
+
+class DailyFileHandler(BatchFlushMixin, logging.FileHandler):
+    """
+    Отдельный файл лога на каждый день: {prefix}_ГГГГ-ММ-ДД{suffix}.
+
+    Новый файл начинается по времени записи, а не только при запуске.
+    Файлы прошлых дней сжимаются gzip, файлы старше retention_days удаляются.
+    """
+
+    def __init__(self, directory, prefix, suffix, retention_days=30, compress=True):
+        self.directory = directory
+        self.prefix = prefix
+        self.suffix = suffix
+        self.retention_days = retention_days
+        self.compress = compress
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        self.day = today.strftime('%Y-%m-%d')
+        self.next_day_at = (today + timedelta(days=1)).timestamp()
+        super().__init__(self._path(self.day), encoding='utf-8')
+        self.archive()
+
+    def _path(self, day):
+        return os.path.join(self.directory, f"{self.prefix}_{day}{self.suffix}")
+
+    def emit(self, record):
+        if record.created >= self.next_day_at:
+            self.rollover(record.created)
+        super().emit(record)
+
+    def rollover(self, timestamp):
+        """Переход на файл дня timestamp и архивация прошлых файлов."""
+        day_start = datetime.fromtimestamp(timestamp).replace(hour=0, minute=0, second=0, microsecond=0)
+        if self.stream:
+            self.flush_batch()
+            self.stream.close()
+        self.day = day_start.strftime('%Y-%m-%d')
+        self.next_day_at = (day_start + timedelta(days=1)).timestamp()
+        self.baseFilename = os.path.abspath(self._path(self.day))
+        self.stream = self._open()
+        self.archive()
+
+    def archive(self):
+        """Сжатие файлов прошлых дней и удаление файлов старше retention_days."""
+        oldest = (datetime.strptime(self.day, '%Y-%m-%d') - timedelta(days=self.retention_days)).strftime('%Y-%m-%d')
+        for name in os.listdir(self.directory):
+            if not name.startswith(self.prefix + "_"):
+                continue
+            stem = name[:-3] if name.endswith(".gz") else name
+            if not stem.endswith(self.suffix):
+                continue
+            day = stem[len(self.prefix) + 1:len(stem) - len(self.suffix)]
+            if len(day) != 10 or day >= self.day:
+                continue
+            path = os.path.join(self.directory, name)
+            # Файл может одновременно архивировать другой процесс (WORKERS > 1): у каждого
+            # процесса свой временный файл, а уже сжатый другим процессом файл пропускается
+            try:
+                if self.retention_days and day < oldest:
+                    os.remove(path)
+                elif self.compress and not name.endswith(".gz") and not os.path.exists(path + ".gz"):
+                    tmp_path = f"{path}.{os.getpid()}.gz.tmp"
+                    with open(path, 'rb') as source, gzip.open(tmp_path, 'wb') as target:
+                        shutil.copyfileobj(source, target)
+                    os.replace(tmp_path, path + ".gz")
+                    os.remove(path)
+            except OSError:
+                pass
+
+
+class JsonFormatter(logging.Formatter):
+    """Событие одной строкой JSON: время, тип события и его поля."""
+
+    def format(self, record):
+        event = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            "event": record.msg
+        }
+        event.update(getattr(record, "fields", {}))
+        if record.trace_id:
+            event["trace_id"] = record.trace_id
+        return json.dumps(event, ensure_ascii=False, default=str)
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Объекты из record.items (словари или объекты с to_dict), по строке JSON на объект."""
+
+    def format(self, record):
+        return "\n".join(
+            json.dumps(item if isinstance(item, dict) else item.to_dict(), ensure_ascii=False, default=str)
+            for item in record.items
+        )
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    Постановка записи в очередь без форматирования.
+
+    В потоке обработчика только подставляются аргументы %-строки (чтобы
+    записать значения на момент вызова) и запоминается ID трассировки;
+    время, уровень и трассировка исключения форматируются в фоновом потоке.
+    """
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        record.trace_id = current_trace_id.get()
+        record.trace = f"[{record.trace_id}] " if record.trace_id else ""
+        return record
+
+
+class BatchQueueListener(logging.handlers.QueueListener):
+    """Фоновый поток записи логов: забирает из очереди все накопившиеся записи и сбрасывает буферы один раз."""
+
+    def __init__(self, log_queue, *handlers, batch_size=100):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.batch_size = batch_size
+
+    def _monitor(self):
+        q = self.queue
+        while True:
+            record = q.get()
+            stop = record is self._sentinel
+            batch = 0
+            while not stop:
+                self.handle(record)
+                batch += 1
+                if batch >= self.batch_size:
+                    break
+                try:
+                    record = q.get_nowait()
+                except queue.Empty:
+                    break
+                stop = record is self._sentinel
+            for handler in self.handlers:
+                handler.flush_batch()
+            if stop:
+                return
+
 
 # Создаем обработчик для вывода в консоль с более высоким уровнем логирования
-console_handler = logging.StreamHandler()
+console_handler = BatchStreamHandler()
 console_handler.setLevel(logging.INFO)
 
 # Создаем обработчик для записи в файл, который логирует даже отладочные сообщения
-log_filename = f"logs/bot_{datetime.now().strftime('%Y-%m-%d')}.log"
-file_handler = logging.FileHandler(log_filename, encoding='utf-8')
+file_handler = DailyFileHandler('logs', 'bot', '.log', retention_days=LOG_RETENTION_DAYS)
 file_handler.setLevel(logging.DEBUG)
 
 # Создаем форматтеры и добавляем их к обработчикам
-console_format = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s', 
+console_format = logging.Formatter('%(asctime)s - %(levelname)s - %(trace)s%(message)s',
                                   datefmt='%H:%M:%S')
-file_format = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+file_format = logging.Formatter('%(asctime)s - %(levelname)s - %(trace)s%(message)s')
 
 console_handler.setFormatter(console_format)
 file_handler.setFormatter(file_format)
 
-# Добавляем обработчики к логгеру
-logger.addHandler(console_handler)
-logger.addHandler(file_handler)
+# Журнал событий (JSON lines) для анализа нагрузки: отдельный логгер и отдельный файл.
+# Файл создается только при включенном EVENT_LOG
+event_logger = logging.getLogger('semgu_support.events')
+event_logger.setLevel(logging.INFO)
+event_logger.propagate = False
+event_logger.disabled = not EVENT_LOG
+
+# Спаны трассировки (JSON lines) для анализа задержек: logs/spans_ГГГГ-ММ-ДД.jsonl.
+# Файл создается только при включенной трассировке
+span_logger = logging.getLogger('semgu_support.spans')
+span_logger.setLevel(logging.INFO)
+span_logger.propagate = False
+span_logger.disabled = not TRACING
+
+# В текстовые логи события и спаны не попадают: для событий есть обычные строки
+console_handler.addFilter(lambda record: record.name not in (event_logger.name, span_logger.name))
+file_handler.addFilter(lambda record: record.name not in (event_logger.name, span_logger.name))
+
+# Запись в консоль и файлы идет в фоновом потоке, цикл событий только ставит запись в очередь
+log_queue = queue.SimpleQueue()
+logger.addHandler(DeferredQueueHandler(log_queue))
+log_handlers = [console_handler, file_handler]
+if EVENT_LOG:
+    event_handler = DailyFileHandler('logs', 'events', '.jsonl', retention_days=LOG_RETENTION_DAYS)
+    event_handler.setFormatter(JsonFormatter())
+    event_handler.addFilter(logging.Filter(event_logger.name))
+    event_logger.addHandler(DeferredQueueHandler(log_queue))
+    log_handlers.append(event_handler)
+if TRACING:
+    span_handler = DailyFileHandler('logs', 'spans', '.jsonl', retention_days=LOG_RETENTION_DAYS)
+    span_handler.setFormatter(JsonLinesFormatter())
+    span_handler.addFilter(logging.Filter(span_logger.name))
+    span_logger.addHandler(DeferredQueueHandler(log_queue))
+    log_handlers.append(span_handler)
+log_listener = BatchQueueListener(log_queue, *log_handlers, batch_size=LOG_BATCH_SIZE)
+log_listener.start()
+# При выходе дописываем все, что осталось в очереди
+atexit.register(log_listener.stop)
+
+# Отладочные каналы модулей: {имя: логгер semgu_support.<имя>}
+debug_loggers = {}
+
+
+def get_debug_logger(name):
+    """
+    Отладочный канал модуля.
+
+    По умолчанию отладка канала выключена независимо от LOG_LEVEL; ее
+    включают через LOG_DEBUG_MODULES или set_debug во время работы. Перед
+    дорогими аргументами проверяйте debug_log.isEnabledFor(logging.DEBUG).
+    """
+    channel = logger.getChild(name)
+    debug_loggers[name] = channel
+    channel.setLevel(logging.DEBUG if name in LOG_DEBUG_MODULES else logging.INFO)
+    return channel
+
+
+def set_debug(name, enabled):
+    """Включение или выключение отладки модуля без перезапуска. False, если канала нет."""
+    channel = debug_loggers.get(name)
+    if channel is None:
+        return False
+    channel.setLevel(logging.DEBUG if enabled else logging.INFO)
+    return True
+
+
+def debug_status():
+    """Включена ли отладка для каждого канала: {имя: bool}."""
+    return {name: channel.isEnabledFor(logging.DEBUG) for name, channel in sorted(debug_loggers.items())}
+
 
 def setup_logging():
     """Инициализация системы логирования"""
     logger.info("Система логирования инициализирована")
     return logger
 
+# Типы событий журнала событий
+EVENT_COMMAND = "command"
+EVENT_CALLBACK = "callback"
+EVENT_MESSAGE = "message"
+EVENT_CHAT = "chat"
+EVENT_QUESTION = "question"
+EVENT_REGISTRATION = "registration"
+
 # Утилитарные функции логирования
-def log_info(message):
-    """Логирование информационного сообщения"""
-    logger.info(message)
+def log_event(event, **fields):
+    """Структурированное событие в журнал событий (logs/events_ГГГГ-ММ-ДД.jsonl)"""
+    event_logger.info(event, extra={"fields": fields})
+
+def log_info(message, *args):
+    """Логирование информационного сообщения (args подставляются в %-строку, только если уровень включен)"""
+    logger.info(message, *args)
 
-def log_warning(message):
+def log_warning(message, *args):
     """Логирование предупреждения"""
-    logger.warning(message)
+    logger.warning(message, *args)
     
-def log_error(message):
-    """Логирование ошибки"""
-    logger.error(message)
+def log_error(message, *args, exc_info=False):
+    """Логирование ошибки (с трассировкой исключения при exc_info=True)"""
+    logger.error(message, *args, exc_info=exc_info)
     
-def log_debug(message):
-    """Логирование отладочного сообщения"""
-    logger.debug(message)
+def log_debug(message, *args):
+    """Логирование отладочного сообщения (при выключенном DEBUG аргументы не форматируются)"""
+    logger.debug(message, *args)
 
 def log_command(user_id, username=None, command=None, full_name=None):
     """Логирование команды пользователя"""
@@ -61,6 +308,7 @@ def log_command(user_id, username=None, command=None, full_name=None):
         user_info += f" ({full_name})"
     
     logger.info(f"Command: {command} | User: {user_info}")
+    log_event(EVENT_COMMAND, user_id=user_id, username=username, command=command)
     
 def log_callback(user_id, callback_data, username=None, full_name=None):
     """Логирование обратного вызова"""
@@ -71,6 +319,7 @@ def log_callback(user_id, callback_data, username=None, full_name=None):
         user_info += f" ({full_name})"
     
     logger.info(f"Callback: {callback_data} | User: {user_info}")
+    log_event(EVENT_CALLBACK, user_id=user_id, username=username, data=callback_data)
     
 def log_chat_message(user_id, username=None, message_text=None, full_name=None):
     """Логирование сообщения чата"""
@@ -113,6 +362,7 @@ def log_message(source, user_id, message_type=None, username=None, full_name=Non
     msg_type = f" ({message_type})" if message_type else ""
     
     logger.info(f"{source} message{msg_type} received from {user_info}")
+    log_event(EVENT_MESSAGE, source=source, user_id=user_id, username=username, content_type=message_type)
 
 def log_chat_connection(action, user_id, admin_id=None, admin_name=None):
     """Логирование соединения чата"""
@@ -126,6 +376,7 @@ def log_chat_connection(action, user_id, admin_id=None, admin_name=None):
         logger.info(f"Admin [ID: {admin_id}] ({admin_name}) disconnected from chat with user [ID: {user_id}]")
     elif action == "timeout":
         logger.info(f"Chat connection for user [ID: {user_id}] timed out")
+    log_event(EVENT_CHAT, action=action, user_id=user_id, admin_id=admin_id, admin_name=admin_name)
 
 def log_question(action, question_id, user_id=None, admin_id=None, admin_name=None):
     """Логирование вопросов"""
@@ -135,6 +386,8 @@ def log_question(action, question_id, user_id=None, admin_id=None, admin_name=No
         logger.info(f"Admin [ID: {admin_id}] ({admin_name}) started answering question #{question_id}")
     elif action == "answered":
         logger.info(f"Admin [ID: {admin_id}] ({admin_name}) answered question #{question_id}")
+    log_event(EVENT_QUESTION, action=action, question_id=question_id, user_id=user_id, admin_id=admin_id,
+              admin_name=admin_name)
 
 def log_registration(action, user_id, username=None, full_name=None):
     """Логирование регистрации"""
@@ -149,4 +402,5 @@ def log_registration(action, user_id, username=None, full_name=None):
     elif action == "complete":
         logger.info(f"User {user_info} completed registration")
     elif action == "already":
-        logger.info(f"User {user_info} tried to register but already registered") 
\ No newline at end of file
+        logger.info(f"User {user_info} tried to register but already registered")
+    log_event(EVENT_REGISTRATION, action=action, user_id=user_id, username=username) 
@@ -1,33 +1,29 @@
+from typing import List
+
 from aiogram.types import Message
 
+from utils.media_relay import MEDIA_GROUP, get_file_id
 
-async def save_media_file(message: Message, question_id: str) -> dict:
-    """Сохраняет медиафайл и возвращает информацию о нем."""
-    media_info = {
-        "type": message.content_type,
-        "file_id": None,
-        "caption": None
-    }
 
+async def save_media_file(message: Message, question_id: str = None) -> dict:
+    """Сохраняет медиафайл и возвращает информацию о нем."""
     if message.content_type == "text":
         return None
 
-    if message.content_type in ["photo", "video", "audio", "voice", "video_note", "document"]:
-        if message.content_type == "photo":
-            # Для фото берем самое большое разрешение
-            media_info["file_id"] = message.photo[-1].file_id
-        elif message.content_type == "video":
-            media_info["file_id"] = message.video.file_id
-        elif message.content_type == "audio":
-            media_info["file_id"] = message.audio.file_id
-        elif message.content_type == "voice":
-            media_info["file_id"] = message.voice.file_id
-        elif message.content_type == "video_note":
-            media_info["file_id"] = message.video_note.file_id
-        elif message.content_type == "document":
-            media_info["file_id"] = message.document.file_id
+    return {
+        "type": message.content_type,
+        "file_id": get_file_id(message),
+        "caption": message.caption or None
+    }
 
-        if message.caption:
-            media_info["caption"] = message.caption
 
-    return media_info 
\ No newline at end of file
+async def save_media_group(messages: List[Message], question_id: str = None) -> dict:
+    """Сохраняет все файлы альбома; подписи частей объединяются в общую подпись."""
+    items = [await save_media_file(message, question_id) for message in messages]
+    captions = [item["caption"] for item in items if item["caption"]]
+    return {
+        "type": MEDIA_GROUP,
+        "file_id": None,
+        "caption": "\n".join(captions) or None,
+        "items": items
+    }
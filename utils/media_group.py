@@ -0,0 +1,92 @@
+import asyncio
+import time
+from typing import Awaitable, Dict, List, Optional, Tuple
+
+from aiogram.types import Message
+
+from config import MEDIA_GROUP_WINDOW
+
+
+class _Album:
+    __slots__ = ("messages", "updated", "result")
+
+    def __init__(self, message: Message, result: asyncio.Future):
+        self.messages = [message]
+        self.updated = time.monotonic()
+        self.result = result
+
+
+class MediaGroupCollector:
+    """
+    Сборка альбомов (media group) из отдельных сообщений.
+
+    Telegram присылает каждый файл альбома отдельным обновлением с общим
+    media_group_id. Обработчик первого файла ждет, пока в течение window
+    секунд не перестанут приходить новые части, и получает весь альбом;
+    обработчики остальных частей получают None и ничего не делают.
+    Окончание альбома отслеживает сам сборщик (таймер цикла событий),
+    поэтому альбом не зависает, даже если его результат никто не ждет.
+    """
+
+    def __init__(self, window: float = 0.5):
+        self.window = window
+        self._albums: Dict[Tuple[int, str], _Album] = {}
+        # Метрики
+        self.albums = 0
+        self.merged = 0
+
+    def add(self, message: Message) -> Optional[Awaitable[List[Message]]]:
+        """
+        Регистрация сообщения.
+
+        Для обычного сообщения и первой части альбома возвращает Future со
+        всеми сообщениями по порядку, для остальных частей альбома - None.
+        Части регистрируются сразу, поэтому ожидание можно отложить (например,
+        поставить в очередь пересылки, сохранив порядок сообщений).
+        """
+        loop = asyncio.get_running_loop()
+        result = loop.create_future()
+        if message.media_group_id is None:
+            result.set_result([message])
+            return result
+
+        key = (message.chat.id, message.media_group_id)
+        album = self._albums.get(key)
+        if album is not None:
+            album.messages.append(message)
+            album.updated = time.monotonic()
+            self.merged += 1
+            return None
+
+        self._albums[key] = _Album(message, result)
+        loop.call_later(self.window, self._check, key)
+        return result
+
+    async def collect(self, message: Message) -> Optional[List[Message]]:
+        """Все сообщения альбома по порядку, [message] для обычного сообщения или None для не первой части альбома."""
+        waiter = self.add(message)
+        return await waiter if waiter is not None else None
+
+    def _check(self, key: Tuple[int, str]) -> None:
+        album = self._albums[key]
+        # Каждая новая часть продлевает ожидание
+        delay = album.updated + self.window - time.monotonic()
+        if delay > 0:
+            asyncio.get_running_loop().call_later(delay, self._check, key)
+            return
+        del self._albums[key]
+        self.albums += 1
+        if not album.result.done():
+            album.result.set_result(sorted(album.messages, key=lambda item: item.message_id))
+
+    def stats(self) -> Dict[str, int]:
+        """Количество собранных альбомов, объединенных частей и альбомов в ожидании."""
+        return {
+            "albums": self.albums,
+            "merged": self.merged,
+            "pending": len(self._albums)
+        }
+
+
+# Общий сборщик альбомов
+media_groups = MediaGroupCollector(MEDIA_GROUP_WINDOW)
@@ -0,0 +1,138 @@
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from aiogram import Bot
+from aiogram.types import InputMediaAudio, InputMediaDocument, InputMediaPhoto, InputMediaVideo, Message
+
+from utils.send_scheduler import PRIORITY_CHAT, send_priority
+
+# Тип контента вопроса, собранного из альбома
+MEDIA_GROUP = "media_group"
+
+
+class MediaType(NamedTuple):
+    """Способ извлечь file_id из сообщения и отправить файл заново."""
+    extract: Callable[[Message], str]
+    method: str
+    caption: bool
+    album: Optional[type] = None
+
+
+# Таблица типов контента:
+# {content_type: (извлечение file_id, метод Bot, поддерживает ли подпись, тип InputMedia для альбома)}
+MEDIA_TYPES: Dict[str, MediaType] = {
+    # Для фото берем самое большое разрешение
+    "photo": MediaType(lambda message: message.photo[-1].file_id, "send_photo", True, InputMediaPhoto),
+    "video": MediaType(lambda message: message.video.file_id, "send_video", True, InputMediaVideo),
+    "audio": MediaType(lambda message: message.audio.file_id, "send_audio", True, InputMediaAudio),
+    "voice": MediaType(lambda message: message.voice.file_id, "send_voice", True),
+    "video_note": MediaType(lambda message: message.video_note.file_id, "send_video_note", False),
+    "document": MediaType(lambda message: message.document.file_id, "send_document", True, InputMediaDocument),
+    "sticker": MediaType(lambda message: message.sticker.file_id, "send_sticker", False)
+}
+
+
+# Остальные типы контента, которые copy_message копирует как есть (служебные сообщения,
+# счета, розыгрыши и т.п. скопировать нельзя)
+COPY_TYPES = {"text", "animation", "contact", "location", "venue", "poll", "dice"}
+
+
+def can_relay(message: Message) -> bool:
+    """Можно ли переслать сообщение через copy_message."""
+    return message.content_type in MEDIA_TYPES or message.content_type in COPY_TYPES
+
+
+def get_file_id(message: Message) -> Optional[str]:
+    """file_id медиафайла сообщения или None для текста и неизвестных типов."""
+    media_type = MEDIA_TYPES.get(message.content_type)
+    return media_type.extract(message) if media_type else None
+
+
+def caption_part(caption: Optional[str]) -> str:
+    """Подпись пользователя для добавления к тексту уведомления."""
+    return f"\n<b>Подпись:</b>\n{caption}" if caption else ""
+
+
+async def relay_message(bot: Bot, message: Message, chat_id: Any, message_thread_id: Optional[int] = None) -> bool:
+    """
+    Пересылка сообщения как есть (без пометки "переслано") через copy_message.
+
+    False, если сообщение этого типа скопировать нельзя. Остальные ошибки
+    (нет чата, топика или исходного сообщения) передаются вызывающему.
+    """
+    if not can_relay(message):
+        return False
+    # Сообщения живого чата отправляются раньше уведомлений
+    with send_priority(PRIORITY_CHAT):
+        await bot.copy_message(
+            chat_id,
+            from_chat_id=message.chat.id,
+            message_id=message.message_id,
+            message_thread_id=message_thread_id
+        )
+    return True
+
+
+async def relay_album(bot: Bot, messages: List[Message], chat_id: Any, message_thread_id: Optional[int] = None) -> bool:
+    """
+    Пересылка альбома одним вызовом send_media_group с подписями пользователя.
+
+    Для одного сообщения то же, что relay_message. False, если в альбоме
+    есть файлы типа, который нельзя отправить в альбоме; ошибки отправки
+    передаются вызывающему.
+    """
+    if len(messages) == 1:
+        return await relay_message(bot, messages[0], chat_id, message_thread_id)
+
+    media = []
+    for message in messages:
+        media_type = MEDIA_TYPES.get(message.content_type)
+        if media_type is None or media_type.album is None:
+            return False
+        media.append(media_type.album(
+            media=media_type.extract(message),
+            caption=message.caption,
+            caption_entities=message.caption_entities,
+            parse_mode=None
+        ))
+    with send_priority(PRIORITY_CHAT):
+        await bot.send_media_group(chat_id, media, message_thread_id=message_thread_id)
+    return True
+
+
+async def send_content(bot: Bot, chat_id: Any, content_type: str, file_id: Optional[str], text: str,
+                       reply_markup: Any = None, message_thread_id: Optional[int] = None) -> None:
+    """
+    Отправка текста или медиафайла с новой подписью text.
+
+    Если тип не поддерживает подпись (видеокружок, стикер), текст с
+    клавиатурой отправляется следующим сообщением.
+    """
+    media_type = MEDIA_TYPES.get(content_type)
+    if media_type is None or file_id is None:
+        await bot.send_message(chat_id, text, reply_markup=reply_markup, message_thread_id=message_thread_id)
+        return
+
+    send = getattr(bot, media_type.method)
+    if media_type.caption:
+        await send(chat_id, file_id, caption=text, reply_markup=reply_markup, message_thread_id=message_thread_id)
+    else:
+        await send(chat_id, file_id, message_thread_id=message_thread_id)
+        await bot.send_message(chat_id, text, reply_markup=reply_markup, message_thread_id=message_thread_id)
+
+
+async def send_album(bot: Bot, chat_id: Any, items: List[Dict[str, Any]], text: str,
+                     reply_markup: Any = None, message_thread_id: Optional[int] = None) -> None:
+    """
+    Отправка сохраненного альбома (список из save_media_file) с подписью text у первого файла.
+
+    send_media_group не поддерживает клавиатуру, поэтому при reply_markup
+    текст отправляется следующим сообщением.
+    """
+    caption = text if reply_markup is None else None
+    media = [
+        MEDIA_TYPES[item["type"]].album(media=item["file_id"], caption=caption if index == 0 else None)
+        for index, item in enumerate(items)
+    ]
+    await bot.send_media_group(chat_id, media, message_thread_id=message_thread_id)
+    if reply_markup is not None:
+        await bot.send_message(chat_id, text, reply_markup=reply_markup, message_thread_id=message_thread_id)
@@ -26,6 +26,9 @@ MESSAGES = {
         "back_to_list": "⬅️ Назад к списку",
         "faq_question_prompt": "🔢 Напишите номер вопроса о Шәкәрім Университет, который подходит для вас:",
         "question_not_found": "❓ Вопрос с таким номером не найден. Пожалуйста, выберите номер из списка вопросов Шәкәрім Университет.",
+        "faq_search_results": "🔍 Вот что удалось найти по вашему запросу:",
+        "faq_search_no_results": "🔍 По вашему запросу ничего не найдено. Попробуйте другие слова или выберите номер из списка.",
+        "faq_suggestion": "💡 Возможно, ответ на ваш вопрос уже есть среди популярных вопросов:",
         
         # Вопросы
         "ask_question": "❓ Пожалуйста, напишите ваш вопрос о Шәкәрім Университет:",
@@ -81,6 +84,9 @@ MESSAGES = {
         "back_to_list": "⬅️ Тізімге оралу",
         "faq_question_prompt": "🔢 Шәкәрім Университеті туралы сізге қолайлы сұрақтың нөмірін жазыңыз:",
         "question_not_found": "❓ Мұндай нөмірмен сұрақ табылмады. Шәкәрім Университеті сұрақтар тізімінен нөмірді таңдаңыз.",
+        "faq_search_results": "🔍 Сұрауыңыз бойынша табылғандар:",
+        "faq_search_no_results": "🔍 Сұрауыңыз бойынша ештеңе табылмады. Басқа сөздерді қолданып көріңіз немесе тізімнен нөмірді таңдаңыз.",
+        "faq_suggestion": "💡 Сұрағыңыздың жауабы жиі қойылатын сұрақтар арасында болуы мүмкін:",
         
         # Вопросы
         "ask_question": "❓ Шәкәрім Университеті туралы сұрағыңызды жазыңыз:",
@@ -136,6 +142,9 @@ MESSAGES = {
         "back_to_list": "⬅️ Back to list",
         "faq_question_prompt": "🔢 Enter the number of the question about Shakarim University that suits you:",
         "question_not_found": "❓ Question with this number not found. Please choose a number from the Shakarim University questions list.",
+        "faq_search_results": "🔍 Here is what we found for your request:",
+        "faq_search_no_results": "🔍 Nothing was found for your request. Try other words or choose a number from the list.",
+        "faq_suggestion": "💡 The answer to your question may already be among the frequently asked questions:",
         
         # Вопросы
         "ask_question": "❓ Please write your question about Shakarim University:",
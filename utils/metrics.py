@@ -0,0 +1,216 @@
+import bisect
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Sequence, Tuple
+
+from aiohttp import web
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.enums import ContentType
+from aiogram.types import CallbackQuery, Message
+
+from utils.logger import log_info
+
+# Границы корзин гистограмм задержки (секунды)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[Any], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """Счетчик (только растет), отдельное значение на каждый набор меток."""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.values: Dict[Tuple[Any, ...], float] = {}
+
+    def inc(self, *labels: Any, amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for labels, value in self.values.items():
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {value}")
+        return "\n".join(lines)
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами, отдельная на каждый набор меток."""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # {метки: [счетчики корзин..., +Inf], сумма}
+        self.counts: Dict[Tuple[Any, ...], list] = {}
+        self.sums: Dict[Tuple[Any, ...], float] = {}
+
+    def observe(self, value: float, *labels: Any) -> None:
+        counts = self.counts.get(labels)
+        if counts is None:
+            counts = self.counts[labels] = [0] * (len(self.buckets) + 1)
+            self.sums[labels] = 0.0
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sums[labels] += value
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, counts in self.counts.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {self.sums[labels]}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return "\n".join(lines)
+
+
+class Gauge:
+    """Текущее значение, которое вычисляется функцией в момент чтения метрик."""
+
+    def __init__(self, name: str, help_text: str, read: Callable[[], float]):
+        self.name = name
+        self.help_text = help_text
+        self.read = read
+
+    def render(self) -> str:
+        return f"# HELP {self.name} {self.help_text}\n# TYPE {self.name} gauge\n{self.name} {self.read()}"
+
+
+class StatsGauges:
+    """Числовые поля stats() компонента как метрики {prefix}_{поле} (вложенные словари - {prefix}_{поле}_{подполе})."""
+
+    def __init__(self, prefix: str, stats: Callable[[], Dict[str, Any]]):
+        self.prefix = prefix
+        self.stats = stats
+
+    def _flatten(self, values: Dict[str, Any], name: str):
+        for key, value in values.items():
+            if isinstance(value, dict):
+                yield from self._flatten(value, f"{name}_{key}")
+            elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                yield f"{name}_{key}", value
+
+    def render(self) -> str:
+        return "\n".join(
+            f"# TYPE {name} gauge\n{name} {value}" for name, value in self._flatten(self.stats(), self.prefix)
+        )
+
+
+class MetricsRegistry:
+    """Набор метрик бота и их вывод в текстовом формате Prometheus."""
+
+    def __init__(self):
+        self.metrics: Dict[str, Any] = {}
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.metrics.setdefault(name, Counter(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Histogram:
+        return self.metrics.setdefault(name, Histogram(name, help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, read: Callable[[], float]) -> Gauge:
+        self.metrics[name] = Gauge(name, help_text, read)
+        return self.metrics[name]
+
+    def stats_gauges(self, prefix: str, stats: Callable[[], Dict[str, Any]]) -> StatsGauges:
+        """Вывод stats() компонента (очереди, кэши, хранилища) вместе с остальными метриками."""
+        self.metrics[prefix] = StatsGauges(prefix, stats)
+        return self.metrics[prefix]
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self.metrics.values()) + "\n"
+
+
+# Общий реестр метрик
+metrics = MetricsRegistry()
+updates_total = metrics.counter("bot_updates_total", "Обработанные обновления по типу", ("type",))
+handler_duration = metrics.histogram("bot_handler_duration_seconds", "Время работы обработчика", ("handler",))
+handler_errors = metrics.counter("bot_handler_errors_total", "Исключения в обработчиках", ("handler",))
+api_duration = metrics.histogram("bot_api_request_duration_seconds", "Время запроса к Telegram Bot API", ("method",))
+api_errors = metrics.counter("bot_api_errors_total", "Ошибки запросов к Telegram Bot API", ("method",))
+
+
+class MetricsMiddleware(BaseMiddleware):
+    """
+    Middleware для сбора метрик обработчиков.
+
+    Считает обновления по типу (тип контента сообщения или callback_query),
+    время работы каждого обработчика и исключения в нем.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[Message | CallbackQuery, Dict[str, Any]], Awaitable[Any]],
+        event: Message | CallbackQuery,
+        data: Dict[str, Any]
+    ) -> Any:
+        update_type = ContentType(event.content_type).value if isinstance(event, Message) else "callback_query"
+        handler_object = data.get("handler")
+        name = handler_object.callback.__name__ if handler_object is not None else "unknown"
+        updates_total.inc(update_type)
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            handler_errors.inc(name)
+            raise
+        finally:
+            handler_duration.observe(time.perf_counter() - started, name)
+
+
+class ApiMetricsMiddleware(BaseRequestMiddleware):
+    """Время и ошибки запросов к Bot API по методам (без ожидания в очереди отправки)."""
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Any,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        name = type(method).__name__
+        started = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        except Exception:
+            api_errors.inc(name)
+            raise
+        finally:
+            api_duration.observe(time.perf_counter() - started, name)
+
+
+def create_metrics_app(registry: MetricsRegistry = metrics) -> web.Application:
+    """Приложение aiohttp с GET /metrics."""
+    async def handle(request: web.Request) -> web.Response:
+        return web.Response(text=registry.render(), content_type="text/plain", charset="utf-8",
+                            headers={"X-Content-Type-Options": "nosniff"})
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle)
+    return app
+
+
+async def start_metrics_server(host: str, port: int, registry: MetricsRegistry = metrics) -> Optional[web.AppRunner]:
+    """Запуск HTTP-сервера метрик; None, если port = 0."""
+    if not port:
+        return None
+    runner = web.AppRunner(create_metrics_app(registry))
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    log_info(f"Метрики доступны на http://{host}:{port}/metrics")
+    return runner
@@ -1,7 +1,7 @@
 from typing import Any, Awaitable, Callable, Dict
 from aiogram import BaseMiddleware
 from aiogram.types import Message, CallbackQuery
-from utils.file_operations import get_user_language
+from utils.file_operations import get_user_language_async
 
 
 class LanguageTrackingMiddleware(BaseMiddleware):
@@ -22,8 +22,29 @@ class LanguageTrackingMiddleware(BaseMiddleware):
         user = event.from_user
         if user:
             # Получаем язык пользователя и добавляем его в data
-            language = get_user_language(user.id)
+            language = await get_user_language_async(user.id)
             data["user_language"] = language
         
         # Передаем управление дальше
-        return await handler(event, data) 
\ No newline at end of file
+        return await handler(event, data) 
+
+class SharedStateMiddleware(BaseMiddleware):
+    """
+    Middleware для режима нескольких процессов.
+
+    Перед обработкой каждого обновления перечитывает состояние, которое
+    могли изменить другие процессы (сессии чата, вопросы). Если ничего не
+    менялось, это проверка версий таблиц в пуле ввода-вывода.
+    """
+
+    def __init__(self, refresh: Callable[[], Awaitable[Any]]):
+        self.refresh = refresh
+
+    async def __call__(
+        self,
+        handler: Callable[[Any, Dict[str, Any]], Awaitable[Any]],
+        event: Any,
+        data: Dict[str, Any]
+    ) -> Any:
+        await self.refresh()
+        return await handler(event, data)
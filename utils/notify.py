@@ -0,0 +1,44 @@
+import asyncio
+from typing import Any, Awaitable, Collection, Dict, Mapping
+
+from config import NOTIFY_CONCURRENCY
+from utils.logger import log_error
+from utils.send_scheduler import PRIORITY_DEFAULT, PRIORITY_NOTIFICATION, send_priority
+
+# Общее ограничение на количество одновременных отправок уведомлений
+_semaphore = asyncio.Semaphore(NOTIFY_CONCURRENCY)
+
+
+async def _send(name: str, send: Awaitable[Any]) -> Any:
+    try:
+        return await send
+    except Exception as e:
+        log_error(f"Ошибка при отправке уведомления ({name}): {e}")
+        return e
+
+
+async def _notify(name: str, send: Awaitable[Any]) -> Any:
+    async with _semaphore:
+        with send_priority(PRIORITY_NOTIFICATION):
+            return await _send(name, send)
+
+
+async def _reply(name: str, send: Awaitable[Any]) -> Any:
+    with send_priority(PRIORITY_DEFAULT):
+        return await _send(name, send)
+
+
+async def fan_out(sends: Mapping[str, Awaitable[Any]], interactive: Collection[str] = ()) -> Dict[str, Any]:
+    """
+    Одновременная отправка независимых сообщений.
+
+    Ошибка одной отправки не отменяет остальные: вместо результата для нее
+    возвращается исключение. Возвращает {имя: результат или исключение}.
+    Уведомления уходят с низким приоритетом и под общим ограничением
+    NOTIFY_CONCURRENCY; отправки из interactive (ответ самому пользователю)
+    идут с обычным приоритетом и не ждут уведомлений.
+    """
+    results = await asyncio.gather(*(
+        (_reply if name in interactive else _notify)(name, send) for name, send in sends.items()
+    ))
+    return dict(zip(sends, results))
@@ -0,0 +1,271 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from utils.io_executor import IOExecutor
+from utils.table_versions import table_version, track_changes
+
+
+class QuestionStore:
+    """
+    Хранилище вопросов в SQLite (режим WAL).
+
+    ID выдаются через AUTOINCREMENT, поэтому они растут монотонно и не
+    повторяются даже после перезапуска или удаления вопросов. По статусу,
+    пользователю и администратору построены индексы.
+    """
+
+    def __init__(self, db_path: str = "data/bot.db"):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS questions ("
+            "question_id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "user_id INTEGER NOT NULL, "
+            "admin_id INTEGER, "
+            "status TEXT NOT NULL, "
+            "data TEXT NOT NULL, "
+            "created_at REAL NOT NULL, "
+            "updated_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_questions_status ON questions (status)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_questions_user ON questions (user_id)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_questions_admin ON questions (admin_id)")
+        track_changes(self._conn, "questions")
+
+    def create(self, question_data: Dict[str, Any]) -> str:
+        """Сохранение нового вопроса. Возвращает выданный ID и записывает его в question_data."""
+        now = time.time()
+        with self._lock:
+            with self._conn:
+                self._conn.execute("BEGIN IMMEDIATE")
+                cursor = self._conn.execute(
+                    "INSERT INTO questions (user_id, admin_id, status, data, created_at, updated_at) "
+                    "VALUES (?, ?, ?, '{}', ?, ?)",
+                    (question_data["user_id"], question_data.get("admin_id"), question_data["status"], now, now)
+                )
+                question_id = str(cursor.lastrowid)
+                question_data["question_id"] = question_id
+                self._conn.execute(
+                    "UPDATE questions SET data = ? WHERE question_id = ?",
+                    (json.dumps(question_data, ensure_ascii=False), int(question_id))
+                )
+        return question_id
+
+    def update(self, question_data: Dict[str, Any]) -> None:
+        """Обновление вопроса."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE questions SET admin_id = ?, status = ?, data = ?, updated_at = ? WHERE question_id = ?",
+                (
+                    question_data.get("admin_id"),
+                    question_data["status"],
+                    json.dumps(question_data, ensure_ascii=False),
+                    time.time(),
+                    int(question_data["question_id"])
+                )
+            )
+
+    def get(self, question_id: str) -> Optional[Dict[str, Any]]:
+        """Получение вопроса по ID."""
+        if not str(question_id).isdigit():
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM questions WHERE question_id = ?", (int(question_id),)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def delete(self, question_id: str) -> bool:
+        """Удаление вопроса. False, если вопроса не было."""
+        if not str(question_id).isdigit():
+            return False
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM questions WHERE question_id = ?", (int(question_id),))
+        return cursor.rowcount > 0
+
+    def find(self, status: str = None, user_id: int = None, admin_id: int = None) -> List[Dict[str, Any]]:
+        """Поиск вопросов по статусу, пользователю и/или администратору (по индексам)."""
+        conditions = []
+        params = []
+        for column, value in (("status", status), ("user_id", user_id), ("admin_id", admin_id)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        query = "SELECT data FROM questions"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY question_id"
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def count(self, status: str = None) -> int:
+        """Количество вопросов (всего или с указанным статусом)."""
+        with self._lock:
+            if status is None:
+                return self._conn.execute("SELECT COUNT(*) FROM questions").fetchone()[0]
+            return self._conn.execute("SELECT COUNT(*) FROM questions WHERE status = ?", (status,)).fetchone()[0]
+
+    def version(self) -> int:
+        """Версия таблицы вопросов (растет при любом изменении из любого процесса)."""
+        with self._lock:
+            return table_version(self._conn, "questions")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _add(active: Dict[str, Dict[str, Any]], by_admin: Dict[int, Set[str]], question_data: Dict[str, Any]) -> None:
+    """Неотвеченный вопрос в словарь вопросов и индекс по администраторам."""
+    question_id = question_data["question_id"]
+    active[question_id] = question_data
+    if question_data.get("admin_id") is not None:
+        by_admin.setdefault(question_data["admin_id"], set()).add(question_id)
+
+
+class QuestionRepository:
+    """
+    Вопросы, с которыми идет работа, в памяти поверх QuestionStore.
+
+    В памяти держатся только неотвеченные вопросы; отвеченные архивируются
+    (остаются только в базе). Вторичные индексы - множество ожидающих ответа,
+    вопросы по администраторам и счетчики - обновляются при каждом переходе
+    состояния, поэтому /list и /result не перебирают все вопросы.
+    Операции с базой выполняются в пуле ввода-вывода.
+    """
+
+    def __init__(self, store: QuestionStore, executor: IOExecutor):
+        self.store = store
+        self.executor = executor
+        # Неотвеченные вопросы: {question_id: {data}}
+        self.active: Dict[str, Dict[str, Any]] = {}
+        # Вопросы, которые взял администратор: {admin_id: {question_id}}
+        self.by_admin: Dict[int, Set[str]] = {}
+        self.total = 0
+        self.answered = 0
+        self._version = None
+        # Записи, которые уже изменили вопросы в памяти, но еще не дошли до базы, и всего начатых записей
+        self._pending_writes = 0
+        self._writes = 0
+
+    async def _write(self, func: Callable[..., Any], *args) -> Any:
+        """Запись в базу в пуле ввода-вывода с учетом незавершенных записей."""
+        self._pending_writes += 1
+        self._writes += 1
+        try:
+            return await self.executor.run(func, *args)
+        finally:
+            self._pending_writes -= 1
+
+    def _index(self, question_data: Dict[str, Any]) -> None:
+        """Добавление неотвеченного вопроса во вторичные индексы."""
+        # Своя копия: изменения вопроса у вызывающего не должны расходиться с индексами до save
+        _add(self.active, self.by_admin, dict(question_data))
+
+    def _unindex(self, question_id: str) -> Optional[Dict[str, Any]]:
+        """Удаление вопроса из памяти и вторичных индексов."""
+        question_data = self.active.pop(question_id, None)
+        if question_data is not None and question_data.get("admin_id") is not None:
+            bucket = self.by_admin.get(question_data["admin_id"])
+            if bucket is not None:
+                bucket.discard(question_id)
+                if not bucket:
+                    del self.by_admin[question_data["admin_id"]]
+        return question_data
+
+    def _read(self) -> Tuple[int, Dict[str, Dict[str, Any]], Dict[int, Set[str]], int, int]:
+        """Версия таблицы, неотвеченные вопросы с индексом по администраторам и счетчики из базы."""
+        active: Dict[str, Dict[str, Any]] = {}
+        by_admin: Dict[int, Set[str]] = {}
+        version = self.store.version()
+        for question_data in self.store.find(status="pending"):
+            _add(active, by_admin, question_data)
+        return version, active, by_admin, self.store.count(), self.store.count("answered")
+
+    def load_pending(self) -> int:
+        """Загрузка неотвеченных вопросов и счетчиков из базы. Возвращает количество вопросов."""
+        self._version, self.active, self.by_admin, self.total, self.answered = self._read()
+        return len(self.active)
+
+    async def refresh(self, version: Optional[int] = None) -> bool:
+        """
+        Перечитывание вопросов, если таблицу изменили. True, если вопросы перечитаны.
+
+        version - уже прочитанная версия таблицы. Вопросы и счетчики читаются
+        в пуле ввода-вывода и подменяются целиком. Пока собственные записи не
+        дошли до базы или если они начались за время чтения, перечитывание
+        откладывается до следующего вызова.
+        """
+        if self._pending_writes:
+            return False
+        if version is None:
+            version = await self.executor.run(self.store.version)
+        if version == self._version or self._pending_writes:
+            return False
+        writes = self._writes
+        snapshot = await self.executor.run(self._read)
+        if self._pending_writes or self._writes != writes:
+            return False
+        self._version, self.active, self.by_admin, self.total, self.answered = snapshot
+        return True
+
+    async def create(self, question_data: Dict[str, Any]) -> str:
+        """Сохранение нового вопроса с выдачей ID."""
+        question_id = await self._write(self.store.create, question_data)
+        self.total += 1
+        self._index(question_data)
+        return question_id
+
+    async def save(self, question_data: Dict[str, Any]) -> None:
+        """Сохранение изменений вопроса с обновлением индексов."""
+        question_id = question_data["question_id"]
+        previous = self._unindex(question_id)
+        if question_data["status"] == "answered":
+            # Отвеченный вопрос уходит в архив (остается только в базе)
+            if previous is not None:
+                self.answered += 1
+        else:
+            self._index(question_data)
+        await self._write(self.store.update, dict(question_data))
+
+    async def get(self, question_id: str) -> Optional[Dict[str, Any]]:
+        """Получение копии вопроса из памяти или из архива в базе (изменения сохраняются через save)."""
+        question_data = self.active.get(question_id)
+        if question_data is None:
+            return await self.executor.run(self.store.get, question_id)
+        return dict(question_data)
+
+    async def delete(self, question_id: str) -> bool:
+        """Удаление вопроса."""
+        question_data = self._unindex(question_id)
+        if question_data is None:
+            question_data = await self.executor.run(self.store.get, question_id)
+        deleted = await self._write(self.store.delete, question_id)
+        if deleted:
+            self.total -= 1
+            if question_data is not None and question_data["status"] == "answered":
+                self.answered -= 1
+        return deleted
+
+    def pending(self) -> List[Dict[str, Any]]:
+        """Неотвеченные вопросы в порядке поступления."""
+        return list(self.active.values())
+
+    def assigned_to(self, admin_id: int) -> List[Dict[str, Any]]:
+        """Неотвеченные вопросы, которые взял администратор."""
+        return [self.active[question_id] for question_id in self.by_admin.get(admin_id, ())]
+
+    def counts(self) -> Dict[str, int]:
+        """Общее количество вопросов, отвеченных и ожидающих ответа."""
+        return {"total": self.total, "answered": self.answered, "pending": len(self.active)}
@@ -0,0 +1,81 @@
+import asyncio
+import itertools
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set, Tuple
+
+from config import RELAY_QUEUE_SIZE
+from utils.logger import log_error
+from utils.tracing import Span, attach, current_span, trace_span
+
+# Задача доставки одного сообщения
+RelayJob = Callable[[], Awaitable[Any]]
+
+
+class RelayQueues:
+    """
+    Упорядоченная доставка сообщений живого чата.
+
+    На каждую пару (направление, сессия) заводится ограниченная очередь и
+    один обработчик, поэтому сообщения одного пользователя уходят строго по
+    очереди, даже если обновления обрабатываются параллельно. Внутри очереди
+    сообщения упорядочены по message_id. Когда очередь полна, обработчик
+    обновления ждет (backpressure). Опустевшая очередь удаляется вместе с
+    обработчиком, так что неактивные сессии ничего не занимают. Доставка
+    попадает в трассировку обновления, которое поставило сообщение в очередь.
+    """
+
+    def __init__(self, maxsize: int = 50):
+        self.maxsize = maxsize
+        self._queues: Dict[Hashable, asyncio.PriorityQueue] = {}
+        self._workers: Set[asyncio.Task] = set()
+        self._counter = itertools.count()
+        self.max_depth = 0
+        self.delivered = 0
+
+    async def submit(self, key: Hashable, message_id: int, job: RelayJob) -> None:
+        """Постановка сообщения в очередь сессии key."""
+        queue = self._queues.get(key)
+        if queue is None:
+            queue = asyncio.PriorityQueue(self.maxsize)
+            self._queues[key] = queue
+            worker = asyncio.create_task(self._worker(key, queue))
+            self._workers.add(worker)
+            worker.add_done_callback(self._workers.discard)
+        item: Tuple[int, int, RelayJob, Optional[Span]] = (message_id, next(self._counter), job, current_span())
+        await queue.put(item)
+        self.max_depth = max(self.max_depth, queue.qsize())
+
+    async def _worker(self, key: Hashable, queue: asyncio.PriorityQueue) -> None:
+        # Даем накопиться сообщениям, пришедшим почти одновременно, чтобы упорядочить их
+        await asyncio.sleep(0)
+        while True:
+            try:
+                _, _, job, span = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                # Между проверкой и удалением нет await, новые сообщения создадут новый обработчик
+                del self._queues[key]
+                return
+            try:
+                with attach(span), trace_span("relay.deliver", queue=str(key)):
+                    await job()
+            except Exception as e:
+                log_error(f"Ошибка доставки сообщения чата {key}: {e}", exc_info=True)
+            finally:
+                self.delivered += 1
+
+    async def drain(self, timeout: float) -> None:
+        """Ожидание доставки сообщений, уже поставленных в очереди (не дольше timeout)."""
+        if self._workers:
+            await asyncio.wait(set(self._workers), timeout=timeout)
+
+    def stats(self) -> Dict[str, int]:
+        """Количество активных очередей, сообщений в них и максимальная глубина."""
+        return {
+            "active": len(self._queues),
+            "queued": sum(queue.qsize() for queue in self._queues.values()),
+            "max_depth": self.max_depth,
+            "delivered": self.delivered
+        }
+
+
+# Общие очереди пересылки сообщений чата
+relay_queues = RelayQueues(RELAY_QUEUE_SIZE)
@@ -0,0 +1,247 @@
+import asyncio
+import contextlib
+import contextvars
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterator, Optional
+
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+
+from config import SEND_GLOBAL_RATE, SEND_CHAT_RATE, SEND_GROUP_RATE_PER_MINUTE, SEND_MAX_RETRIES
+from utils.logger import log_info
+from utils.tracing import annotate
+
+# Приоритеты исходящих сообщений (меньше - важнее)
+PRIORITY_CHAT = 0
+PRIORITY_DEFAULT = 1
+PRIORITY_NOTIFICATION = 2
+
+# Методы API, на которые действуют ограничения Telegram на отправку в чат
+LIMITED_PREFIXES = ("Send", "Copy", "Forward", "Edit")
+
+# Приоритет отправок текущей задачи
+_priority: contextvars.ContextVar[int] = contextvars.ContextVar("send_priority", default=PRIORITY_DEFAULT)
+
+
+@contextlib.contextmanager
+def send_priority(priority: int) -> Iterator[None]:
+    """Приоритет всех отправок внутри блока with."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class TokenBucket:
+    """Ведро токенов: rate токенов в секунду, не больше capacity про запас."""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated", "paused_until")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Через сколько секунд появится токен (0, если уже есть)."""
+        if now < self.paused_until:
+            return self.paused_until - now
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self, now: float) -> None:
+        self._refill(now)
+        self.tokens -= 1
+
+    def pause(self, until: float) -> None:
+        """Запрет отправки до указанного момента (после flood wait)."""
+        self.paused_until = max(self.paused_until, until)
+        self.tokens = 0
+
+    def is_idle(self, now: float) -> bool:
+        """Ведро полное и без паузы - его можно забыть."""
+        self._refill(now)
+        return self.tokens >= self.capacity and now >= self.paused_until
+
+
+class _Waiter:
+    __slots__ = ("chat_key", "future", "enqueued_at")
+
+    def __init__(self, chat_key: str, future: asyncio.Future):
+        self.chat_key = chat_key
+        self.future = future
+        self.enqueued_at = time.monotonic()
+
+
+class SendScheduler(BaseRequestMiddleware):
+    """
+    Очередь исходящих запросов к Telegram с ограничением скорости.
+
+    Подключается как middleware сессии бота, поэтому через нее проходят все
+    send_*/copy_*/edit_* вызовы. Запрос получает разрешение, когда есть
+    токен в общем ведре бота и в ведре чата (личные чаты и группы имеют свои
+    лимиты). Ожидающие запросы обслуживаются по приоритету: сообщения живого
+    чата раньше уведомлений. На 429 чат ставится на паузу retry_after, и
+    запрос повторяется.
+    """
+
+    def __init__(self, global_rate: float = 30, chat_rate: float = 1, group_rate_per_minute: float = 20,
+                 max_retries: int = 3, max_idle_buckets: int = 10000):
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self.chat_rate = chat_rate
+        self.group_rate = group_rate_per_minute / 60
+        self.group_capacity = group_rate_per_minute
+        self.max_retries = max_retries
+        self.max_idle_buckets = max_idle_buckets
+        self._chat_buckets: Dict[str, TokenBucket] = {}
+        self._queues: Dict[int, Deque[_Waiter]] = {
+            priority: deque() for priority in (PRIORITY_CHAT, PRIORITY_DEFAULT, PRIORITY_NOTIFICATION)
+        }
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        # Метрики
+        self.acquired = 0
+        self.sent = 0
+        self.retries = 0
+        self.flood_waits = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _chat_bucket(self, chat_key: str) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_key)
+        if bucket is None:
+            if len(self._chat_buckets) >= self.max_idle_buckets:
+                now = time.monotonic()
+                self._chat_buckets = {
+                    key: value for key, value in self._chat_buckets.items() if not value.is_idle(now)
+                }
+            if chat_key.startswith("-"):
+                bucket = TokenBucket(self.group_rate, self.group_capacity)
+            else:
+                bucket = TokenBucket(self.chat_rate, max(1.0, self.chat_rate * 3))
+            self._chat_buckets[chat_key] = bucket
+        return bucket
+
+    def _grant(self, now: float) -> Optional[float]:
+        """Выдача разрешений ожидающим. Возвращает время до следующей попытки или None, если очередь пуста."""
+        next_try = None
+        for queue in self._queues.values():
+            for waiter in list(queue):
+                if waiter.future.done():
+                    queue.remove(waiter)
+                    continue
+                global_wait = self.global_bucket.wait_time(now)
+                if global_wait > 0:
+                    return global_wait
+                chat_bucket = self._chat_bucket(waiter.chat_key)
+                chat_wait = chat_bucket.wait_time(now)
+                if chat_wait > 0:
+                    next_try = chat_wait if next_try is None else min(next_try, chat_wait)
+                    continue
+                self.global_bucket.take(now)
+                chat_bucket.take(now)
+                queue.remove(waiter)
+                waiter.future.set_result(None)
+        return next_try
+
+    async def _dispatch(self) -> None:
+        while True:
+            self._wakeup.clear()
+            delay = self._grant(time.monotonic())
+            if delay is None:
+                await self._wakeup.wait()
+            else:
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+
+    async def acquire(self, chat_id: Any, priority: int = PRIORITY_DEFAULT) -> float:
+        """Ожидание разрешения на отправку в чат. Возвращает время ожидания (секунды)."""
+        chat_key = str(chat_id)
+        # Без очереди и при свободных токенах отправляем сразу
+        if not any(self._queues.values()):
+            now = time.monotonic()
+            chat_bucket = self._chat_bucket(chat_key)
+            if self.global_bucket.wait_time(now) == 0 and chat_bucket.wait_time(now) == 0:
+                self.global_bucket.take(now)
+                chat_bucket.take(now)
+                self.acquired += 1
+                return 0.0
+
+        if self._dispatcher is None or self._dispatcher.done():
+            self._wakeup = asyncio.Event()
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        waiter = _Waiter(chat_key, asyncio.get_running_loop().create_future())
+        self._queues[priority].append(waiter)
+        self._wakeup.set()
+        await waiter.future
+        waited = time.monotonic() - waiter.enqueued_at
+        self.acquired += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        return waited
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Any,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        chat_id = getattr(method, "chat_id", None)
+        if chat_id is None or not type(method).__name__.startswith(LIMITED_PREFIXES):
+            return await make_request(bot, method)
+
+        priority = _priority.get()
+        attempt = 0
+        while True:
+            waited = await self.acquire(chat_id, priority)
+            if waited:
+                annotate(send_queue_ms=round(waited * 1000, 3))
+            try:
+                response = await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                self.flood_waits += 1
+                self._chat_bucket(str(chat_id)).pause(time.monotonic() + e.retry_after)
+                if attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                self.retries += 1
+                log_info(f"Flood wait {e.retry_after}s for chat {chat_id}, retry {attempt}/{self.max_retries}")
+                continue
+            self.sent += 1
+            return response
+
+    def stats(self) -> Dict[str, Any]:
+        """Длина очереди по приоритетам, время ожидания и количество flood wait."""
+        return {
+            "queue_chat": len(self._queues[PRIORITY_CHAT]),
+            "queue_default": len(self._queues[PRIORITY_DEFAULT]),
+            "queue_notification": len(self._queues[PRIORITY_NOTIFICATION]),
+            "sent": self.sent,
+            "retries": self.retries,
+            "flood_waits": self.flood_waits,
+            "avg_wait_ms": round(self.total_wait / self.acquired * 1000, 3) if self.acquired else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 3)
+        }
+
+    async def close(self) -> None:
+        """Остановка диспетчера очереди."""
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._dispatcher
+
+
+# Общий планировщик отправок
+send_scheduler = SendScheduler(SEND_GLOBAL_RATE, SEND_CHAT_RATE, SEND_GROUP_RATE_PER_MINUTE, SEND_MAX_RETRIES)
@@ -0,0 +1,270 @@
+import asyncio
+import contextlib
+import json
+import os
+import secrets
+import signal
+import sys
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+from aiohttp import web
+from aiogram import Bot
+
+from config import (
+    SEND_GLOBAL_RATE, SEND_GROUP_RATE_PER_MINUTE, WEBHOOK_PATH, WEBHOOK_HOST, WEBHOOK_PORT, WEBHOOK_URL,
+    WEBHOOK_SECRET, WORKER_BASE_PORT, WORKER_FORWARD_ATTEMPTS, SHUTDOWN_TIMEOUT
+)
+from utils.logger import log_info, log_error
+
+# Таймаут long polling главного процесса (секунды)
+POLLING_TIMEOUT = 30
+# Пауза перед повторной передачей обновления процессу: удваивается с каждой попыткой до предела (секунды)
+FORWARD_RETRY_DELAY = 0.5
+FORWARD_RETRY_MAX_DELAY = 10
+
+
+def shard_key(update: Dict[str, Any]) -> int:
+    """ID пользователя, от которого пришло обновление (0, если его нет)."""
+    for name, event in update.items():
+        if name == "update_id" or not isinstance(event, dict):
+            continue
+        for field in ("from", "user", "chat"):
+            owner = event.get(field)
+            if isinstance(owner, dict) and isinstance(owner.get("id"), int):
+                return owner["id"]
+    return 0
+
+
+class Worker:
+    """Процесс-обработчик: бот в режиме вебхука на 127.0.0.1 и очередь обновлений для него."""
+
+    def __init__(self, index: int, script: str, secret: str, workers: int):
+        self.index = index
+        self.script = script
+        self.secret = secret
+        self.port = WORKER_BASE_PORT + index
+        self.url = f"http://127.0.0.1:{self.port}{WEBHOOK_PATH}"
+        self.env = dict(
+            os.environ,
+            WORKER_ID=str(index + 1),
+            BOT_MODE="webhook",
+            WEBHOOK_HOST="127.0.0.1",
+            WEBHOOK_PORT=str(self.port),
+            WEBHOOK_URL="",
+            WEBHOOK_SECRET=secret,
+            CHAT_SESSIONS_PERSIST="true",
+            # Лимиты Telegram общие для бота, поэтому делятся между процессами
+            SEND_GLOBAL_RATE=str(SEND_GLOBAL_RATE / workers),
+            SEND_GROUP_RATE_PER_MINUTE=str(SEND_GROUP_RATE_PER_MINUTE / workers)
+        )
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.forwarded = 0
+        self.dropped = 0
+        self.restarts = 0
+
+    async def start(self) -> None:
+        self.process = await asyncio.create_subprocess_exec(sys.executable, self.script, env=self.env)
+        log_info(f"Процесс-обработчик {self.index + 1} запущен (PID {self.process.pid}, порт {self.port})")
+
+    async def supervise(self) -> None:
+        """Перезапуск процесса, если он завершился сам."""
+        while True:
+            code = await self.process.wait()
+            log_error(f"Процесс-обработчик {self.index + 1} завершился с кодом {code}, перезапуск")
+            self.restarts += 1
+            await asyncio.sleep(1)
+            await self.start()
+
+    async def forward(self, session: aiohttp.ClientSession) -> None:
+        """
+        Передача обновлений процессу строго по очереди.
+
+        Если процесс недоступен (запускается, перезапускается) или отвечает
+        5xx, передача повторяется с растущей паузой. После
+        WORKER_FORWARD_ATTEMPTS неудачных попыток обновление отбрасывается,
+        чтобы одно обновление не держало очередь пользователя бесконечно.
+        """
+        while True:
+            body = await self.queue.get()
+            if await self.deliver(session, body):
+                self.forwarded += 1
+            else:
+                self.dropped += 1
+                log_error(f"Процесс-обработчик {self.index + 1}: обновление отброшено после "
+                          f"{WORKER_FORWARD_ATTEMPTS} попыток ({len(body)} байт)")
+            self.queue.task_done()
+
+    async def deliver(self, session: aiohttp.ClientSession, body: bytes) -> bool:
+        """Одно обновление с повторами. False, если все попытки не удались."""
+        headers = {"X-Telegram-Bot-Api-Secret-Token": self.secret, "Content-Type": "application/json"}
+        for attempt in range(WORKER_FORWARD_ATTEMPTS):
+            try:
+                async with session.post(self.url, data=body, headers=headers) as response:
+                    if response.status < 500:
+                        return True
+                    reason = f"HTTP {response.status}"
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                reason = str(e) or type(e).__name__
+            if attempt == 0:
+                log_error(f"Процесс-обработчик {self.index + 1} недоступен ({reason}), повтор")
+            if attempt + 1 < WORKER_FORWARD_ATTEMPTS:
+                await asyncio.sleep(min(FORWARD_RETRY_DELAY * 2 ** attempt, FORWARD_RETRY_MAX_DELAY))
+        return False
+
+    async def stop(self, timeout: float) -> None:
+        """Остановка процесса (SIGTERM, через timeout - SIGKILL)."""
+        if self.process is None or self.process.returncode is not None:
+            return
+        self.process.terminate()
+        try:
+            await asyncio.wait_for(self.process.wait(), timeout)
+        except asyncio.TimeoutError:
+            self.process.kill()
+            await self.process.wait()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "worker": self.index + 1,
+            "pid": self.process.pid if self.process else None,
+            "alive": self.process is not None and self.process.returncode is None,
+            "queued": self.queue.qsize(),
+            "forwarded": self.forwarded,
+            "dropped": self.dropped,
+            "restarts": self.restarts
+        }
+
+
+class ShardRouter:
+    """
+    Главный процесс режима нескольких обработчиков.
+
+    Принимает обновления (long polling или вебхук) и передает каждое
+    процессу-обработчику user_id % N. Все обновления одного пользователя
+    попадают в один процесс и приходят в нем по порядку. Состояние, общее
+    для пользователя и администратора (сессии чата, вопросы, FSM), процессы
+    читают из общей базы.
+    """
+
+    def __init__(self, script: str, workers: int):
+        secret = secrets.token_urlsafe(32)
+        self.workers = [Worker(index, script, secret, workers) for index in range(workers)]
+        self.received = 0
+        self.rejected = 0
+
+    def route(self, update: Dict[str, Any], body: bytes) -> None:
+        """Постановка обновления в очередь процесса пользователя."""
+        self.received += 1
+        self.workers[abs(shard_key(update)) % len(self.workers)].queue.put_nowait(body)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"received": self.received, "rejected": self.rejected, "workers": [worker.stats() for worker in self.workers]}
+
+    async def poll(self, bot: Bot, allowed_updates: List[str]) -> None:
+        """Получение обновлений через getUpdates."""
+        # Вебхук, оставшийся от работы в режиме webhook, мешает getUpdates
+        await bot.delete_webhook()
+        offset = None
+        while True:
+            try:
+                updates = await bot.get_updates(offset=offset, timeout=POLLING_TIMEOUT, allowed_updates=allowed_updates)
+            except Exception as e:
+                log_error(f"Ошибка получения обновлений: {e}")
+                await asyncio.sleep(1)
+                continue
+            for update in updates:
+                data = update.model_dump(mode="json", exclude_none=True, by_alias=True)
+                self.route(data, json.dumps(data).encode())
+                offset = update.update_id + 1
+
+    def create_app(self, secret: str) -> web.Application:
+        """
+        Приложение вебхука главного процесса; GET /health показывает состояние процессов.
+
+        Запросы без секрета отклоняются (401). Тело, которое не является
+        обновлением, отклоняется с 400: на ответ 5xx Telegram повторял бы
+        такое обновление бесконечно.
+        """
+        if not secret:
+            raise ValueError("Для вебхука нужен секрет (WEBHOOK_SECRET)")
+
+        async def handle(request: web.Request) -> web.Response:
+            if not secrets.compare_digest(request.headers.get("X-Telegram-Bot-Api-Secret-Token", ""), secret):
+                return web.Response(body="Unauthorized", status=401)
+            body = await request.read()
+            try:
+                update = json.loads(body)
+                if not isinstance(update, dict) or not isinstance(update.get("update_id"), int):
+                    raise ValueError("нет update_id")
+            except ValueError as e:
+                self.rejected += 1
+                log_error(f"Вебхук: отклонено некорректное обновление ({e}), {len(body)} байт")
+                return web.Response(body="Bad Request", status=400)
+            self.route(update, body)
+            return web.json_response({})
+
+        async def health(request: web.Request) -> web.Response:
+            return web.json_response({"status": "ok", **self.stats()})
+
+        app = web.Application()
+        app.router.add_post(WEBHOOK_PATH, handle)
+        app.router.add_get("/health", health)
+        return app
+
+    async def serve(self, bot: Bot, allowed_updates: List[str], secret: str) -> web.AppRunner:
+        """Прием обновлений на вебхук (при заданном WEBHOOK_URL - с регистрацией в Telegram)."""
+        runner = web.AppRunner(self.create_app(secret))
+        await runner.setup()
+        await web.TCPSite(runner, WEBHOOK_HOST, WEBHOOK_PORT).start()
+        log_info(f"Вебхук слушает {WEBHOOK_HOST}:{WEBHOOK_PORT}{WEBHOOK_PATH}")
+        if WEBHOOK_URL:
+            await bot.set_webhook(WEBHOOK_URL.rstrip("/") + WEBHOOK_PATH, secret_token=secret,
+                                  allowed_updates=allowed_updates)
+            log_info(f"Вебхук зарегистрирован: {WEBHOOK_URL.rstrip('/')}{WEBHOOK_PATH}")
+        return runner
+
+    async def run(self, bot: Bot, mode: str, allowed_updates: List[str]) -> None:
+        """Запуск процессов и прием обновлений до SIGINT/SIGTERM."""
+        secret = ""
+        if mode == "webhook":
+            # Как и в режиме одного процесса: без WEBHOOK_URL секрет должен быть задан явно
+            secret = WEBHOOK_SECRET or (secrets.token_urlsafe(32) if WEBHOOK_URL else "")
+            if not secret:
+                raise ValueError("Режим webhook без WEBHOOK_URL требует WEBHOOK_SECRET")
+        for worker in self.workers:
+            await worker.start()
+        session = aiohttp.ClientSession()
+        tasks = []
+        for worker in self.workers:
+            tasks.append(asyncio.create_task(worker.supervise()))
+            tasks.append(asyncio.create_task(worker.forward(session)))
+
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            with contextlib.suppress(NotImplementedError):
+                loop.add_signal_handler(sig, stop.set)
+
+        runner = None
+        if mode == "webhook":
+            runner = await self.serve(bot, allowed_updates, secret)
+        else:
+            tasks.append(asyncio.create_task(self.poll(bot, allowed_updates)))
+        log_info(f"Главный процесс распределяет обновления по {len(self.workers)} процессам ({mode})")
+        try:
+            await stop.wait()
+        finally:
+            log_info("Остановка: передача принятых обновлений процессам-обработчикам")
+            if runner is not None:
+                await runner.cleanup()
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(
+                    asyncio.gather(*(worker.queue.join() for worker in self.workers)), SHUTDOWN_TIMEOUT
+                )
+            for task in tasks:
+                task.cancel()
+            # Процессы сами дожидаются обработки принятых обновлений (SHUTDOWN_TIMEOUT)
+            await asyncio.gather(*(worker.stop(SHUTDOWN_TIMEOUT + 5) for worker in self.workers))
+            await session.close()
+            log_info(f"Главный процесс: {self.stats()}")
@@ -0,0 +1,24 @@
+import sqlite3
+
+
+def track_changes(conn: sqlite3.Connection, table: str) -> None:
+    """
+    Счетчик изменений таблицы, общий для всех процессов, открывших базу.
+
+    Триггеры увеличивают версию при каждой вставке, изменении и удалении
+    строки, поэтому процесс может дешево проверить, не изменил ли таблицу
+    кто-то другой, и перечитать ее только в этом случае.
+    """
+    conn.execute("CREATE TABLE IF NOT EXISTS table_versions (name TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+    conn.execute("INSERT OR IGNORE INTO table_versions (name, version) VALUES (?, 0)", (table,))
+    for operation in ("INSERT", "UPDATE", "DELETE"):
+        conn.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {table}_{operation.lower()}_version AFTER {operation} ON {table} "
+            f"BEGIN UPDATE table_versions SET version = version + 1 WHERE name = '{table}'; END"
+        )
+
+
+def table_version(conn: sqlite3.Connection, table: str) -> int:
+    """Текущая версия таблицы."""
+    row = conn.execute("SELECT version FROM table_versions WHERE name = ?", (table,)).fetchone()
+    return row[0] if row else 0
@@ -0,0 +1,262 @@
+import contextlib
+import contextvars
+import itertools
+import json
+import logging
+import os
+import time
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import Update
+
+from config import TRACING, TRACE_MIN_DURATION_MS
+from utils.logger import current_trace_id, span_logger
+
+# Спан, внутри которого выполняется текущая задача
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("span", default=None)
+
+
+class Trace:
+    """Спаны одного обновления; выгружаются вместе, когда завершается корневой спан."""
+
+    __slots__ = ("tracer", "trace_id", "spans", "closed", "exported")
+
+    def __init__(self, tracer: "Tracer"):
+        self.tracer = tracer
+        self.trace_id = os.urandom(8).hex()
+        self.spans: List["Span"] = []
+        self.closed = False
+        self.exported = False
+
+    def finish(self, span: "Span") -> None:
+        if self.closed:
+            # Спан из фоновой задачи (пересылка чата), завершившийся после обновления
+            if self.exported:
+                self.tracer.exporter.export([span])
+            return
+        self.spans.append(span)
+        if span.parent_id is None:
+            self.closed = True
+            self.exported = span.duration >= self.tracer.min_duration
+            self.tracer.finished(self)
+
+
+class Span:
+    """Участок обработки обновления: имя, начало, длительность и атрибуты."""
+
+    __slots__ = ("trace", "span_id", "parent_id", "name", "attributes", "start", "duration", "error",
+                 "_started", "_token", "_trace_token")
+
+    def __init__(self, trace: Trace, span_id: int, parent_id: Optional[int], name: str, attributes: Dict[str, Any]):
+        self.trace = trace
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes
+        self.start = 0.0
+        self.duration = 0.0
+        self.error = None
+
+    def __enter__(self) -> "Span":
+        self.start = time.time()
+        self._started = time.perf_counter()
+        self._token = _current_span.set(self)
+        self._trace_token = current_trace_id.set(self.trace.trace_id) if self.parent_id is None else None
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.duration = time.perf_counter() - self._started
+        if exc_type is not None:
+            self.error = exc_type.__name__
+        _current_span.reset(self._token)
+        if self._trace_token is not None:
+            current_trace_id.reset(self._trace_token)
+        self.trace.finish(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        span = {
+            "trace_id": self.trace.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": round(self.start, 6),
+            "duration_ms": round(self.duration * 1000, 3)
+        }
+        if self.attributes:
+            span["attributes"] = self.attributes
+        if self.error:
+            span["error"] = self.error
+        return span
+
+
+class FileSpanExporter:
+    """
+    Запись спанов строками JSON в журнал спанов (logs/spans_ГГГГ-ММ-ДД.jsonl).
+
+    Спаны преобразуются в JSON и пишутся в фоновом потоке логов, цикл
+    событий только ставит одну запись на трассировку в очередь.
+    """
+
+    def __init__(self, log: logging.Logger = span_logger):
+        self.log = log
+
+    def export(self, spans: List[Span]) -> None:
+        self.log.info("spans", extra={"items": spans})
+
+
+class Tracer:
+    """
+    Трассировка обработки обновлений.
+
+    Корневой спан открывается на каждое обновление, вложенные - вокруг
+    обработчика, операций ввода-вывода, FSM-хранилища и запросов к Bot API.
+    Вне трассировки (или при выключенной трассировке) span() ничего не делает.
+    Трассировки короче min_duration секунд не записываются.
+    """
+
+    def __init__(self, exporter: FileSpanExporter, enabled: bool = True, min_duration: float = 0.0):
+        self.exporter = exporter
+        self.enabled = enabled
+        self.min_duration = min_duration
+        self._ids = itertools.count(1)
+        # Метрики
+        self.traces = 0
+        self.exported = 0
+        self.spans = 0
+
+    def trace(self, name: str, **attributes: Any) -> contextlib.AbstractContextManager:
+        """Корневой спан новой трассировки."""
+        if not self.enabled:
+            return contextlib.nullcontext()
+        return Span(Trace(self), next(self._ids), None, name, attributes)
+
+    def span(self, name: str, **attributes: Any) -> contextlib.AbstractContextManager:
+        """Вложенный спан текущей трассировки."""
+        parent = _current_span.get()
+        if parent is None:
+            return contextlib.nullcontext()
+        return Span(parent.trace, next(self._ids), parent.span_id, name, attributes)
+
+    def finished(self, trace: Trace) -> None:
+        self.traces += 1
+        self.spans += len(trace.spans)
+        if trace.exported:
+            self.exported += 1
+            self.exporter.export(trace.spans)
+        trace.spans = []
+
+    def stats(self) -> Dict[str, int]:
+        """Количество трассировок, записанных трассировок и спанов."""
+        return {"traces": self.traces, "exported": self.exported, "spans": self.spans}
+
+
+# Общий трассировщик
+tracer = Tracer(FileSpanExporter(), TRACING, TRACE_MIN_DURATION_MS / 1000)
+
+
+def trace_span(name: str, **attributes: Any) -> contextlib.AbstractContextManager:
+    """Вложенный спан текущей трассировки (with trace_span("имя"): ...)."""
+    return tracer.span(name, **attributes)
+
+
+def annotate(**attributes: Any) -> None:
+    """Атрибуты текущего спана."""
+    span = _current_span.get()
+    if span is not None:
+        span.attributes.update(attributes)
+
+
+def current_span() -> Optional[Span]:
+    """Текущий спан (например, чтобы продолжить трассировку в фоновой задаче)."""
+    return _current_span.get()
+
+
+@contextlib.contextmanager
+def attach(span: Optional[Span]) -> Iterator[None]:
+    """Продолжение трассировки span в другой задаче: вложенные спаны и строки лога получат ее ID."""
+    if span is None:
+        yield
+        return
+    token = _current_span.set(span)
+    trace_token = current_trace_id.set(span.trace.trace_id)
+    try:
+        yield
+    finally:
+        current_trace_id.reset(trace_token)
+        _current_span.reset(token)
+
+
+class TracingMiddleware(BaseMiddleware):
+    """
+    Middleware трассировки.
+
+    Как внешний middleware dp.update открывает корневой спан обновления
+    (в него входят все остальные middleware, фильтры и обработчик), как
+    middleware message/callback_query - спан обработчика.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[Any, Dict[str, Any]], Awaitable[Any]],
+        event: Any,
+        data: Dict[str, Any]
+    ) -> Any:
+        if isinstance(event, Update):
+            user = data.get("event_from_user")
+            span = tracer.trace(f"update.{event.event_type}", update_id=event.update_id,
+                                user_id=user.id if user else None)
+        else:
+            handler_object = data.get("handler")
+            span = tracer.span(f"handler.{handler_object.callback.__name__ if handler_object else 'unknown'}")
+        with span:
+            return await handler(event, data)
+
+
+class TracingRequestMiddleware(BaseRequestMiddleware):
+    """Спан запроса к Bot API (вместе с ожиданием в очереди отправки)."""
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Any,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        with tracer.span(f"api.{type(method).__name__}"):
+            return await make_request(bot, method)
+
+
+def fold_spans(lines: Iterable[str]) -> Dict[str, float]:
+    """
+    Свертка спанов в стеки для флейм-графа: {"update.message;handler.x;api.SendMessage": мкс}.
+
+    Значение стека - собственное время спана (без вложенных), поэтому
+    результат подходит для flamegraph.pl, speedscope и аналогов.
+    """
+    spans: Dict[tuple, Dict[str, Any]] = {}
+    for line in lines:
+        line = line.strip()
+        if line:
+            span = json.loads(line)
+            spans[(span["trace_id"], span["span_id"])] = span
+
+    children: Dict[tuple, float] = defaultdict(float)
+    for span in spans.values():
+        if span["parent_id"] is not None:
+            children[(span["trace_id"], span["parent_id"])] += span["duration_ms"]
+
+    folded: Dict[str, float] = defaultdict(float)
+    for key, span in spans.items():
+        stack = [span["name"]]
+        parent = spans.get((span["trace_id"], span["parent_id"]))
+        while parent is not None:
+            stack.append(parent["name"])
+            parent = spans.get((parent["trace_id"], parent["parent_id"]))
+        # Фоновые спаны могут пережить родителя, тогда собственное время не меньше 0
+        self_time = max(0.0, span["duration_ms"] - children[key])
+        folded[";".join(reversed(stack))] += self_time * 1000
+    return folded
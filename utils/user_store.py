@@ -0,0 +1,189 @@
+import glob
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional
+
+from utils.logger import log_warning
+
+
+class UserStore:
+    """
+    Базовый интерфейс хранилища пользовательских данных.
+
+    Метод version возвращает "версию" записи, по которой кэш в file_operations
+    определяет, что данные изменились в обход бота.
+    """
+
+    def load(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """Загрузка данных пользователя. None, если пользователя нет."""
+        raise NotImplementedError
+
+    def save(self, user_id: int, data: Dict[str, Any]) -> None:
+        """Сохранение данных пользователя."""
+        raise NotImplementedError
+
+    def version(self, user_id: int) -> Any:
+        """Текущая версия записи пользователя."""
+        raise NotImplementedError
+
+    def user_ids(self) -> Iterable[int]:
+        """Все ID пользователей в хранилище."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Освобождение ресурсов хранилища."""
+
+
+class JsonUserStore(UserStore):
+    """Хранилище в виде отдельного файла data/{user_id}.json на каждого пользователя."""
+
+    def __init__(self, directory: str = "data"):
+        self.directory = directory
+
+    def path(self, user_id: int) -> str:
+        """Путь к файлу пользователя."""
+        return os.path.join(self.directory, f"{user_id}.json")
+
+    def load(self, user_id: int) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.path(user_id), 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return None
+
+    def save(self, user_id: int, data: Dict[str, Any]) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.path(user_id), 'w', encoding='utf-8') as file:
+            json.dump(data, file, ensure_ascii=False, indent=4)
+
+    def version(self, user_id: int) -> Any:
+        # mtime и размер файла; None, если файла нет
+        try:
+            stat = os.stat(self.path(user_id))
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def user_ids(self) -> Iterable[int]:
+        for file_path in glob.glob(os.path.join(self.directory, "*.json")):
+            name = os.path.splitext(os.path.basename(file_path))[0]
+            if name.lstrip("-").isdigit():
+                yield int(name)
+
+
+class SQLiteUserStore(UserStore):
+    """
+    Хранилище пользователей в SQLite (режим WAL).
+
+    Данные пользователя хранятся JSON-строкой, а язык и признак регистрации
+    вынесены в отдельные индексируемые колонки. Колонка revision растет при
+    каждом сохранении записи и служит ее версией для кэша.
+    """
+
+    def __init__(self, db_path: str = "data/bot.db"):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS users ("
+            "user_id INTEGER PRIMARY KEY, "
+            "data TEXT NOT NULL, "
+            "language TEXT, "
+            "registered INTEGER NOT NULL DEFAULT 0, "
+            "updated_at REAL NOT NULL, "
+            "revision INTEGER NOT NULL DEFAULT 0)"
+        )
+        # Базы, созданные до появления колонки revision
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(users)")}
+        if "revision" not in columns:
+            self._conn.execute("ALTER TABLE users ADD COLUMN revision INTEGER NOT NULL DEFAULT 0")
+        # Любое изменение данных (в том числе из другого процесса или вручную) меняет revision
+        self._conn.execute(
+            "CREATE TRIGGER IF NOT EXISTS users_revision AFTER UPDATE OF data, language, registered ON users "
+            "BEGIN UPDATE users SET revision = OLD.revision + 1 WHERE user_id = NEW.user_id; END"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_users_registered ON users (registered)")
+
+    def load(self, user_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM users WHERE user_id = ?", (user_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save(self, user_id: int, data: Dict[str, Any]) -> None:
+        self.save_many([(user_id, data)])
+
+    def save_many(self, records: Iterable) -> int:
+        """Сохранение нескольких пользователей одной транзакцией."""
+        rows = [
+            (
+                user_id,
+                json.dumps(data, ensure_ascii=False),
+                data.get("language"),
+                int("full_name" in data and "course" in data and "faculty" in data),
+                time.time()
+            )
+            for user_id, data in records
+        ]
+        with self._lock:
+            with self._conn:
+                self._conn.execute("BEGIN")
+                self._conn.executemany(
+                    "INSERT INTO users (user_id, data, language, registered, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT(user_id) DO UPDATE SET data = excluded.data, language = excluded.language, "
+                    "registered = excluded.registered, updated_at = excluded.updated_at",
+                    rows
+                )
+        return len(rows)
+
+    def version(self, user_id: int) -> Any:
+        # Версия своей строки: записи в другие таблицы той же базы (FSM, вопросы) кэш не сбрасывают
+        with self._lock:
+            row = self._conn.execute("SELECT revision FROM users WHERE user_id = ?", (user_id,)).fetchone()
+        return row[0] if row else None
+
+    def user_ids(self) -> Iterable[int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT user_id FROM users").fetchall()
+        return [row[0] for row in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def create_user_store(backend: str = "json", db_path: str = "data/bot.db", directory: str = "data") -> UserStore:
+    """Создание хранилища пользователей по названию бэкенда (json или sqlite)."""
+    if backend == "json":
+        return JsonUserStore(directory)
+    if backend == "sqlite":
+        return SQLiteUserStore(db_path)
+    raise ValueError(f"Неизвестный тип хранилища пользователей: {backend}")
+
+
+def migrate_json_to_sqlite(directory: str = "data", db_path: str = "data/bot.db") -> int:
+    """Перенос всех файлов data/*.json в SQLite. Возвращает количество перенесенных пользователей."""
+    source = JsonUserStore(directory)
+    target = SQLiteUserStore(db_path)
+    records = []
+    for user_id in source.user_ids():
+        try:
+            data = source.load(user_id)
+        except json.JSONDecodeError:
+            log_warning(f"Пропущен поврежденный файл: {source.path(user_id)}")
+            continue
+        if data is not None:
+            records.append((user_id, data))
+    try:
+        return target.save_many(records)
+    finally:
+        target.close()
+
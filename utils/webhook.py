@@ -0,0 +1,127 @@
+import asyncio
+import contextlib
+import secrets
+import signal
+import time
+from typing import Any, Dict
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+
+from utils.logger import log_info
+
+
+class WebhookHandler(SimpleRequestHandler):
+    """
+    Прием обновлений от Telegram по HTTP.
+
+    Telegram получает ответ сразу, обновление обрабатывается в фоне.
+    Запросы без правильного X-Telegram-Bot-Api-Secret-Token отклоняются (401),
+    поэтому секрет обязателен.
+    При остановке сервер ждет обработки уже принятых обновлений, а сессию
+    бота не закрывает - это делает main.
+    """
+
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, secret_token: str, shutdown_timeout: float = 10):
+        if not secret_token:
+            # Без секрета любой, кто достучится до порта, может прислать поддельное обновление
+            raise ValueError("Для вебхука нужен секрет (WEBHOOK_SECRET)")
+        super().__init__(dispatcher, bot, secret_token=secret_token)
+        self.shutdown_timeout = shutdown_timeout
+        self.started_at = time.monotonic()
+        # Метрики
+        self.received = 0
+        self.rejected = 0
+
+    async def handle(self, request: web.Request) -> web.Response:
+        response = await super().handle(request)
+        if response.status == 401:
+            self.rejected += 1
+        else:
+            self.received += 1
+        return response
+
+    async def close(self) -> None:
+        """Ожидание обработки принятых обновлений (не дольше shutdown_timeout)."""
+        pending = set(self._background_feed_update_tasks)
+        if not pending:
+            return
+        log_info(f"Ожидание обработки обновлений: {len(pending)}")
+        _, not_done = await asyncio.wait(pending, timeout=self.shutdown_timeout)
+        for task in not_done:
+            task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        """Принятые и отклоненные обновления, обновления в обработке и время работы."""
+        return {
+            "received": self.received,
+            "rejected": self.rejected,
+            "in_flight": len(self._background_feed_update_tasks),
+            "uptime": round(time.monotonic() - self.started_at, 1)
+        }
+
+    async def health(self, request: web.Request) -> web.Response:
+        """GET /health: сервер работает и принимает обновления."""
+        return web.json_response({"status": "ok", **self.stats()})
+
+
+# Ключ приложения, под которым лежит обработчик вебхука (для статистики)
+WEBHOOK_HANDLER = web.AppKey("webhook_handler", WebhookHandler)
+
+
+def create_webhook_app(dispatcher: Dispatcher, bot: Bot, path: str, secret_token: str,
+                       shutdown_timeout: float = 10) -> web.Application:
+    """Приложение aiohttp с обработчиком вебхука на path и GET /health."""
+    app = web.Application()
+    handler = WebhookHandler(dispatcher, bot, secret_token=secret_token, shutdown_timeout=shutdown_timeout)
+    handler.register(app, path=path)
+    app.router.add_get("/health", handler.health)
+    app[WEBHOOK_HANDLER] = handler
+    # Запуск on_startup/on_shutdown диспетчера вместе с приложением
+    setup_application(app, dispatcher, bot=bot)
+    return app
+
+
+async def run_webhook(dispatcher: Dispatcher, bot: Bot, host: str, port: int, path: str,
+                      url: str = "", secret_token: str = "", shutdown_timeout: float = 10) -> None:
+    """
+    Работа бота в режиме вебхука до SIGINT/SIGTERM.
+
+    Если задан url, вебхук регистрируется в Telegram (секрет генерируется,
+    если не задан). Без url секрет обязателен: его должен передавать прокси
+    или тот, кто присылает обновления. При остановке сервер перестает
+    принимать запросы и ждет обработки уже принятых обновлений.
+    """
+    if not secret_token:
+        if not url:
+            raise ValueError("Режим webhook без WEBHOOK_URL требует WEBHOOK_SECRET")
+        secret_token = secrets.token_urlsafe(32)
+
+    app = create_webhook_app(dispatcher, bot, path, secret_token, shutdown_timeout)
+    runner = web.AppRunner(app, handle_signals=False)
+    await runner.setup()
+    try:
+        site = web.TCPSite(runner, host, port)
+        await site.start()
+        log_info(f"Вебхук слушает {host}:{port}{path}")
+
+        if url:
+            await bot.set_webhook(
+                url.rstrip("/") + path,
+                secret_token=secret_token,
+                allowed_updates=dispatcher.resolve_used_update_types()
+            )
+            log_info(f"Вебхук зарегистрирован: {url.rstrip('/')}{path}")
+
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            # На Windows обработчики сигналов недоступны, остановка по KeyboardInterrupt
+            with contextlib.suppress(NotImplementedError):
+                loop.add_signal_handler(sig, stop.set)
+        await stop.wait()
+        log_info("Получен сигнал остановки, вебхук завершает работу")
+    finally:
+        log_info(f"Вебхук: {app[WEBHOOK_HANDLER].stats()}")
+        await runner.cleanup()